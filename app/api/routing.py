@@ -0,0 +1,62 @@
+import inspect
+from functools import lru_cache, wraps
+from typing import Any, Callable, List, Optional, Type, get_args, get_origin
+
+from fastapi import Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=64)
+def _model_list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Сериализатор списка моделей одного типа (создается один раз на тип)"""
+    return TypeAdapter(List[model])
+
+
+def _models_to_json(result: Any, response_model: Any = None) -> Optional[bytes]:
+    """
+    JSON-байты для Pydantic-модели или списка моделей одного типа
+
+    Если задан response_model, модели должны быть ровно того типа, который он описывает
+    (Model или List[Model]). Для остальных значений возвращает None - они идут
+    обычным путем FastAPI с валидацией и фильтрацией по response_model
+    """
+    if isinstance(result, BaseModel):
+        if response_model is not None and type(result) is not response_model:
+            return None
+        return result.model_dump_json(by_alias=True).encode("utf-8")
+    if isinstance(result, list) and result and isinstance(result[0], BaseModel):
+        model = type(result[0])
+        if response_model is not None and (get_origin(response_model) is not list or get_args(response_model) != (model,)):
+            return None
+        if all(type(item) is model for item in result):
+            return _model_list_adapter(model).dump_json(result, by_alias=True)
+    return None
+
+
+class TrustedResponseRoute(APIRoute):
+    """
+    Маршрут без повторной валидации ответа по response_model для готовых моделей
+
+    Если endpoint вернул собранную сервисами Pydantic-модель (или список моделей)
+    ровно того типа, что объявлен в response_model, она сериализуется в JSON напрямую
+    через pydantic-core, без jsonable_encoder и второго прохода валидации.
+    Словари, смешанные списки и прочие ответы (например, из кэша) идут обычным путем
+    FastAPI: валидируются и фильтруются по response_model.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = self._serialize_models(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _serialize_models(self, endpoint: Callable[..., Any], status_code: int) -> Callable[..., Any]:
+        @wraps(endpoint)
+        async def serialize_models(*args: Any, **kwargs: Any) -> Any:
+            result = await endpoint(*args, **kwargs)
+            body = _models_to_json(result, self.response_model)
+            if body is None:
+                return result
+            return Response(content=body, status_code=status_code, media_type="application/json")
+
+        return serialize_models
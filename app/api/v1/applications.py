@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import List
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 
+from app.api.routing import TrustedResponseRoute
 from app.models.application import ApplicationRequest, ApplicationResponse, Application, ApplicationRequestRaw
 from app.services.email_service import email_service
 from app.services.cache_service import cache_service
@@ -11,7 +12,7 @@ from app.config import settings
 from pytz import timezone
 from datetime import timedelta
 logger = setup_logger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TrustedResponseRoute)
 
 @router.post("/submit", response_model=ApplicationResponse)
 async def submit_application(
@@ -48,13 +49,13 @@ async def submit_application(
             "alexandratur@yandex.ru"                 # И только потом дефолтный
         )
         
-        logger.info(f"📧 Заявка {application_id} будет отправлена на: {recipient_email}")
-        logger.info(f"📧 emailTo из заявки: {application_request.emailTo}")
-        logger.info(f"📧 EMAIL_TO из settings: {settings.EMAIL_TO}")
+        logger.info("📧 Заявка %s будет отправлена на: %s", application_id, recipient_email)
+        logger.info("📧 emailTo из заявки: %s", application_request.emailTo)
+        logger.info("📧 EMAIL_TO из settings: %s", settings.EMAIL_TO)
         
         # Логируем получение заявки
         if application.body:
-            logger.info(f"📝 Получен HTML body для заявки {application_id}, длина: {len(application.body)} символов")
+            logger.info("📝 Получен HTML body для заявки %s, длина: %s символов", application_id, len(application.body))
         
         # Сохраняем заявку в Redis
         await cache_service.set(
@@ -75,7 +76,7 @@ async def submit_application(
             recipient_email  # ← ВОТ КЛЮЧЕВОЕ ИЗМЕНЕНИЕ!
         )
         
-        logger.info(f"Создана новая заявка {application_id} от {application.name}")
+        logger.info("Создана новая заявка %s от %s", application_id, application.name)
         
         return ApplicationResponse(
             success=True,
@@ -84,7 +85,7 @@ async def submit_application(
         )
         
     except Exception as e:
-        logger.error(f"Ошибка при создании заявки: {e}")
+        logger.error("Ошибка при создании заявки: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Произошла ошибка при обработке заявки. Попробуйте еще раз."
@@ -105,7 +106,7 @@ async def get_application(application_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Ошибка при получении заявки {application_id}: {e}")
+        logger.error("Ошибка при получении заявки %s: %s", application_id, e)
         raise HTTPException(status_code=500, detail="Ошибка при получении заявки")
 
 
@@ -125,10 +126,10 @@ async def submit_raw_application(
             "alexandratur@yandex.ru"                 # И только потом дефолтный
         )
         
-        logger.info(f"=== НАЧАЛО ОТЛАДКИ EMAIL ОТПРАВКИ ===")
-        logger.info(f"📧 emailTo из заявки: '{application_request.emailTo}'")
-        logger.info(f"📧 EMAIL_TO из settings: '{settings.EMAIL_TO}'")
-        logger.info(f"📧 Итоговый получатель: '{recipient_email}'")
+        logger.info("=== НАЧАЛО ОТЛАДКИ EMAIL ОТПРАВКИ ===")
+        logger.info("📧 emailTo из заявки: '%s'", application_request.emailTo)
+        logger.info("📧 EMAIL_TO из settings: '%s'", settings.EMAIL_TO)
+        logger.info("📧 Итоговый получатель: '%s'", recipient_email)
         
         if not recipient_email:
             logger.error("❌ EMAIL_TO не настроен!")
@@ -141,8 +142,8 @@ async def submit_raw_application(
         original_html = application_request.body
         fixed_html = email_service._fix_html_tags(original_html)
         
-        logger.info(f"📝 Исходный HTML ({len(original_html)} символов)")
-        logger.info(f"📝 Исправленный HTML ({len(fixed_html)} символов)")
+        logger.info("📝 Исходный HTML (%s символов)", len(original_html))
+        logger.info("📝 Исправленный HTML (%s символов)", len(fixed_html))
         
         # 🎯 КРИТИЧНО: Передаем recipient_email!
         try:
@@ -152,7 +153,7 @@ async def submit_raw_application(
                 recipient_email  # ← ВОТ КЛЮЧЕВОЕ ИЗМЕНЕНИЕ!
             )
             
-            logger.info(f"🎯 РЕЗУЛЬТАТ ОТПРАВКИ: {result}")
+            logger.info("🎯 РЕЗУЛЬТАТ ОТПРАВКИ: %s", result)
             
             if result:
                 logger.info("✅ EMAIL ОТПРАВЛЕН УСПЕШНО!")
@@ -169,7 +170,7 @@ async def submit_raw_application(
                 )
                 
         except Exception as email_error:
-            logger.error(f"❌ ИСКЛЮЧЕНИЕ ПРИ ОТПРАВКЕ EMAIL: {email_error}")
+            logger.error("❌ ИСКЛЮЧЕНИЕ ПРИ ОТПРАВКЕ EMAIL: %s", email_error)
             raise HTTPException(
                 status_code=500,
                 detail=f"Ошибка email: {str(email_error)}"
@@ -178,7 +179,7 @@ async def submit_raw_application(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ ОБЩАЯ ОШИБКА В ЭНДПОЙНТЕ: {e}")
+        logger.error("❌ ОБЩАЯ ОШИБКА В ЭНДПОЙНТЕ: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Критическая ошибка: {str(e)}"
@@ -195,11 +196,12 @@ async def get_all_applications(limit: int = 50, offset: int = 0):
         # Применяем пагинацию
         paginated_ids = all_application_ids[offset:offset + limit]
         
-        applications = []
-        for app_id in paginated_ids:
-            app_data = await cache_service.get(f"application:{app_id}")
-            if app_data:
-                applications.append(Application(**app_data))
+        # Все заявки страницы читаем из Redis одним пакетным запросом
+        app_keys = [f"application:{app_id}" for app_id in paginated_ids]
+        cached_by_key = await cache_service.get_multiple(app_keys)
+        applications = [
+            Application(**cached_by_key[key]) for key in app_keys if cached_by_key.get(key)
+        ]
         
         # Сортируем по дате создания (новые сначала)
         applications.sort(key=lambda x: x.created_at, reverse=True)
@@ -207,7 +209,7 @@ async def get_all_applications(limit: int = 50, offset: int = 0):
         return applications
         
     except Exception as e:
-        logger.error(f"Ошибка при получении списка заявок: {e}")
+        logger.error("Ошибка при получении списка заявок: %s", e)
         raise HTTPException(status_code=500, detail="Ошибка при получении заявок")
 
 @router.patch("/{application_id}/status")
@@ -229,12 +231,12 @@ async def update_application_status(application_id: str, status: str):
             ttl=2592000
         )
         
-        logger.info(f"Статус заявки {application_id} изменен на {status}")
+        logger.info("Статус заявки %s изменен на %s", application_id, status)
         
         return {"success": True, "message": f"Статус заявки изменен на {status}"}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Ошибка при обновлении статуса заявки {application_id}: {e}")
+        logger.error("Ошибка при обновлении статуса заявки %s: %s", application_id, e)
         raise HTTPException(status_code=500, detail="Ошибка при обновлении статуса")
\ No newline at end of file
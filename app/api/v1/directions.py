@@ -1,34 +1,194 @@
 # app/api/v1/directions.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from typing import List, Dict, Any, Optional
+from datetime import datetime
+import asyncio
+import orjson
+import time
+import uuid
+from app.config import settings
+from app.core.tourvisor_client import tourvisor_client
 from app.services.directions_service import directions_service
 from app.services.cache_service import cache_service
+from app.utils.compression import PrecompressedBody
 from app.utils.logger import setup_logger
+from app.utils.singleflight import CachedFlight, SingleFlight
 
 logger = setup_logger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-@router.get("/countries/list")
-async def get_supported_countries():
+DIRECTIONS_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=60"
+
+def _version_etag(version: str) -> str:
+    return f'W/"{version}"'
+
+async def _directions_etag(request: Request) -> tuple[str, Optional[Response]]:
     """
-    Получение списка поддерживаемых стран с их ID
+    ETag по версии кэша направлений
+
+    Возвращает ETag и готовый ответ 304, если клиент уже получил эту версию.
+    """
+    etag = _version_etag(await directions_service.current_version())
+    if request.headers.get("if-none-match") == etag:
+        return etag, Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": DIRECTIONS_CACHE_CONTROL}
+        )
+    return etag, None
+
+# Сериализованные ответы по ключу запроса: {key: (etag, JSON-байты)}
+# Пока версия кэша направлений не изменилась, ответ отдается без чтения Redis и сериализации.
+# Ключи зависят от параметров запроса (limit), поэтому число ответов в памяти ограничено
+_serialized_directions: Dict[tuple, tuple[str, bytes]] = {}
+SERIALIZED_DIRECTIONS_MAX_ENTRIES = 128
+
+# Те же байты в Redis - общие для всех воркеров. Версия кэша входит в ключ,
+# поэтому после обновления направлений старые ответы просто не читаются и истекают по TTL
+DIRECTIONS_RESPONSE_TTL = 300
+
+# Статус кэша собирается SCAN-ом по нескольким паттернам - не чаще раза в CACHE_STATUS_TTL
+CACHE_STATUS_TTL = 10
+_cache_status_flights = CachedFlight(ttl=CACHE_STATUS_TTL)
+
+def _directions_response_key(key: tuple, etag: str) -> str:
+    """Ключ Redis вида directions:response:{версия}:{параметры запроса}"""
+    version = etag[3:-1]
+    return ":".join(["directions:response", version, *map(str, key)])
+
+def _directions_bytes_response(body: bytes, etag: str) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": DIRECTIONS_CACHE_CONTROL}
+    )
+
+def _remember_directions_response(key: tuple, etag: str, body: bytes):
+    """Сохранение байтов ответа в памяти процесса; при переполнении вытесняется самый старый"""
+    _serialized_directions.pop(key, None)
+    if len(_serialized_directions) >= SERIALIZED_DIRECTIONS_MAX_ENTRIES:
+        del _serialized_directions[next(iter(_serialized_directions))]
+    _serialized_directions[key] = (etag, body)
+
+async def _invalidate_directions_responses():
     """
-    countries = []
-    for name, info in directions_service.COUNTRIES_MAPPING.items():
-        if info["country_id"] is not None:  # Только страны с определенными ID
-            countries.append({
-                "country_name": name,
-                "country_id": info["country_id"]
-            })
+    Сброс готовых ответов после удаления направлений из кэша
+
+    Новая версия меняет ETag и ключи directions:response:* в Redis - старые байты
+    больше не отдаются, следующий запрос заново читает или генерирует направления
+    """
+    _serialized_directions.clear()
+    await directions_service.bump_version()
+
+async def _cached_directions_response(key: tuple, etag: str) -> Optional[Response]:
+    """Готовый ответ, если он сериализован для текущей версии кэша (в процессе или в Redis)"""
+    cached = _serialized_directions.get(key)
+    if cached and cached[0] == etag:
+        return _directions_bytes_response(cached[1], etag)
+    
+    body = await cache_service.get_raw(_directions_response_key(key, etag))
+    if body:
+        _remember_directions_response(key, etag, body)
+        return _directions_bytes_response(body, etag)
+    return None
+
+async def _store_directions_response(key: tuple, etag: str, content: Any) -> Response:
+    """Сериализация ответа с сохранением байтов для следующих запросов"""
+    body = orjson.dumps(content)
+    _remember_directions_response(key, etag, body)
+    await cache_service.set_raw(_directions_response_key(key, etag), body, ttl=DIRECTIONS_RESPONSE_TTL)
+    return _directions_bytes_response(body, etag)
+
+async def _preserialize_directions_response(key: tuple, content: Any):
+    """Сериализация ответа сразу после обновления - первый запрос новой версии берет готовые байты"""
+    etag = _version_etag(await directions_service.current_version())
+    await _store_directions_response(key, etag, content)
+
+def _country_directions_content(country_id: int, country_name: str, directions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Ответ /country/{country_id}: направления страны со статистикой"""
+    summary = directions_service.summarize_directions(directions)
+    with_prices, with_images = summary["with_prices"], summary["with_images"]
+    
+    return {
+        "country_name": country_name,
+        "country_id": country_id,
+        "total_directions": len(directions),
+        "statistics": {
+            "with_prices": with_prices,
+            "with_images": with_images,
+            "completion_rate": f"{(with_prices/len(directions)*100):.1f}%" if directions else "0%"
+        },
+        "directions": directions
+    }
+
+def _flat_directions_content(country_id: int, country_name: str, directions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ответ /country/{country_id}/flat: только валидные направления с исправленными NULL"""
+    # ИСПРАВЛЕНИЕ: Валидация и фильтрация результатов
+    valid_directions = []
+    invalid_count = 0
+    
+    for direction in directions:
+        # Проверяем обязательные поля
+        if not direction.get("city_name"):
+            invalid_count += 1
+            continue
+        
+        # Исправляем NULL значения если они остались
+        fixed_direction = {
+            "country_name": direction.get("country_name", country_name),
+            "country_id": direction.get("country_id", country_id),
+            "city_name": direction.get("city_name", ""),
+            "min_price": direction.get("min_price"),  # Может быть None
+            "image_link": direction.get("image_link")  # Может быть None
+        }
+        
+        valid_directions.append(fixed_direction)
+    
+    if invalid_count > 0:
+        logger.warning("⚠️ Отфильтровано %s невалидных направлений", invalid_count)
+    
+    return valid_directions
+
+def _filtered_directions_content(all_directions: List[Dict[str, Any]], filter_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Ответ GET /: направления с примененным фильтром и статистикой"""
+    summary = directions_service.summarize_directions(all_directions)
+    with_prices, with_images = summary["with_prices"], summary["with_images"]
     
     return {
-        "countries": countries,
-        "total": len(countries)
+        "filter_applied": filter_info,
+        "total_results": len(all_directions),
+        "statistics": {
+            "countries_represented": summary["countries"],
+            "directions_with_prices": with_prices,
+            "directions_with_images": with_images,
+            "data_completeness": f"{(with_prices/len(all_directions)*100):.1f}%" if all_directions else "0%"
+        },
+        "directions": all_directions
     }
 
+# Список стран статичен - собираем и сериализуем ответ один раз
+SUPPORTED_COUNTRIES = [
+    {"country_name": name, "country_id": country_id}
+    for country_id, name in directions_service.COUNTRY_NAMES_BY_ID.items()
+]
+SUPPORTED_COUNTRIES_RESPONSE = PrecompressedBody(orjson.dumps({
+    "countries": SUPPORTED_COUNTRIES,
+    "total": len(SUPPORTED_COUNTRIES)
+}))
+
+@router.get("/countries/list")
+async def get_supported_countries(request: Request):
+    """
+    Получение списка поддерживаемых стран с их ID
+    """
+    return SUPPORTED_COUNTRIES_RESPONSE.response(
+        request,
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
+
 @router.get("/country/{country_id}")
-async def get_directions_by_country_id(country_id: int) -> Dict[str, Any]:
+async def get_directions_by_country_id(request: Request, country_id: int) -> Dict[str, Any]:
     """
     ИСПРАВЛЕННОЕ получение направлений для конкретной страны по ID
     
@@ -42,14 +202,10 @@ async def get_directions_by_country_id(country_id: int) -> Dict[str, Any]:
         if country_id <= 0:
             raise HTTPException(status_code=400, detail="country_id должен быть положительным числом")
         
-        logger.info(f"🎯 API запрос направлений для country_id: {country_id}")
+        logger.info("🎯 API запрос направлений для country_id: %s", country_id)
         
         # Находим название страны по ID
-        country_name = None
-        for name, info in directions_service.COUNTRIES_MAPPING.items():
-            if info["country_id"] == country_id:
-                country_name = name
-                break
+        country_name = directions_service.COUNTRY_NAMES_BY_ID.get(country_id)
         
         if not country_name:
             # Возвращаем список доступных стран для удобства
@@ -66,32 +222,29 @@ async def get_directions_by_country_id(country_id: int) -> Dict[str, Any]:
                 }
             )
         
-        directions = await directions_service.get_directions_by_country(country_name)
+        response_key = ("country", country_id)
+        etag, not_modified = await _directions_etag(request)
+        if not_modified:
+            return not_modified
+        cached_response = await _cached_directions_response(response_key, etag)
+        if cached_response:
+            return cached_response
         
-        # Статистика результатов
-        with_prices = len([d for d in directions if d.get("min_price")])
-        with_images = len([d for d in directions if d.get("image_link")])
+        directions = await directions_service.get_directions_by_country(country_name)
         
-        return {
-            "country_name": country_name,
-            "country_id": country_id,
-            "total_directions": len(directions),
-            "statistics": {
-                "with_prices": with_prices,
-                "with_images": with_images,
-                "completion_rate": f"{(with_prices/len(directions)*100):.1f}%" if directions else "0%"
-            },
-            "directions": directions
-        }
+        return await _store_directions_response(
+            response_key, etag, _country_directions_content(country_id, country_name, directions)
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Ошибка API направлений для country_id {country_id}: {e}")
+        logger.error("❌ Ошибка API направлений для country_id %s: %s", country_id, e)
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 @router.get("/country/{country_id}/flat")
 async def get_directions_flat_by_id(
+    request: Request,
     country_id: int,
     force_refresh: Optional[bool] = Query(False, description="Принудительное обновление кэша")
 ) -> List[Dict[str, Any]]:
@@ -109,57 +262,40 @@ async def get_directions_flat_by_id(
         if country_id <= 0:
             raise HTTPException(status_code=400, detail="country_id должен быть положительным числом")
         
-        logger.info(f"📋 API плоский список с ценами для country_id: {country_id} (force_refresh: {force_refresh})")
+        logger.info("📋 API плоский список с ценами для country_id: %s (force_refresh: %s)", country_id, force_refresh)
         
         # Принудительное обновление кэша если запрошено
         if force_refresh:
             cache_key = f"directions_with_prices_country_{country_id}"
             await cache_service.delete(cache_key)
-            logger.info(f"🔄 Принудительно очищен кэш для страны {country_id}")
+            await _invalidate_directions_responses()
+            logger.info("🔄 Принудительно очищен кэш для страны %s", country_id)
         
         # Находим название страны по ID
-        country_name = None
-        for name, info in directions_service.COUNTRIES_MAPPING.items():
-            if info["country_id"] == country_id:
-                country_name = name
-                break
+        country_name = directions_service.COUNTRY_NAMES_BY_ID.get(country_id)
         
         if not country_name:
             raise HTTPException(status_code=404, detail=f"Страна с ID {country_id} не найдена")
         
-        directions = await directions_service.get_directions_by_country(country_name)
+        response_key = ("flat", country_id)
+        etag, not_modified = await _directions_etag(request)
+        if not force_refresh:
+            if not_modified:
+                return not_modified
+            cached_response = await _cached_directions_response(response_key, etag)
+            if cached_response:
+                return cached_response
         
-        # ИСПРАВЛЕНИЕ: Валидация и фильтрация результатов
-        valid_directions = []
-        invalid_count = 0
-        
-        for direction in directions:
-            # Проверяем обязательные поля
-            if not direction.get("city_name"):
-                invalid_count += 1
-                continue
-            
-            # Исправляем NULL значения если они остались
-            fixed_direction = {
-                "country_name": direction.get("country_name", country_name),
-                "country_id": direction.get("country_id", country_id),
-                "city_name": direction.get("city_name", ""),
-                "min_price": direction.get("min_price"),  # Может быть None
-                "image_link": direction.get("image_link")  # Может быть None
-            }
-            
-            valid_directions.append(fixed_direction)
-        
-        if invalid_count > 0:
-            logger.warning(f"⚠️ Отфильтровано {invalid_count} невалидных направлений")
+        directions = await directions_service.get_directions_by_country(country_name)
+        valid_directions = _flat_directions_content(country_id, country_name, directions)
         
-        logger.info(f"✅ Возвращаем {len(valid_directions)} валидных направлений с минимальными ценами")
-        return valid_directions
+        logger.info("✅ Возвращаем %s валидных направлений с минимальными ценами", len(valid_directions))
+        return await _store_directions_response(response_key, etag, valid_directions)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Ошибка API плоского списка для country_id {country_id}: {e}")
+        logger.error("❌ Ошибка API плоского списка для country_id %s: %s", country_id, e)
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 @router.get("/country/{country_id}/quick")
@@ -177,14 +313,10 @@ async def get_directions_quick(country_id: int) -> List[Dict[str, Any]]:
         if country_id <= 0:
             raise HTTPException(status_code=400, detail="country_id должен быть положительным числом")
         
-        logger.info(f"⚡ Быстрый запрос направлений для country_id: {country_id}")
+        logger.info("⚡ Быстрый запрос направлений для country_id: %s", country_id)
         
         # Находим название страны по ID
-        country_name = None
-        for name, info in directions_service.COUNTRIES_MAPPING.items():
-            if info["country_id"] == country_id:
-                country_name = name
-                break
+        country_name = directions_service.COUNTRY_NAMES_BY_ID.get(country_id)
         
         if not country_name:
             raise HTTPException(status_code=404, detail=f"Страна с ID {country_id} не найдена")
@@ -214,17 +346,18 @@ async def get_directions_quick(country_id: int) -> List[Dict[str, Any]]:
                 if is_synthetic:
                     synthetic_count += 1
         
-        logger.info(f"⚡ Быстро получено {len(result)} направлений (синтетических: {synthetic_count})")
+        logger.info("⚡ Быстро получено %s направлений (синтетических: %s)", len(result), synthetic_count)
         return result
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Ошибка быстрого запроса для country_id {country_id}: {e}")
+        logger.error("❌ Ошибка быстрого запроса для country_id %s: %s", country_id, e)
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 @router.get("/")
 async def get_directions_with_filter(
+    request: Request,
     country_id: Optional[int] = Query(None, description="ID страны для фильтрации"),
     limit: Optional[int] = Query(None, ge=1, le=100, description="Лимит результатов"),
     force_refresh: Optional[bool] = Query(False, description="Принудительное обновление")
@@ -239,7 +372,7 @@ async def get_directions_with_filter(
     4. Обработка ошибок
     """
     try:
-        logger.info(f"🔍 API фильтр направлений: country_id={country_id}, limit={limit}, force_refresh={force_refresh}")
+        logger.info("🔍 API фильтр направлений: country_id=%s, limit=%s, force_refresh=%s", country_id, limit, force_refresh)
         
         # Валидация параметров
         if country_id is not None and country_id <= 0:
@@ -249,7 +382,17 @@ async def get_directions_with_filter(
         if force_refresh and country_id:
             cache_key = f"directions_with_prices_country_{country_id}"
             await cache_service.delete(cache_key)
-            logger.info(f"🔄 Принудительно очищен кэш для страны {country_id}")
+            await _invalidate_directions_responses()
+            logger.info("🔄 Принудительно очищен кэш для страны %s", country_id)
+        
+        response_key = ("filter", country_id, limit)
+        etag, not_modified = await _directions_etag(request)
+        if not force_refresh:
+            if not_modified:
+                return not_modified
+            cached_response = await _cached_directions_response(response_key, etag)
+            if cached_response:
+                return cached_response
         
         # Получаем направления
         if country_id is not None:
@@ -263,30 +406,17 @@ async def get_directions_with_filter(
                 all_directions = all_directions[:limit]
             filter_info = {"country_id": None, "limit": limit}
         
-        # Статистика
-        countries_count = len(set(d["country_id"] for d in all_directions))
-        with_prices = len([d for d in all_directions if d.get("min_price")])
-        with_images = len([d for d in all_directions if d.get("image_link")])
-        
-        return {
-            "filter_applied": filter_info,
-            "total_results": len(all_directions),
-            "statistics": {
-                "countries_represented": countries_count,
-                "directions_with_prices": with_prices,
-                "directions_with_images": with_images,
-                "data_completeness": f"{(with_prices/len(all_directions)*100):.1f}%" if all_directions else "0%"
-            },
-            "directions": all_directions
-        }
+        return await _store_directions_response(
+            response_key, etag, _filtered_directions_content(all_directions, filter_info)
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Ошибка API фильтра направлений: {e}")
+        logger.error("❌ Ошибка API фильтра направлений: %s", e)
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
-@router.get("/debug/regions/{country_id}")
+@router.get("/debug/regions/{country_id}", include_in_schema=settings.DEBUG)
 async def debug_regions_for_country(country_id: int):
     """
     ИСПРАВЛЕННЫЙ отладочный endpoint для проверки получения регионов
@@ -296,11 +426,9 @@ async def debug_regions_for_country(country_id: int):
         if country_id <= 0:
             raise HTTPException(status_code=400, detail="country_id должен быть положительным числом")
         
-        logger.info(f"🔍 Отладка регионов для страны {country_id}")
+        logger.info("🔍 Отладка регионов для страны %s", country_id)
         
         # Прямой запрос к API
-        from app.core.tourvisor_client import tourvisor_client
-        
         regions_data = await tourvisor_client.get_references("region", regcountry=country_id)
         
         # Анализ ответа
@@ -327,14 +455,14 @@ async def debug_regions_for_country(country_id: int):
         }
         
     except Exception as e:
-        logger.error(f"❌ Ошибка отладки для страны {country_id}: {e}")
+        logger.error("❌ Ошибка отладки для страны %s: %s", country_id, e)
         return {
             "error": str(e),
             "country_id": country_id,
             "status": "error"
         }
 
-@router.get("/test/{country_id}")
+@router.get("/test/{country_id}", include_in_schema=settings.DEBUG)
 async def test_country_directions_by_id(country_id: int):
     """
     ИСПРАВЛЕННЫЙ тестовый endpoint для проверки работы с конкретной страной
@@ -344,14 +472,10 @@ async def test_country_directions_by_id(country_id: int):
         if country_id <= 0:
             return {"error": "country_id должен быть положительным числом"}
         
-        logger.info(f"🧪 Тест направлений для country_id: {country_id}")
+        logger.info("🧪 Тест направлений для country_id: %s", country_id)
         
         # Находим название страны по ID
-        country_name = None
-        for name, info in directions_service.COUNTRIES_MAPPING.items():
-            if info["country_id"] == country_id:
-                country_name = name
-                break
+        country_name = directions_service.COUNTRY_NAMES_BY_ID.get(country_id)
         
         if not country_name:
             return {
@@ -369,8 +493,8 @@ async def test_country_directions_by_id(country_id: int):
         end_time = __import__('time').time()
         
         # Анализ результатов
-        with_prices = len([d for d in directions if d.get("min_price")])
-        with_images = len([d for d in directions if d.get("image_link")])
+        summary = directions_service.summarize_directions(directions)
+        with_prices, with_images = summary["with_prices"], summary["with_images"]
         
         return {
             "success": True,
@@ -388,7 +512,7 @@ async def test_country_directions_by_id(country_id: int):
         }
         
     except Exception as e:
-        logger.error(f"❌ Ошибка теста для country_id {country_id}: {e}")
+        logger.error("❌ Ошибка теста для country_id %s: %s", country_id, e)
         return {
             "error": str(e),
             "country_id": country_id,
@@ -417,6 +541,7 @@ async def clear_directions_cache():
             "top_cities_country_*",              # Кэш городов
             "regions_*",                         # Кэш регионов
             "destinations_search_based",         # Кэш через поиск
+            "directions:response:*",             # Готовые сериализованные ответы API
         ]
         
         total_deleted = 0
@@ -432,17 +557,18 @@ async def clear_directions_cache():
                 total_deleted += deleted_count
                 
                 if deleted_count > 0:
-                    logger.info(f"🗑️ Удалено {deleted_count} ключей по паттерну: {pattern}")
+                    logger.info("🗑️ Удалено %s ключей по паттерну: %s", deleted_count, pattern)
                 else:
-                    logger.info(f"🔍 Нет ключей для паттерна: {pattern}")
+                    logger.info("🔍 Нет ключей для паттерна: %s", pattern)
                     
             except Exception as e:
                 error_msg = f"Ошибка очистки паттерна {pattern}: {str(e)}"
-                logger.error(f"❌ {error_msg}")
+                logger.error("❌ %s", error_msg)
                 deleted_by_pattern[pattern] = f"error: {str(e)}"
                 errors.append(error_msg)
         
-        logger.info(f"✅ Всего удалено {total_deleted} ключей кэша направлений")
+        await _invalidate_directions_responses()
+        logger.info("✅ Всего удалено %s ключей кэша направлений", total_deleted)
         
         result = {
             "success": True,
@@ -462,7 +588,7 @@ async def clear_directions_cache():
         return result
         
     except Exception as e:
-        logger.error(f"❌ Ошибка очистки кэша направлений: {e}")
+        logger.error("❌ Ошибка очистки кэша направлений: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Ошибка при очистке кэша: {str(e)}"
@@ -477,7 +603,13 @@ async def get_cache_status():
     1. Более безопасное получение TTL
     2. Лучшая обработка ошибок
     3. Расширенная статистика
+    4. Частые опросы получают результат сканирования не старше CACHE_STATUS_TTL
     """
+    cache_status = await _cache_status_flights.do("cache_status", _collect_cache_status)
+    return Response(content=orjson.dumps(cache_status, default=str), media_type="application/json")
+
+async def _collect_cache_status() -> Dict[str, Any]:
+    """Сканирование ключей кэша направлений по паттернам"""
     try:
         logger.info("📊 Запрос статуса кэша направлений")
         
@@ -493,10 +625,16 @@ async def get_cache_status():
         total_keys = 0
         total_memory_usage = 0
         
-        for pattern in cache_patterns:
+        # Поиск ключей по всем паттернам независим - выполняем параллельно
+        keys_by_pattern = await asyncio.gather(
+            *[cache_service.get_keys_pattern(pattern) for pattern in cache_patterns],
+            return_exceptions=True
+        )
+        
+        for pattern, keys in zip(cache_patterns, keys_by_pattern):
             try:
-                # Используем безопасный метод получения ключей
-                keys = await cache_service.get_keys_pattern(pattern) if hasattr(cache_service, 'get_keys_pattern') else []
+                if isinstance(keys, Exception):
+                    raise keys
                 
                 if keys:
                     pattern_info = {
@@ -513,7 +651,7 @@ async def get_cache_status():
                                 pattern_info["example_ttl_seconds"] = ttl
                                 pattern_info["example_ttl_human"] = f"{ttl//3600}ч {(ttl%3600)//60}м"
                         except Exception as ttl_error:
-                            logger.debug(f"Не удалось получить TTL для {keys[0]}: {ttl_error}")
+                            logger.debug("Не удалось получить TTL для %s: %s", keys[0], ttl_error)
                     
                     # Примерный размер (если доступно)
                     try:
@@ -560,13 +698,80 @@ async def get_cache_status():
         }
         
     except Exception as e:
-        logger.error(f"❌ Ошибка получения статуса кэша: {e}")
+        logger.error("❌ Ошибка получения статуса кэша: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Ошибка при получении статуса кэша: {str(e)}"
         )
 
-@router.post("/refresh/{country_id}")
+# Повторные обновления одной страны: одновременные ждут одно обновление,
+# а пришедшие в течение REFRESH_DEBOUNCE_SECONDS после него получают тот же результат
+REFRESH_DEBOUNCE_SECONDS = 5
+_refresh_country_flights = SingleFlight()
+_recent_country_refreshes: Dict[int, tuple[float, Dict[str, Any]]] = {}
+
+async def _refresh_country(country_id: int, country_name: str) -> Dict[str, Any]:
+    """Очистка кэшей страны и повторная генерация направлений"""
+    start_time = time.perf_counter()
+    
+    # Очищаем все связанные кэши для этой страны
+    cache_keys_to_clear = [
+        f"directions_with_prices_country_{country_id}",
+        f"directions_country_{country_id}",
+        f"top_cities_country_{country_id}"
+    ]
+    
+    cleared_count = 0
+    for cache_key in cache_keys_to_clear:
+        try:
+            await cache_service.delete(cache_key)
+            cleared_count += 1
+        except Exception as e:
+            logger.warning("⚠️ Не удалось очистить ключ %s: %s", cache_key, e)
+    
+    await _invalidate_directions_responses()
+    logger.info("🗑️ Очищено %s ключей кэша для страны %s", cleared_count, country_name)
+    
+    # Генерируем новые данные
+    directions = await directions_service.get_directions_by_country(country_name)
+    
+    execution_time = round(time.perf_counter() - start_time, 2)
+    
+    # Анализ результатов
+    summary = directions_service.summarize_directions(directions)
+    with_prices, with_images = summary["with_prices"], summary["with_images"]
+    avg_price = summary["price_sum"] / with_prices if with_prices > 0 else 0
+    
+    # Новая версия кэша направлений - сразу готовим ответы страны для GET-запросов
+    await _preserialize_directions_response(
+        ("country", country_id), _country_directions_content(country_id, country_name, directions)
+    )
+    await _preserialize_directions_response(
+        ("flat", country_id), _flat_directions_content(country_id, country_name, directions)
+    )
+    
+    result = {
+        "success": True,
+        "country_name": country_name,
+        "country_id": country_id,
+        "directions_count": len(directions),
+        "performance": {
+            "execution_time_seconds": execution_time,
+            "cache_keys_cleared": cleared_count
+        },
+        "statistics": {
+            "directions_with_prices": with_prices,
+            "directions_with_images": with_images,
+            "success_rate": f"{(with_prices/len(directions)*100):.1f}%" if directions else "0%",
+            "average_price": round(avg_price) if avg_price > 0 else None
+        },
+        "message": f"Направления для {country_name} успешно обновлены",
+        "sample_directions": directions[:3] if directions else []  # Показываем первые 3 для примера
+    }
+    _recent_country_refreshes[country_id] = (time.monotonic(), result)
+    return result
+
+@router.post("/refresh/{country_id:int}")
 async def force_refresh_country_directions(country_id: int):
     """
     ИСПРАВЛЕННОЕ принудительное обновление направлений для конкретной страны
@@ -575,20 +780,17 @@ async def force_refresh_country_directions(country_id: int):
     1. Валидация входных данных
     2. Измерение производительности
     3. Подробная статистика результатов
+    4. Повторные запросы не запускают обновление заново (см. REFRESH_DEBOUNCE_SECONDS)
     """
     try:
         # Валидация
         if country_id <= 0:
             raise HTTPException(status_code=400, detail="country_id должен быть положительным числом")
         
-        logger.info(f"🔄 Принудительное обновление направлений для страны {country_id}")
+        logger.info("🔄 Принудительное обновление направлений для страны %s", country_id)
         
         # Находим название страны
-        country_name = None
-        for name, info in directions_service.COUNTRIES_MAPPING.items():
-            if info["country_id"] == country_id:
-                country_name = name
-                break
+        country_name = directions_service.COUNTRY_NAMES_BY_ID.get(country_id)
         
         if not country_name:
             raise HTTPException(
@@ -596,78 +798,87 @@ async def force_refresh_country_directions(country_id: int):
                 detail=f"Страна с ID {country_id} не найдена в списке поддерживаемых стран"
             )
         
-        # Измеряем время выполнения
-        import time
-        start_time = time.time()
-        
-        # Очищаем все связанные кэши для этой страны
-        cache_keys_to_clear = [
-            f"directions_with_prices_country_{country_id}",
-            f"directions_country_{country_id}",
-            f"top_cities_country_{country_id}"
-        ]
-        
-        cleared_count = 0
-        for cache_key in cache_keys_to_clear:
-            try:
-                await cache_service.delete(cache_key)
-                cleared_count += 1
-            except Exception as e:
-                logger.warning(f"⚠️ Не удалось очистить ключ {cache_key}: {e}")
-        
-        logger.info(f"🗑️ Очищено {cleared_count} ключей кэша для страны {country_name}")
-        
-        # Генерируем новые данные
-        directions = await directions_service.get_directions_by_country(country_name)
+        recent = _recent_country_refreshes.get(country_id)
+        if recent and time.monotonic() - recent[0] < REFRESH_DEBOUNCE_SECONDS:
+            logger.info("♻️ Страна %s только что обновлена, возвращаем результат", country_name)
+            return recent[1]
         
-        end_time = time.time()
-        execution_time = round(end_time - start_time, 2)
-        
-        # Анализ результатов
-        with_prices = len([d for d in directions if d.get("min_price")])
-        with_images = len([d for d in directions if d.get("image_link")])
-        avg_price = sum(d.get("min_price", 0) for d in directions if d.get("min_price")) / with_prices if with_prices > 0 else 0
-        
-        return {
-            "success": True,
-            "country_name": country_name,
-            "country_id": country_id,
-            "directions_count": len(directions),
-            "performance": {
-                "execution_time_seconds": execution_time,
-                "cache_keys_cleared": cleared_count
-            },
-            "statistics": {
-                "directions_with_prices": with_prices,
-                "directions_with_images": with_images,
-                "success_rate": f"{(with_prices/len(directions)*100):.1f}%" if directions else "0%",
-                "average_price": round(avg_price) if avg_price > 0 else None
-            },
-            "message": f"Направления для {country_name} успешно обновлены",
-            "sample_directions": directions[:3] if directions else []  # Показываем первые 3 для примера
-        }
+        return await _refresh_country_flights.do(
+            country_id,
+            lambda: _refresh_country(country_id, country_name)
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Ошибка обновления страны {country_id}: {e}")
+        logger.error("❌ Ошибка обновления страны %s: %s", country_id, e)
         raise HTTPException(
             status_code=500,
             detail=f"Ошибка при обновлении: {str(e)}"
         )
 
-@router.post("/refresh/all")
-async def force_refresh_all_directions():
-    """
-    НОВЫЙ endpoint: Принудительное обновление всех направлений
+REFRESH_PROGRESS_KEY = "directions_refresh_progress:{job_id}"
+REFRESH_PROGRESS_TTL = 86400
+
+# Поток прогресса (SSE): как часто перечитывать состояние задачи и на каких статусах закрывать поток
+REFRESH_PROGRESS_POLL_SECONDS = 1.0
+REFRESH_FINAL_STATUSES = frozenset({"completed", "failed"})
+
+async def _set_refresh_progress(job_id: str, progress: Dict[str, Any]):
+    """Сохранение состояния фонового обновления направлений"""
+    await cache_service.set(
+        REFRESH_PROGRESS_KEY.format(job_id=job_id),
+        progress,
+        ttl=REFRESH_PROGRESS_TTL
+    )
+
+def _refresh_all_summary(all_directions: List[Dict[str, Any]], execution_time: float) -> Dict[str, Any]:
+    """Статистика полного обновления направлений по странам"""
+    countries_stats = {}
+    for direction in all_directions:
+        country_name = direction.get("country_name", "Unknown")
+        if country_name not in countries_stats:
+            countries_stats[country_name] = {
+                "count": 0,
+                "with_prices": 0,
+                "with_images": 0
+            }
+        
+        countries_stats[country_name]["count"] += 1
+        if direction.get("min_price"):
+            countries_stats[country_name]["with_prices"] += 1
+        if direction.get("image_link"):
+            countries_stats[country_name]["with_images"] += 1
+    
+    # Общая статистика складывается из статистики стран
+    total_with_prices = sum(stats["with_prices"] for stats in countries_stats.values())
+    total_with_images = sum(stats["with_images"] for stats in countries_stats.values())
+    
+    return {
+        "performance": {
+            "execution_time_seconds": execution_time,
+            "countries_processed": len(countries_stats)
+        },
+        "statistics": {
+            "total_directions": len(all_directions),
+            "total_with_prices": total_with_prices,
+            "total_with_images": total_with_images,
+            "overall_success_rate": f"{(total_with_prices/len(all_directions)*100):.1f}%" if all_directions else "0%"
+        },
+        "countries_breakdown": countries_stats
+    }
+
+# Идентификатор выполняющегося полного обновления - повторные запросы к нему присоединяются
+_active_refresh_job_id: Optional[str] = None
+
+async def _refresh_all_directions_job(job_id: str):
+    """Фоновое полное обновление направлений с записью прогресса в кэш"""
+    global _active_refresh_job_id
+    started_at = datetime.now().isoformat()
+    start_time = time.perf_counter()
     
-    Внимание: Может занять много времени!
-    """
     try:
-        logger.info("🔄 Принудительное обновление ВСЕХ направлений")
-        
-        import time
-        start_time = time.time()
+        await _set_refresh_progress(job_id, {"status": "running", "started_at": started_at})
         
         # Очищаем весь кэш направлений
         await clear_directions_cache()
@@ -675,54 +886,122 @@ async def force_refresh_all_directions():
         # Получаем все направления (это вызовет полную регенерацию)
         all_directions = await directions_service.get_all_directions()
         
-        end_time = time.time()
-        execution_time = round(end_time - start_time, 2)
-        
-        # Статистика по странам
-        countries_stats = {}
-        for direction in all_directions:
-            country_name = direction.get("country_name", "Unknown")
-            if country_name not in countries_stats:
-                countries_stats[country_name] = {
-                    "count": 0,
-                    "with_prices": 0,
-                    "with_images": 0
-                }
-            
-            countries_stats[country_name]["count"] += 1
-            if direction.get("min_price"):
-                countries_stats[country_name]["with_prices"] += 1
-            if direction.get("image_link"):
-                countries_stats[country_name]["with_images"] += 1
+        # Полный список без фильтров запрашивается чаще всего - сериализуем его заранее
+        await _preserialize_directions_response(
+            ("filter", None, None), _filtered_directions_content(all_directions, {"country_id": None, "limit": None})
+        )
         
-        # Общая статистика
-        total_with_prices = len([d for d in all_directions if d.get("min_price")])
-        total_with_images = len([d for d in all_directions if d.get("image_link")])
+        execution_time = round(time.perf_counter() - start_time, 2)
+        await _set_refresh_progress(job_id, {
+            "status": "completed",
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(),
+            **_refresh_all_summary(all_directions, execution_time)
+        })
+        logger.info("✅ Полное обновление направлений %s завершено за %.1f сек", job_id, execution_time)
+        
+    except Exception as e:
+        logger.error("❌ Ошибка обновления всех направлений: %s", e)
+        await _set_refresh_progress(job_id, {
+            "status": "failed",
+            "started_at": started_at,
+            "error": str(e)
+        })
+    finally:
+        if _active_refresh_job_id == job_id:
+            _active_refresh_job_id = None
+
+@router.post("/refresh/all", status_code=202)
+async def force_refresh_all_directions(request: Request, background_tasks: BackgroundTasks):
+    """
+    НОВЫЙ endpoint: Принудительное обновление всех направлений
+    
+    Обновление занимает много времени, поэтому выполняется в фоне.
+    Состояние доступно по GET /refresh/progress/{job_id}.
+    Пока обновление идет, повторные запросы получают ту же задачу.
+    """
+    global _active_refresh_job_id
+    try:
+        if _active_refresh_job_id:
+            job_id = _active_refresh_job_id
+            logger.info("♻️ Полное обновление направлений уже выполняется (задача %s)", job_id)
+            status = "running"
+        else:
+            job_id = uuid.uuid4().hex
+            logger.info("🔄 Принудительное обновление ВСЕХ направлений (задача %s)", job_id)
+            
+            _active_refresh_job_id = job_id
+            await _set_refresh_progress(job_id, {"status": "queued"})
+            background_tasks.add_task(_refresh_all_directions_job, job_id)
+            status = "queued"
         
         return {
             "success": True,
-            "message": "Все направления успешно обновлены",
-            "performance": {
-                "execution_time_seconds": execution_time,
-                "countries_processed": len(countries_stats)
-            },
-            "statistics": {
-                "total_directions": len(all_directions),
-                "total_with_prices": total_with_prices,
-                "total_with_images": total_with_images,
-                "overall_success_rate": f"{(total_with_prices/len(all_directions)*100):.1f}%" if all_directions else "0%"
-            },
-            "countries_breakdown": countries_stats,
+            "job_id": job_id,
+            "status": status,
+            "status_url": str(request.url_for("get_refresh_progress", job_id=job_id)),
             "warning": "Полное обновление может занять значительное время и ресурсы"
         }
         
     except Exception as e:
-        logger.error(f"❌ Ошибка обновления всех направлений: {e}")
+        logger.error("❌ Ошибка запуска обновления всех направлений: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Ошибка при обновлении всех направлений: {str(e)}"
         )
 
+@router.get("/refresh/progress/{job_id}")
+async def get_refresh_progress(job_id: str) -> Dict[str, Any]:
+    """
+    Состояние фонового полного обновления направлений
+    
+    status: queued / running / completed / failed
+    """
+    progress = await cache_service.get(REFRESH_PROGRESS_KEY.format(job_id=job_id))
+    if not progress:
+        raise HTTPException(status_code=404, detail=f"Задача обновления {job_id} не найдена")
+    
+    return {"job_id": job_id, **progress}
+
+async def _refresh_progress_events(job_id: str, progress: Dict[str, Any]):
+    """
+    События SSE с состоянием задачи обновления
+    
+    Событие отправляется при каждом изменении состояния; после completed/failed
+    или пропажи задачи из кэша поток закрывается
+    """
+    while True:
+        yield b"data: " + orjson.dumps({"job_id": job_id, **progress}) + b"\n\n"
+        if progress.get("status") in REFRESH_FINAL_STATUSES:
+            return
+        
+        previous = progress
+        while progress == previous:
+            await asyncio.sleep(REFRESH_PROGRESS_POLL_SECONDS)
+            progress = await cache_service.get(REFRESH_PROGRESS_KEY.format(job_id=job_id))
+            if not progress:
+                yield b"event: error\ndata: " + orjson.dumps({"job_id": job_id, "error": "Задача не найдена"}) + b"\n\n"
+                return
+
+@router.get("/refresh/progress/{job_id}/stream")
+async def stream_refresh_progress(job_id: str):
+    """
+    Прогресс фонового полного обновления направлений в виде Server-Sent Events
+    
+    Каждое изменение состояния приходит отдельным событием сразу, без опроса
+    GET /refresh/progress/{job_id}; последнее событие - completed или failed
+    """
+    progress = await cache_service.get(REFRESH_PROGRESS_KEY.format(job_id=job_id))
+    if not progress:
+        raise HTTPException(status_code=404, detail=f"Задача обновления {job_id} не найдена")
+    
+    return StreamingResponse(
+        _refresh_progress_events(job_id, progress),
+        media_type="text/event-stream",
+        # identity: GZipMiddleware пропускает поток как есть и не копит события в буфере сжатия
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    )
+
 def format_bytes(bytes_count: int) -> str:
     """Утилита для форматирования размера в байтах"""
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -739,11 +1018,7 @@ async def preview_cached_directions(country_id: int, limit: int = 10) -> Dict[st
     """
     try:
         # Находим название страны
-        country_name = None
-        for name, info in directions_service.COUNTRIES_MAPPING.items():
-            if info["country_id"] == country_id:
-                country_name = name
-                break
+        country_name = directions_service.COUNTRY_NAMES_BY_ID.get(country_id)
         
         if not country_name:
             raise HTTPException(
@@ -774,8 +1049,8 @@ async def preview_cached_directions(country_id: int, limit: int = 10) -> Dict[st
             }
         
         # Анализируем качество
-        with_prices = len([d for d in cached_directions if d.get("min_price")])
-        with_images = len([d for d in cached_directions if d.get("image_link")])
+        summary = directions_service.summarize_directions(cached_directions)
+        with_prices, with_images = summary["with_prices"], summary["with_images"]
         preview_directions = cached_directions[:limit]
         
         return {
@@ -794,5 +1069,5 @@ async def preview_cached_directions(country_id: int, limit: int = 10) -> Dict[st
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Ошибка предварительного просмотра для country_id {country_id}: {e}")
+        logger.error("❌ Ошибка предварительного просмотра для country_id %s: %s", country_id, e)
         raise HTTPException(status_code=500, detail=f"Ошибка при получении превью: {str(e)}")
\ No newline at end of file
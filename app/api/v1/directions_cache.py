@@ -1,16 +1,27 @@
 # app/api/v1/directions_cache.py
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any
 from datetime import datetime
+import asyncio
+import orjson
 
+from app.services.cache_service import cache_service
+from app.services.directions_service import directions_service
 from app.tasks.directions_cache_update import directions_cache_update_service
+from app.utils.exceptions import handle_errors
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
-router = APIRouter(prefix="/directions/cache", tags=["Directions Cache Management"])
+router = APIRouter(
+    prefix="/directions/cache",
+    tags=["Directions Cache Management"],
+    default_response_class=ORJSONResponse
+)
 
 @router.get("/status")
+@handle_errors("❌ Ошибка получения статуса кэша", detail="Ошибка при получении статуса")
 async def get_cache_update_status() -> Dict[str, Any]:
     """
     Получение статуса автоматического обновления кэша направлений
@@ -21,30 +32,24 @@ async def get_cache_update_status() -> Dict[str, Any]:
     - Времени следующего обновления
     - Статистике последнего обновления
     """
-    try:
-        logger.info("📊 Запрос статуса обновления кэша направлений")
-        
-        status = await directions_cache_update_service.get_update_status()
-        
-        # Добавляем дополнительную информацию
-        current_time = datetime.now()
-        status["current_time"] = current_time
-        status["scheduler_info"] = {
-            "update_interval_hours": directions_cache_update_service.update_interval / 3600,
-            "batch_size": directions_cache_update_service.countries_batch_size,
-            "total_countries": len(directions_cache_update_service.countries_mapping) if hasattr(directions_cache_update_service, 'countries_mapping') else 13
-        }
-        
-        return status
-        
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения статуса кэша: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Ошибка при получении статуса: {str(e)}"
-        )
+    logger.info("📊 Запрос статуса обновления кэша направлений")
+    
+    status = await directions_cache_update_service.get_update_status()
+    
+    # Добавляем дополнительную информацию
+    current_time = datetime.now()
+    status["current_time"] = current_time
+    status["scheduler_info"] = {
+        "update_interval_hours": directions_cache_update_service.update_interval / 3600,
+        "batch_size": directions_cache_update_service.countries_batch_size,
+        "total_countries": len(directions_cache_update_service.countries_mapping) if hasattr(directions_cache_update_service, 'countries_mapping') else 13
+    }
+    
+    # Статус - словарь простых типов и datetime: orjson сериализует его сам, без jsonable_encoder
+    return Response(content=orjson.dumps(status, default=str), media_type="application/json")
 
 @router.post("/force-update")
+@handle_errors("❌ Ошибка запуска принудительного обновления", detail="Ошибка при запуске обновления")
 async def force_cache_update(background_tasks: BackgroundTasks) -> Dict[str, Any]:
     """
     Принудительное обновление кэша направлений
@@ -52,38 +57,31 @@ async def force_cache_update(background_tasks: BackgroundTasks) -> Dict[str, Any
     Запускает полное обновление всех направлений в фоновом режиме.
     Внимание: процесс может занять 2-4 часа!
     """
-    try:
-        logger.info("🚀 API запрос принудительного обновления кэша")
-        
-        # Проверяем, не запущено ли уже обновление
-        status = await directions_cache_update_service.get_update_status()
-        
-        if status.get("is_running") and status.get("update_stats", {}).get("end_time") is None:
-            return {
-                "success": False,
-                "message": "Обновление уже выполняется",
-                "current_status": status
-            }
-        
-        # Запускаем принудительное обновление в фоне
-        background_tasks.add_task(directions_cache_update_service.force_update_now)
-        
+    logger.info("🚀 API запрос принудительного обновления кэша")
+    
+    # Проверяем, не запущено ли уже обновление
+    status = await directions_cache_update_service.get_update_status()
+    
+    if status.get("is_running") and status.get("update_stats", {}).get("end_time") is None:
         return {
-            "success": True,
-            "message": "Принудительное обновление кэша запущено в фоновом режиме",
-            "estimated_duration": "2-4 часа",
-            "note": "Используйте GET /status для отслеживания прогресса",
-            "started_at": datetime.now()
+            "success": False,
+            "message": "Обновление уже выполняется",
+            "current_status": status
         }
-        
-    except Exception as e:
-        logger.error(f"❌ Ошибка запуска принудительного обновления: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Ошибка при запуске обновления: {str(e)}"
-        )
+    
+    # Запускаем принудительное обновление в фоне
+    background_tasks.add_task(directions_cache_update_service.force_update_now)
+    
+    return {
+        "success": True,
+        "message": "Принудительное обновление кэша запущено в фоновом режиме",
+        "estimated_duration": "2-4 часа",
+        "note": "Используйте GET /status для отслеживания прогресса",
+        "started_at": datetime.now()
+    }
 
 @router.get("/stats")
+@handle_errors("❌ Ошибка получения детальной статистики", detail="Ошибка при получении статистики")
 async def get_detailed_cache_stats() -> Dict[str, Any]:
     """
     Подробная статистика кэша направлений
@@ -91,156 +89,134 @@ async def get_detailed_cache_stats() -> Dict[str, Any]:
     Возвращает детальную информацию о последнем обновлении,
     включая статистику по каждой стране.
     """
-    try:
-        logger.info("📈 Запрос детальной статистики кэша")
-        
-        status = await directions_cache_update_service.get_update_status()
-        update_stats = status.get("update_stats")
-        
-        if not update_stats:
-            return {
-                "message": "Статистика недоступна - обновлений еще не было",
-                "recommendation": "Запустите принудительное обновление: POST /force-update"
-            }
-        
-        # Анализируем статистику по странам
-        countries_details = update_stats.get("countries_details", {})
-        
-        # Топ стран по количеству направлений
-        top_countries = sorted(
-            [(name, data) for name, data in countries_details.items() if data.get("success")],
-            key=lambda x: x[1].get("directions_count", 0),
-            reverse=True
-        )[:5]
-        
-        # Страны с проблемами
-        failed_countries = [
-            name for name, data in countries_details.items() 
-            if not data.get("success")
-        ]
-        
-        # Статистика качества данных
-        total_directions = sum(
-            data.get("directions_count", 0) 
-            for data in countries_details.values() 
-            if data.get("success")
-        )
-        
-        # Средние показатели качества
-        quality_stats = []
-        for name, data in countries_details.items():
-            if data.get("success") and data.get("quality_stats"):
-                quality_stats.append(data["quality_stats"])
-        
-        avg_price_coverage = 0
-        avg_image_coverage = 0
-        if quality_stats:
-            avg_price_coverage = sum(
-                float(qs.get("price_coverage", "0%").replace("%", "")) 
-                for qs in quality_stats
-            ) / len(quality_stats)
-            
-            avg_image_coverage = sum(
-                float(qs.get("image_coverage", "0%").replace("%", "")) 
-                for qs in quality_stats
-            ) / len(quality_stats)
-        
+    logger.info("📈 Запрос детальной статистики кэша")
+    
+    status = await directions_cache_update_service.get_update_status()
+    update_stats = status.get("update_stats")
+    
+    if not update_stats:
         return {
-            "last_update": update_stats.get("end_time"),
-            "execution_summary": {
-                "total_countries": update_stats.get("total_countries", 0),
-                "successful_countries": update_stats.get("successful_countries", 0),
-                "failed_countries": update_stats.get("failed_countries", 0),
-                "success_rate": f"{update_stats.get('success_rate', 0):.1f}%",
-                "total_directions": total_directions,
-                "execution_time": f"{update_stats.get('execution_time_seconds', 0):.1f} сек"
-            },
-            "data_quality": {
-                "average_price_coverage": f"{avg_price_coverage:.1f}%",
-                "average_image_coverage": f"{avg_image_coverage:.1f}%"
-            },
-            "top_countries_by_directions": [
-                {
-                    "country": name,
-                    "directions_count": data.get("directions_count", 0),
-                    "execution_time": f"{data.get('execution_time_seconds', 0):.1f}s"
-                }
-                for name, data in top_countries
-            ],
-            "failed_countries": failed_countries,
-            "countries_details": countries_details
+            "message": "Статистика недоступна - обновлений еще не было",
+            "recommendation": "Запустите принудительное обновление: POST /force-update"
         }
-        
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения детальной статистики: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Ошибка при получении статистики: {str(e)}"
-        )
+    
+    # Анализируем статистику по странам
+    countries_details = update_stats.get("countries_details", {})
+    
+    # Топ стран по количеству направлений
+    top_countries = sorted(
+        [(name, data) for name, data in countries_details.items() if data.get("success")],
+        key=lambda x: x[1].get("directions_count", 0),
+        reverse=True
+    )[:5]
+    
+    # Страны с проблемами
+    failed_countries = [
+        name for name, data in countries_details.items() 
+        if not data.get("success")
+    ]
+    
+    # Статистика качества данных
+    total_directions = sum(
+        data.get("directions_count", 0) 
+        for data in countries_details.values() 
+        if data.get("success")
+    )
+    
+    # Средние показатели качества
+    quality_stats = []
+    for name, data in countries_details.items():
+        if data.get("success") and data.get("quality_stats"):
+            quality_stats.append(data["quality_stats"])
+    
+    avg_price_coverage = 0
+    avg_image_coverage = 0
+    if quality_stats:
+        avg_price_coverage = sum(
+            float(qs.get("price_coverage", "0%").replace("%", "")) 
+            for qs in quality_stats
+        ) / len(quality_stats)
+        
+        avg_image_coverage = sum(
+            float(qs.get("image_coverage", "0%").replace("%", "")) 
+            for qs in quality_stats
+        ) / len(quality_stats)
+    
+    return {
+        "last_update": update_stats.get("end_time"),
+        "execution_summary": {
+            "total_countries": update_stats.get("total_countries", 0),
+            "successful_countries": update_stats.get("successful_countries", 0),
+            "failed_countries": update_stats.get("failed_countries", 0),
+            "success_rate": f"{update_stats.get('success_rate', 0):.1f}%",
+            "total_directions": total_directions,
+            "execution_time": f"{update_stats.get('execution_time_seconds', 0):.1f} сек"
+        },
+        "data_quality": {
+            "average_price_coverage": f"{avg_price_coverage:.1f}%",
+            "average_image_coverage": f"{avg_image_coverage:.1f}%"
+        },
+        "top_countries_by_directions": [
+            {
+                "country": name,
+                "directions_count": data.get("directions_count", 0),
+                "execution_time": f"{data.get('execution_time_seconds', 0):.1f}s"
+            }
+            for name, data in top_countries
+        ],
+        "failed_countries": failed_countries,
+        "countries_details": countries_details
+    }
 
 @router.post("/scheduler/start")
+@handle_errors("❌ Ошибка запуска планировщика", detail="Ошибка при запуске планировщика")
 async def start_cache_scheduler(background_tasks: BackgroundTasks) -> Dict[str, Any]:
     """
     Запуск планировщика автоматического обновления кэша
     
     Планировщик будет обновлять кэш каждые 24 часа автоматически.
     """
-    try:
-        logger.info("▶️ API запрос запуска планировщика")
-        
-        if directions_cache_update_service.is_running:
-            return {
-                "success": False,
-                "message": "Планировщик уже запущен",
-                "status": "running"
-            }
-        
-        # Запускаем планировщик в фоне
-        background_tasks.add_task(directions_cache_update_service.start_scheduler)
-        
+    logger.info("▶️ API запрос запуска планировщика")
+    
+    if directions_cache_update_service.is_running:
         return {
-            "success": True,
-            "message": "Планировщик автоматического обновления кэша запущен",
-            "schedule": "каждые 24 часа",
-            "started_at": datetime.now()
+            "success": False,
+            "message": "Планировщик уже запущен",
+            "status": "running"
         }
-        
-    except Exception as e:
-        logger.error(f"❌ Ошибка запуска планировщика: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Ошибка при запуске планировщика: {str(e)}"
-        )
+    
+    # Запускаем планировщик в фоне
+    background_tasks.add_task(directions_cache_update_service.start_scheduler)
+    
+    return {
+        "success": True,
+        "message": "Планировщик автоматического обновления кэша запущен",
+        "schedule": "каждые 24 часа",
+        "started_at": datetime.now()
+    }
 
 @router.post("/scheduler/stop")
+@handle_errors("❌ Ошибка остановки планировщика", detail="Ошибка при остановке планировщика")
 async def stop_cache_scheduler() -> Dict[str, Any]:
     """
     Остановка планировщика автоматического обновления кэша
     """
-    try:
-        logger.info("⏹️ API запрос остановки планировщика")
-        
-        if not directions_cache_update_service.is_running:
-            return {
-                "success": False,
-                "message": "Планировщик уже остановлен",
-                "status": "stopped"
-            }
-        
-        await directions_cache_update_service.stop_scheduler()
-        
+    logger.info("⏹️ API запрос остановки планировщика")
+    
+    if not directions_cache_update_service.is_running:
         return {
-            "success": True,
-            "message": "Планировщик автоматического обновления кэша остановлен",
-            "stopped_at": datetime.now()
+            "success": False,
+            "message": "Планировщик уже остановлен",
+            "status": "stopped"
         }
-        
-    except Exception as e:
-        logger.error(f"❌ Ошибка остановки планировщика: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Ошибка при остановке планировщика: {str(e)}"
-        )
+    
+    await directions_cache_update_service.stop_scheduler()
+    
+    return {
+        "success": True,
+        "message": "Планировщик автоматического обновления кэша остановлен",
+        "stopped_at": datetime.now()
+    }
 
 @router.get("/health")
 async def cache_health_check() -> Dict[str, Any]:
@@ -250,25 +226,24 @@ async def cache_health_check() -> Dict[str, Any]:
     Проверяет актуальность кэша и работоспособность системы.
     """
     try:
-        from app.services.cache_service import cache_service
-        from app.services.directions_service import directions_service
+        cache_keys = [
+            f"directions_with_prices_country_{country_info['country_id']}"
+            for country_info in directions_service.COUNTRIES_MAPPING.values()
+            if country_info.get("country_id")
+        ]
         
-        # Проверяем кэш
-        cache_keys_count = 0
-        try:
-            # Пытаемся подсчитать количество ключей
-            for country_name, country_info in directions_service.COUNTRIES_MAPPING.items():
-                country_id = country_info.get("country_id")
-                if country_id:
-                    cache_key = f"directions_with_prices_country_{country_id}"
-                    cached_data = await cache_service.get(cache_key)
-                    if cached_data:
-                        cache_keys_count += 1
-        except:
-            pass
+        # Кэш стран (одним пакетным запросом) и статус обновления проверяем параллельно
+        cached_by_key, status = await asyncio.gather(
+            cache_service.get_multiple(cache_keys),
+            directions_cache_update_service.get_update_status(),
+            return_exceptions=True
+        )
+        if isinstance(status, Exception):
+            raise status
         
-        # Получаем статус обновления
-        status = await directions_cache_update_service.get_update_status()
+        cache_keys_count = 0
+        if not isinstance(cached_by_key, Exception):
+            cache_keys_count = sum(1 for cached_data in cached_by_key.values() if cached_data)
         
         # Определяем состояние здоровья
         health_status = "unknown"
@@ -314,7 +289,7 @@ async def cache_health_check() -> Dict[str, Any]:
         }
         
     except Exception as e:
-        logger.error(f"❌ Ошибка проверки здоровья: {e}")
+        logger.error("❌ Ошибка проверки здоровья: %s", e)
         return {
             "health_status": "error",
             "error": str(e),
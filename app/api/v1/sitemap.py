@@ -6,6 +6,7 @@ from app.core.tourvisor_client import tourvisor_client
 from app.core.transliteration import transliterator
 from app.services.cache_service import cache_service
 from app.config import settings
+from app.utils.exceptions import handle_errors
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -36,7 +37,7 @@ async def get_sitemap(
                 detail="Поддерживаемые типы: hotels, countries, regions"
             )
     except Exception as e:
-        logger.error(f"Ошибка при генерации sitemap типа {type}: {e}")
+        logger.error("Ошибка при генерации sitemap типа %s: %s", type, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 async def _get_hotels_sitemap() -> Dict[str, List[str]]:
@@ -48,12 +49,12 @@ async def _get_hotels_sitemap() -> Dict[str, List[str]]:
     if cached_sitemap:
         return cached_sitemap
     
-    hotels_urls = []
+    hotels_urls = set()
     
     try:
         # Получаем список популярных стран
         for country_code in settings.POPULAR_COUNTRIES:
-            logger.info(f"Получение отелей для страны {country_code}")
+            logger.info("Получение отелей для страны %s", country_code)
             
             # Получаем отели для страны
             hotels_data = await tourvisor_client.get_references(
@@ -73,13 +74,13 @@ async def _get_hotels_sitemap() -> Dict[str, List[str]]:
                 if hotel_name and hotel_id:
                     hotel_url = transliterator.to_hotel_url(hotel_name, hotel_id)
                     if hotel_url:  # Проверяем, что URL не пустой
-                        hotels_urls.append(f"/hotels/{hotel_url}")
+                        hotels_urls.add(f"/hotels/{hotel_url}")
             
             # Добавляем небольшую задержку между запросами
             await asyncio.sleep(0.2)
         
-        # Убираем дубликаты и сортируем
-        hotels_urls = sorted(list(set(hotels_urls)))
+        # Дубликаты отброшены множеством, сортируем
+        hotels_urls = sorted(hotels_urls)
         
         result = {
             "type": "hotels",
@@ -90,11 +91,11 @@ async def _get_hotels_sitemap() -> Dict[str, List[str]]:
         # Кэшируем результат на 6 часов
         await cache_service.set(cache_key, result, ttl=21600)
         
-        logger.info(f"Сгенерировано {len(hotels_urls)} URL отелей")
+        logger.info("Сгенерировано %s URL отелей", len(hotels_urls))
         return result
         
     except Exception as e:
-        logger.error(f"Ошибка при генерации sitemap отелей: {e}")
+        logger.error("Ошибка при генерации sitemap отелей: %s", e)
         # Возвращаем пустой результат в случае ошибки
         return {"type": "hotels", "count": 0, "urls": []}
 
@@ -114,7 +115,7 @@ async def _get_countries_sitemap() -> Dict[str, List[str]]:
         if not isinstance(countries, list):
             countries = [countries] if countries else []
         
-        countries_urls = []
+        countries_urls = set()
         for country in countries:
             country_name = country.get("name", "")
             country_id = country.get("id", "")
@@ -122,9 +123,9 @@ async def _get_countries_sitemap() -> Dict[str, List[str]]:
             if country_name and country_id:
                 country_url = transliterator.to_url_slug(country_name)
                 if country_url:
-                    countries_urls.append(f"/countries/{country_url}")
+                    countries_urls.add(f"/countries/{country_url}")
         
-        countries_urls = sorted(list(set(countries_urls)))
+        countries_urls = sorted(countries_urls)
         
         result = {
             "type": "countries",
@@ -135,11 +136,11 @@ async def _get_countries_sitemap() -> Dict[str, List[str]]:
         # Кэшируем на 24 часа
         await cache_service.set(cache_key, result, ttl=86400)
         
-        logger.info(f"Сгенерировано {len(countries_urls)} URL стран")
+        logger.info("Сгенерировано %s URL стран", len(countries_urls))
         return result
         
     except Exception as e:
-        logger.error(f"Ошибка при генерации sitemap стран: {e}")
+        logger.error("Ошибка при генерации sitemap стран: %s", e)
         return {"type": "countries", "count": 0, "urls": []}
 
 async def _get_regions_sitemap() -> Dict[str, List[str]]:
@@ -158,7 +159,7 @@ async def _get_regions_sitemap() -> Dict[str, List[str]]:
         if not isinstance(regions, list):
             regions = [regions] if regions else []
         
-        regions_urls = []
+        regions_urls = set()
         for region in regions:
             region_name = region.get("name", "")
             region_id = region.get("id", "")
@@ -166,9 +167,9 @@ async def _get_regions_sitemap() -> Dict[str, List[str]]:
             if region_name and region_id:
                 region_url = transliterator.to_url_slug(region_name)
                 if region_url:
-                    regions_urls.append(f"/regions/{region_url}")
+                    regions_urls.add(f"/regions/{region_url}")
         
-        regions_urls = sorted(list(set(regions_urls)))
+        regions_urls = sorted(regions_urls)
         
         result = {
             "type": "regions",
@@ -179,43 +180,39 @@ async def _get_regions_sitemap() -> Dict[str, List[str]]:
         # Кэшируем на 24 часа
         await cache_service.set(cache_key, result, ttl=86400)
         
-        logger.info(f"Сгенерировано {len(regions_urls)} URL курортов")
+        logger.info("Сгенерировано %s URL курортов", len(regions_urls))
         return result
         
     except Exception as e:
-        logger.error(f"Ошибка при генерации sitemap курортов: {e}")
+        logger.error("Ошибка при генерации sitemap курортов: %s", e)
         return {"type": "regions", "count": 0, "urls": []}
 
 @router.get("/refresh")
+@handle_errors("Ошибка при обновлении sitemap")
 async def refresh_sitemap(
     type: str = Query(..., description="Тип sitemap для обновления: hotels, countries, regions, all")
 ):
     """
     Принудительное обновление sitemap
     """
-    try:
-        refreshed_types = []
-        
-        if type == "all" or type == "hotels":
-            await cache_service.delete("sitemap_hotels")
-            await _get_hotels_sitemap()
-            refreshed_types.append("hotels")
-        
-        if type == "all" or type == "countries":
-            await cache_service.delete("sitemap_countries")
-            await _get_countries_sitemap()
-            refreshed_types.append("countries")
-        
-        if type == "all" or type == "regions":
-            await cache_service.delete("sitemap_regions")
-            await _get_regions_sitemap()
-            refreshed_types.append("regions")
-        
-        return {
-            "success": True,
-            "message": f"Sitemap обновлен для типов: {', '.join(refreshed_types)}"
-        }
-        
-    except Exception as e:
-        logger.error(f"Ошибка при обновлении sitemap: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    refreshed_types = []
+    
+    if type == "all" or type == "hotels":
+        await cache_service.delete("sitemap_hotels")
+        await _get_hotels_sitemap()
+        refreshed_types.append("hotels")
+    
+    if type == "all" or type == "countries":
+        await cache_service.delete("sitemap_countries")
+        await _get_countries_sitemap()
+        refreshed_types.append("countries")
+    
+    if type == "all" or type == "regions":
+        await cache_service.delete("sitemap_regions")
+        await _get_regions_sitemap()
+        refreshed_types.append("regions")
+    
+    return {
+        "success": True,
+        "message": f"Sitemap обновлен для типов: {', '.join(refreshed_types)}"
+    }
\ No newline at end of file
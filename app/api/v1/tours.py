@@ -1,50 +1,163 @@
 # app/api/v1/tours.py - ОЧИЩЕННАЯ ВЕРСИЯ
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 import asyncio
+import hashlib
+import orjson
+from functools import lru_cache
 from datetime import datetime, timedelta
 
+from app.api.routing import TrustedResponseRoute
+from app.config import settings
 from app.models.tour import (
     TourSearchRequest, SearchResponse, SearchResult, SearchStatus,
     RandomTourRequest, HotTourInfo, TourActualizationRequest,
-    DetailedTourInfo, HotelInfo
+    DetailedTourInfo, HotelInfo, BatchTourRequest, BatchActualizationRequest,
+    VALID_HOTEL_TYPES, HOTEL_TYPES_QUERY_PATTERN
 )
 from app.services.tour_service import tour_service
-from app.services.random_tours_service import random_tours_service
+from app.services.random_tours_service import random_request_key, random_tours_service
 from app.core.tourvisor_client import tourvisor_client
+from app.utils.exceptions import handle_errors
 from app.utils.logger import setup_logger
+from app.utils.singleflight import CachedFlight, SingleFlight
 
 logger = setup_logger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse, route_class=TrustedResponseRoute)
+
+# Объединение одновременных запросов актуализации одного и того же тура
+_tour_details_flights = SingleFlight()
+
+# Запрос по умолчанию для POST /random без тела (сервисы запрос не изменяют)
+DEFAULT_RANDOM_REQUEST = RandomTourRequest()
+
+# Объединение одновременных принудительных генераций с одинаковыми параметрами
+_random_generation_flights = SingleFlight()
+
+# Объединение одновременных поисков туров по одному и тому же отелю
+_hotel_search_flights = SingleFlight()
+
+# Одновременных запросов к TourVisor от одного пакетного запроса
+TOUR_BATCH_CONCURRENCY = 10
+
+# Проверка подключения к TourVisor для частых опросов мониторинга: не чаще раза в 5 секунд
+API_CONNECTION_CHECK_TTL = 5
+_api_connection_flights = CachedFlight(ttl=API_CONNECTION_CHECK_TTL)
+
+async def _get_tour_details_coalesced(
+    cache_key: str,
+    loader: Callable[[], Awaitable[Optional[DetailedTourInfo]]]
+) -> Optional[Any]:
+    """
+    Получение детальной информации о туре через короткий кэш и single-flight
+
+    Одновременные запросы с одинаковым ключом делают один запрос к TourVisor
+    """
+    cached = await tour_service.cache.get(cache_key)
+    if cached:
+        return cached
+    
+    async def load() -> Optional[DetailedTourInfo]:
+        result = await loader()
+        if result and (result.tour or result.flights):
+            await tour_service.cache.set(
+                cache_key,
+                result,
+                ttl=settings.TOUR_DETAILS_CACHE_TTL
+            )
+        return result
+    
+    return await _tour_details_flights.do(cache_key, load)
+
+async def _stream_search_result(search_result: SearchResult):
+    """
+    Потоковая сериализация результатов поиска: отели кодируются и отдаются по одному
+
+    Большая страница результатов не собирается в памяти целиком перед отправкой
+    """
+    yield b'{"status":'
+    yield search_result.status.model_dump_json().encode("utf-8")
+    if search_result.result is None:
+        yield b',"result":null}'
+        return
+    
+    yield b',"result":['
+    for index, hotel in enumerate(search_result.result):
+        if index:
+            yield b","
+        yield hotel.model_dump_json().encode("utf-8")
+    yield b"]}"
+
+# Страницы до стольких отелей (обычно меньше ~4 КБ) отдаются одним ответом -
+# для них потоковая передача дает только лишние чанки
+SEARCH_STREAM_MIN_HOTELS = 4
+
+@lru_cache(maxsize=256)
+def _parse_hotel_types(hotel_types: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Разбор типов отелей из строки "beach,relax" (одни и те же строки приходят постоянно)
+
+    Неизвестные типы отбрасываются здесь, дальше по коду идут только допустимые
+    """
+    if not hotel_types:
+        return None
+    return tuple(ht for ht in map(str.strip, hotel_types.split(",")) if ht in VALID_HOTEL_TYPES) or None
+
+def parse_hotel_types(
+    hotel_types: Optional[str] = Query(
+        None,
+        pattern=HOTEL_TYPES_QUERY_PATTERN,
+        description="Типы отелей через запятую: active,relax,family,health,city,beach,deluxe"
+    )
+) -> Optional[List[str]]:
+    """Зависимость: типы отелей из query-параметра (неизвестные типы отклоняются с 422)"""
+    parsed = _parse_hotel_types(hotel_types)
+    return list(parsed) if parsed else None
+
+def _log_random_request(message: str, request: RandomTourRequest, *args):
+    """Лог запроса случайных туров (message содержит %d для количества после args)"""
+    logger.info(message, *args, request.count)
+    if request.hotel_types:
+        logger.info("🏨 С фильтрацией по типам: %s", request.hotel_types)
+
+async def _handle_random(request: RandomTourRequest, method: str) -> List[HotTourInfo]:
+    """Общая обработка GET и POST /random"""
+    _log_random_request("🎯 %s запрос %d рандомных туров", request, method)
+    result = await random_tours_service.get_random_tours(request)
+    logger.info("✅ Возвращено %d туров", len(result))
+    return result
+
+async def _generate_random_tours_coalesced(request: RandomTourRequest) -> List[HotTourInfo]:
+    """Принудительная генерация: повторные запросы во время генерации ее не дублируют"""
+    return await _random_generation_flights.do(
+        random_request_key(request),
+        lambda: random_tours_service._generate_fully_random_tours(request)
+    )
 
 # ========== ОСНОВНЫЕ ENDPOINTS ПОИСКА ТУРОВ ==========
 
 @router.post("/search", response_model=SearchResponse)
+@handle_errors("Ошибка при поиске туров")
 async def search_tours(search_request: TourSearchRequest):
     """
     Запуск поиска туров
     
     Возвращает request_id для отслеживания статуса поиска
     """
-    try:
-        return await tour_service.search_tours(search_request)
-    except Exception as e:
-        logger.error(f"Ошибка при поиске туров: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await tour_service.search_tours(search_request)
 
 @router.get("/search/{request_id}/status", response_model=SearchStatus)
+@handle_errors("Ошибка при получении статуса")
 async def get_search_status(request_id: str):
     """
     Получение статуса поиска туров
     """
-    try:
-        return await tour_service.get_search_status(request_id)
-    except Exception as e:
-        logger.error(f"Ошибка при получении статуса: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await tour_service.get_search_status(request_id)
 
 @router.get("/search/{request_id}/results", response_model=SearchResult)
+@handle_errors("Ошибка при получении результатов")
 async def get_search_results(
     request_id: str,
     page: int = Query(1, ge=1, description="Номер страницы"),
@@ -53,32 +166,26 @@ async def get_search_results(
     """
     Получение результатов поиска туров
     """
-    try:
-        return await tour_service.get_search_results(request_id, page, onpage)
-    except Exception as e:
-        logger.error(f"Ошибка при получении результатов: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    search_result = await tour_service.get_search_results(request_id, page, onpage)
+    if len(search_result.result or ()) < SEARCH_STREAM_MIN_HOTELS:
+        return search_result
+    return StreamingResponse(_stream_search_result(search_result), media_type="application/json")
 
 @router.post("/search/{request_id}/continue")
+@handle_errors("Ошибка при продолжении поиска")
 async def continue_search(request_id: str):
     """
     Продолжение поиска для получения большего количества результатов
     """
-    try:
-        return await tour_service.continue_search(request_id)
-    except Exception as e:
-        logger.error(f"Ошибка при продолжении поиска: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await tour_service.continue_search(request_id)
 
 # ========== СЛУЧАЙНЫЕ ТУРЫ И НАПРАВЛЕНИЯ ==========
 
 @router.get("/random", response_model=List[HotTourInfo])
+@handle_errors("❌ Ошибка при получении случайных туров")
 async def get_random_tours_get(
     count: int = Query(6, ge=1, le=20, description="Количество случайных туров"),
-    hotel_types: Optional[str] = Query(
-        None, 
-        description="Типы отелей через запятую: active,relax,family,health,city,beach,deluxe"
-    )
+    hotel_types: Optional[List[str]] = Depends(parse_hotel_types)
 ):
     """
     Получение абсолютно случайных туров из любых стран и городов (GET метод)
@@ -92,26 +199,10 @@ async def get_random_tours_get(
     - /api/v1/tours/random?count=6&hotel_types=beach,relax
     - /api/v1/tours/random?count=10&hotel_types=deluxe
     """
-    try:
-        # Парсим типы отелей
-        hotel_types_list = None
-        if hotel_types:
-            hotel_types_list = [ht.strip() for ht in hotel_types.split(",") if ht.strip()]
-        
-        request = RandomTourRequest(count=count, hotel_types=hotel_types_list)
-        logger.info(f"🎯 GET запрос {request.count} рандомных туров")
-        if request.hotel_types:
-            logger.info(f"🏨 С фильтрацией по типам: {request.hotel_types}")
-        
-        result = await random_tours_service.get_random_tours(request)
-        logger.info(f"✅ Возвращено {len(result)} туров")
-        
-        return result
-    except Exception as e:
-        logger.error(f"❌ Ошибка при получении случайных туров: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _handle_random(RandomTourRequest(count=count, hotel_types=hotel_types), "GET")
 
 @router.post("/random", response_model=List[HotTourInfo])
+@handle_errors("❌ Ошибка при получении случайных туров")
 async def get_random_tours_post(request: RandomTourRequest = None):
     """
     Получение абсолютно случайных туров из любых стран и городов (POST метод)
@@ -122,106 +213,194 @@ async def get_random_tours_post(request: RandomTourRequest = None):
         "hotel_types": ["beach", "relax", "deluxe"]
     }
     """
-    try:
-        if request is None:
-            request = RandomTourRequest()
-        
-        logger.info(f"🎯 POST запрос {request.count} рандомных туров")
-        if request.hotel_types:
-            logger.info(f"🏨 С фильтрацией по типам: {request.hotel_types}")
-        
-        result = await random_tours_service.get_random_tours(request)
-        logger.info(f"✅ Возвращено {len(result)} туров")
-        
-        return result
-    except Exception as e:
-        logger.error(f"❌ Ошибка при получении случайных туров: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _handle_random(request or DEFAULT_RANDOM_REQUEST, "POST")
 
-@router.get("/random/generate", response_model=List[HotTourInfo])
+@router.get("/random/generate", status_code=202)
+@handle_errors("❌ Ошибка при генерации случайных туров")
 async def generate_random_tours(
+    http_request: Request,
+    background_tasks: BackgroundTasks,
     count: int = Query(6, ge=1, le=20, description="Количество случайных туров"),
-    hotel_types: Optional[str] = Query(
-        None,
-        description="Типы отелей через запятую: active,relax,family,health,city,beach,deluxe"
-    )
+    hotel_types: Optional[List[str]] = Depends(parse_hotel_types)
 ):
     """
     Принудительная генерация новых случайных туров (без кэша)
     
-    Этот endpoint всегда генерирует новые туры, игнорируя кэш
+    Генерация запускается в фоне, ответ 202 возвращается сразу.
+    Новые туры сохраняются в кэш и доступны через /random (ссылка в заголовке Location)
     """
-    try:
-        # Парсим типы отелей
-        hotel_types_list = None
-        if hotel_types:
-            hotel_types_list = [ht.strip() for ht in hotel_types.split(",") if ht.strip()]
-        
-        request = RandomTourRequest(count=count, hotel_types=hotel_types_list)
-        logger.info(f"🔄 Принудительная генерация {request.count} туров")
-        if request.hotel_types:
-            logger.info(f"🏨 С фильтрацией по типам: {request.hotel_types}")
-        
-        result = await random_tours_service._generate_fully_random_tours(request)
-        logger.info(f"✅ Сгенерировано {len(result)} туров")
-        
-        return result
-    except Exception as e:
-        logger.error(f"❌ Ошибка при генерации случайных туров: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    request = RandomTourRequest(count=count, hotel_types=hotel_types)
+    _log_random_request("🔄 Принудительная генерация %d туров (в фоне)", request)
+    
+    background_tasks.add_task(_generate_random_tours_coalesced, request)
+    
+    query_params = {"count": count}
+    if hotel_types:
+        query_params["hotel_types"] = ",".join(hotel_types)
+    result_url = str(http_request.url_for("get_random_tours_get").include_query_params(**query_params))
+    
+    return ORJSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted",
+            "message": f"Генерация {request.count} туров запущена",
+            "result_url": result_url
+        },
+        headers={"Location": result_url}
+    )
 
 # ========== АКТУАЛИЗАЦИЯ ТУРОВ ==========
 
+def _actualize_tour_details(request: TourActualizationRequest) -> Awaitable[Optional[Any]]:
+    """Актуализация тура через короткий кэш и single-flight"""
+    # Порядок полей модели фиксирован - JSON pydantic-core дает стабильный ключ за один проход
+    request_hash = hashlib.md5(request.model_dump_json().encode("utf-8")).hexdigest()
+    return _get_tour_details_coalesced(
+        f"tour_actualize:{request_hash}",
+        lambda: tour_service.actualize_tour(request)
+    )
+
+def _tour_details_by_id(tour_id: str) -> Awaitable[Optional[Any]]:
+    """Информация о туре по ID через короткий кэш и single-flight"""
+    return _get_tour_details_coalesced(
+        f"tour_details:{tour_id}",
+        lambda: tour_service.search_tour_by_id(tour_id)
+    )
+
+async def _iter_tour_batch(
+    loaders: List[Callable[[], Awaitable[Optional[Any]]]]
+) -> AsyncIterator[Tuple[int, Optional[Any]]]:
+    """
+    Выполнение загрузок пакета с ограничением одновременных запросов
+    
+    Отдает пары (индекс, результат) по мере готовности - медленный элемент не задерживает
+    остальные; ошибка или пустой ответ - None
+    """
+    semaphore = asyncio.Semaphore(TOUR_BATCH_CONCURRENCY)
+    
+    async def load(index: int, loader: Callable[[], Awaitable[Optional[Any]]]) -> Tuple[int, Optional[Any]]:
+        async with semaphore:
+            try:
+                return index, (await loader()) or None
+            except Exception as e:
+                logger.warning("⚠️ Ошибка элемента пакетного запроса туров: %s", e)
+                return index, None
+    
+    tasks = [asyncio.ensure_future(load(index, loader)) for index, loader in enumerate(loaders)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Клиент отключился от потока - незавершенные загрузки не нужны
+        for task in tasks:
+            task.cancel()
+
+async def _gather_tour_batch(loaders: List[Callable[[], Awaitable[Optional[Any]]]]) -> List[Optional[Any]]:
+    """Результаты пакета в порядке входного списка"""
+    batch: List[Optional[Any]] = [None] * len(loaders)
+    async for index, result in _iter_tour_batch(loaders):
+        batch[index] = result
+    return batch
+
+async def _tour_batch_events(loaders: List[Callable[[], Awaitable[Optional[Any]]]]):
+    """События SSE пакета: каждый тур отправляется сразу после загрузки"""
+    async for index, result in _iter_tour_batch(loaders):
+        # Из кэша тур приходит словарем, после загрузки - моделью DetailedTourInfo
+        if isinstance(result, DetailedTourInfo):
+            tour = result.model_dump_json().encode("utf-8")
+        else:
+            tour = orjson.dumps(result)
+        yield b'data: {"index":' + str(index).encode("ascii") + b',"tour":' + tour + b"}\n\n"
+    yield b"event: done\ndata: {}\n\n"
+
 @router.post("/actualize", response_model=DetailedTourInfo)
+@handle_errors("Ошибка при актуализации тура")
 async def actualize_tour(request: TourActualizationRequest):
     """
     Актуализация тура с получением детальной информации и рейсов
     """
-    try:
-        return await tour_service.actualize_tour(request)
-    except Exception as e:
-        logger.error(f"Ошибка при актуализации тура: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _actualize_tour_details(request)
+
+@router.post("/actualize/batch", response_model=List[Optional[DetailedTourInfo]])
+@handle_errors("Ошибка при пакетной актуализации туров")
+async def actualize_tours_batch(request: BatchActualizationRequest):
+    """
+    Пакетная актуализация туров за один HTTP-запрос
+    
+    Ответ в порядке запросов; для неудачных актуализаций - null
+    """
+    return await _gather_tour_batch([
+        lambda tour_request=tour_request: _actualize_tour_details(tour_request)
+        for tour_request in request.tours
+    ])
+
+@router.post("/tour/batch", response_model=List[Optional[DetailedTourInfo]])
+@handle_errors("Ошибка при пакетном получении туров")
+async def get_tours_batch(request: BatchTourRequest):
+    """
+    Получение информации о нескольких турах по ID за один HTTP-запрос
+    
+    Ответ в порядке ids; для ненайденных туров - null
+    """
+    return await _gather_tour_batch([
+        lambda tour_id=tour_id: _tour_details_by_id(tour_id)
+        for tour_id in request.ids
+    ])
+
+@router.post("/tour/batch/stream")
+async def stream_tours_batch(request: BatchTourRequest):
+    """
+    Пакетное получение туров по ID в виде Server-Sent Events
+    
+    Каждый тур приходит событием {"index": <позиция в ids>, "tour": <тур или null>}
+    в порядке готовности; последнее событие - done
+    """
+    return StreamingResponse(
+        _tour_batch_events([
+            lambda tour_id=tour_id: _tour_details_by_id(tour_id)
+            for tour_id in request.ids
+        ]),
+        media_type="text/event-stream",
+        # identity: GZipMiddleware пропускает поток как есть и не копит события в буфере сжатия
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    )
 
 @router.get("/tour/{tour_id}", response_model=DetailedTourInfo)
+@handle_errors("Ошибка при получении тура")
 async def get_tour_by_id(tour_id: str):
     """
     Получение информации о туре по его ID
     """
-    try:
-        result = await tour_service.search_tour_by_id(tour_id)
-        if not result:
-            raise HTTPException(status_code=404, detail="Тур не найден")
-        return result
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Ошибка при получении тура: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await _tour_details_by_id(tour_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Тур не найден")
+    return result
 
 @router.get("/search-by-hotel", response_model=List[HotelInfo])
+@handle_errors("Ошибка при поиске по отелю")
 async def search_tours_by_hotel(
     hotel_name: str = Query(..., description="Название отеля"),
     country_code: int = Query(..., description="Код страны")
 ):
     """
     Поиск туров по названию отеля
+
+    Одновременные запросы одного отеля выполняют один поиск в TourVisor
     """
-    try:
-        return await tour_service.search_tours_by_hotel_name(hotel_name, country_code)
-    except Exception as e:
-        logger.error(f"Ошибка при поиске по отелю: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _hotel_search_flights.do(
+        (hotel_name.lower(), country_code),
+        lambda: tour_service.search_tours_by_hotel_name(hotel_name, country_code)
+    )
 
 # ========== ОТЛАДОЧНЫЕ ENDPOINTS ==========
 
-@router.post("/debug-raw-actualize")
+@router.post("/debug-raw-actualize", include_in_schema=settings.DEBUG)
 async def debug_raw_actualize(request: TourActualizationRequest):
     """
     Получение сырых данных актуализации без обработки Pydantic
     """
     try:
-        logger.info(f"🐛 RAW DEBUG: Запрос сырых данных тура {request.tour_id}")
+        logger.info("🐛 RAW DEBUG: Запрос сырых данных тура %s", request.tour_id)
         
         # Получаем сырые данные от TourVisor
         basic_info = await tourvisor_client.actualize_tour(
@@ -299,14 +478,14 @@ async def debug_raw_actualize(request: TourActualizationRequest):
         return response
         
     except Exception as e:
-        logger.error(f"🐛 RAW DEBUG ERROR: {e}")
+        logger.error("🐛 RAW DEBUG ERROR: %s", e)
         return {
             "error": str(e),
             "error_type": str(type(e)),
             "tour_id": request.tour_id
         }
 
-@router.get("/test-random-search")
+@router.get("/test-random-search", include_in_schema=settings.DEBUG)
 async def test_random_search():
     """
     Тестирование генерации случайных туров
@@ -332,37 +511,48 @@ async def test_random_search():
         }
         
     except Exception as e:
-        logger.error(f"❌ Ошибка тестирования случайных туров: {e}")
+        logger.error("❌ Ошибка тестирования случайных туров: %s", e)
         return {
             "success": False,
             "error": str(e)
         }
 
-@router.get("/test-api-connection")
+@router.get("/test-api-connection", include_in_schema=settings.DEBUG)
 async def test_api_connection():
     """
     Тестирование подключения к TourVisor API
     """
+    return await _api_connection_flights.do("connection", _check_api_connection)
+
+def _reference_response_summary(data: Any) -> Dict[str, Any]:
+    """Краткое описание ответа справочника для диагностики; ошибка запроса - error"""
+    if isinstance(data, Exception):
+        return {"error": str(data), "type": type(data).__name__}
+    return {
+        "keys": list(data.keys()) if data else [],
+        "sample_data": str(data)[:500] if data else "No data",
+        "type": type(data).__name__
+    }
+
+async def _check_api_connection():
+    """Запрос справочников TourVisor для проверки подключения"""
     try:
         logger.info("🧪 Тестирование подключения к TourVisor API")
         
-        # Тестируем получение справочника
-        countries_data = await tourvisor_client.get_references("country")
-        regions_data = await tourvisor_client.get_references("region", regcountry=1)
+        # Тестируем получение справочников (запросы независимы - выполняем одновременно);
+        # ошибка одного справочника не отменяет и не скрывает ответ другого
+        countries_data, regions_data = await asyncio.gather(
+            tourvisor_client.get_references("country"),
+            tourvisor_client.get_references("region", regcountry=1),
+            return_exceptions=True
+        )
+        success = not isinstance(countries_data, Exception) and not isinstance(regions_data, Exception)
         
         return {
-            "success": True,
-            "message": "API TourVisor работает",
-            "countries_response": {
-                "keys": list(countries_data.keys()) if countries_data else [],
-                "sample_data": str(countries_data)[:500] if countries_data else "No data",
-                "type": type(countries_data).__name__
-            },
-            "regions_response": {
-                "keys": list(regions_data.keys()) if regions_data else [],
-                "sample_data": str(regions_data)[:500] if regions_data else "No data", 
-                "type": type(regions_data).__name__
-            }
+            "success": success,
+            "message": "API TourVisor работает" if success else "Ошибка запросов к API TourVisor",
+            "countries_response": _reference_response_summary(countries_data),
+            "regions_response": _reference_response_summary(regions_data)
         }
         
     except Exception as e:
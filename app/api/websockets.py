@@ -3,6 +3,7 @@ import json
 from typing import Dict, Set, Any, List
 from fastapi import WebSocket, WebSocketDisconnect
 
+from app.core.tourvisor_client import tourvisor_client
 from app.services.tour_service import tour_service
 from app.utils.logger import setup_logger
 
@@ -44,7 +45,7 @@ class WebSocketManager:
             task = asyncio.create_task(self._monitor_search(request_id))
             self.monitoring_tasks[request_id] = task
         
-        logger.info(f"WebSocket подключен для поиска {request_id}")
+        logger.info("WebSocket подключен для поиска %s", request_id)
         
         try:
             # Отправляем текущий статус сразу после подключения
@@ -62,7 +63,7 @@ class WebSocketManager:
         except WebSocketDisconnect:
             await self._disconnect(websocket, request_id)
         except Exception as e:
-            logger.error(f"Ошибка WebSocket соединения: {e}")
+            logger.error("Ошибка WebSocket соединения: %s", e)
             await self._disconnect(websocket, request_id)
     
     async def _handle_client_message(self, websocket: WebSocket, request_id: str, message_text: str):
@@ -71,7 +72,7 @@ class WebSocketManager:
             message = json.loads(message_text)
             action = message.get("action")
             
-            logger.info(f"Получено сообщение от клиента для поиска {request_id}: {message}")
+            logger.info("Получено сообщение от клиента для поиска %s: %s", request_id, message)
             
             if action == "change_page":
                 page = message.get("page", 1)
@@ -96,10 +97,10 @@ class WebSocketManager:
                 await self._send_error_to_client(websocket, f"Неизвестное действие: {action}")
                 
         except json.JSONDecodeError:
-            logger.warning(f"Некорректный JSON от клиента: {message_text}")
+            logger.warning("Некорректный JSON от клиента: %s", message_text)
             await self._send_error_to_client(websocket, "Некорректный формат сообщения")
         except Exception as e:
-            logger.error(f"Ошибка при обработке сообщения клиента: {e}")
+            logger.error("Ошибка при обработке сообщения клиента: %s", e)
             await self._send_error_to_client(websocket, f"Ошибка обработки: {str(e)}")
     
     async def _handle_page_change(self, request_id: str, page: int):
@@ -119,7 +120,7 @@ class WebSocketManager:
             # Обновляем текущую страницу
             self.search_states[request_id]["current_page"] = page
             
-            logger.info(f"Смена страницы для поиска {request_id}: страница {page}")
+            logger.info("Смена страницы для поиска %s: страница %s", request_id, page)
             
             # Отправляем результаты для новой страницы
             await self._send_page_results(request_id, page)
@@ -128,12 +129,12 @@ class WebSocketManager:
             self.search_states[request_id]["pages_sent"].add(page)
             
         except Exception as e:
-            logger.error(f"Ошибка при смене страницы: {e}")
+            logger.error("Ошибка при смене страницы: %s", e)
     
     async def _handle_close_connection(self, websocket: WebSocket, request_id: str):
         """Обработка запроса на закрытие соединения от клиента"""
         try:
-            logger.info(f"Получен запрос на закрытие соединения от клиента для поиска {request_id}")
+            logger.info("Получен запрос на закрытие соединения от клиента для поиска %s", request_id)
             
             # Отправляем подтверждение перед закрытием
             await self._send_response_to_client(websocket, "connection_closing", {
@@ -153,7 +154,7 @@ class WebSocketManager:
                 
                 # Если это было последнее соединение для данного поиска
                 if not self.active_connections[request_id]:
-                    logger.info(f"Последнее соединение закрыто для поиска {request_id}, очищаем ресурсы")
+                    logger.info("Последнее соединение закрыто для поиска %s, очищаем ресурсы", request_id)
                     
                     # Удаляем пустой набор соединений
                     del self.active_connections[request_id]
@@ -162,17 +163,17 @@ class WebSocketManager:
                     if request_id in self.monitoring_tasks:
                         self.monitoring_tasks[request_id].cancel()
                         del self.monitoring_tasks[request_id]
-                        logger.info(f"Мониторинг поиска {request_id} остановлен")
+                        logger.info("Мониторинг поиска %s остановлен", request_id)
                     
                     # Очищаем состояние поиска
                     if request_id in self.search_states:
                         del self.search_states[request_id]
-                        logger.info(f"Состояние поиска {request_id} очищено")
+                        logger.info("Состояние поиска %s очищено", request_id)
                 else:
-                    logger.info(f"Соединение закрыто для поиска {request_id}, остается {len(self.active_connections[request_id])} активных соединений")
+                    logger.info("Соединение закрыто для поиска %s, остается %s активных соединений", request_id, len(self.active_connections[request_id]))
             
         except Exception as e:
-            logger.error(f"Ошибка при обработке закрытия соединения: {e}")
+            logger.error("Ошибка при обработке закрытия соединения: %s", e)
     
     async def _send_response_to_client(self, websocket: WebSocket, response_type: str, data: dict):
         """Отправка ответа конкретному клиенту"""
@@ -182,7 +183,7 @@ class WebSocketManager:
                 "data": data
             }, ensure_ascii=False))
         except Exception as e:
-            logger.error(f"Ошибка при отправке ответа клиенту: {e}")
+            logger.error("Ошибка при отправке ответа клиенту: %s", e)
     
     async def _handle_per_page_change(self, request_id: str, per_page: int):
         """Обработка изменения количества результатов на странице"""
@@ -206,20 +207,20 @@ class WebSocketManager:
                 if current_page > total_pages:
                     self.search_states[request_id]["current_page"] = total_pages
             
-            logger.info(f"Изменение per_page для поиска {request_id}: {per_page} результатов на странице")
+            logger.info("Изменение per_page для поиска %s: %s результатов на странице", request_id, per_page)
             
             # Отправляем обновленные результаты
             await self._send_page_results(request_id, self.search_states[request_id]["current_page"])
             
         except Exception as e:
-            logger.error(f"Ошибка при изменении per_page: {e}")
+            logger.error("Ошибка при изменении per_page: %s", e)
     async def _send_page_results(self, request_id: str, page: int):
         """Отправка результатов конкретной страницы"""
         try:
             search_state = self.search_states.get(request_id, {})
             per_page = search_state.get("per_page", 25)
             
-            logger.info(f"📄 Отправка результатов страницы {page} для поиска {request_id} (по {per_page} на странице)")
+            logger.info("📄 Отправка результатов страницы %s для поиска %s (по %s на странице)", page, request_id, per_page)
             
             # Получаем результаты для конкретной страницы
             results = await self._get_search_results_safe(request_id, page, per_page)
@@ -289,10 +290,10 @@ class WebSocketManager:
                 }
             })
             
-            logger.info(f"✅ Отправлено {available_hotels_on_page} отелей на странице {page} ({'финальные' if is_search_finished else 'промежуточные'} результаты)")
+            logger.info("✅ Отправлено %s отелей на странице %s (%s результаты)", available_hotels_on_page, page, 'финальные' if is_search_finished else 'промежуточные')
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при отправке результатов страницы: {e}")
+            logger.error("❌ Ошибка при отправке результатов страницы: %s", e)
             
             # Отправляем ошибку пользователю
             await self._broadcast_to_group(request_id, {
@@ -313,7 +314,7 @@ class WebSocketManager:
                 }
             }, ensure_ascii=False))
         except Exception as e:
-            logger.error(f"Ошибка при отправке ошибки клиенту: {e}")
+            logger.error("Ошибка при отправке ошибки клиенту: %s", e)
     
     async def _disconnect(self, websocket: WebSocket, request_id: str):
         """Отключение WebSocket клиента"""
@@ -332,9 +333,9 @@ class WebSocketManager:
                 if request_id in self.search_states:
                     del self.search_states[request_id]
                 
-                logger.info(f"Остановлен мониторинг для поиска {request_id}")
+                logger.info("Остановлен мониторинг для поиска %s", request_id)
         
-        logger.info(f"WebSocket отключен для поиска {request_id}")
+        logger.info("WebSocket отключен для поиска %s", request_id)
     
     async def _send_current_status(self, request_id: str):
         """Отправка текущего статуса поиска"""
@@ -382,10 +383,10 @@ class WebSocketManager:
                 "data": status_data
             })
             
-            logger.debug(f"📊 Статус для {request_id}: отелей {current_hotels}, страниц {total_pages}, текущая {current_page}")
+            logger.debug("📊 Статус для %s: отелей %s, страниц %s, текущая %s", request_id, current_hotels, total_pages, current_page)
             
         except Exception as e:
-            logger.error(f"Ошибка при отправке статуса: {e}")
+            logger.error("Ошибка при отправке статуса: %s", e)
     
     def _clean_string_field(self, value: Any) -> str:
         """Очистка строкового поля от некорректных значений"""
@@ -475,7 +476,6 @@ class WebSocketManager:
         """Безопасное получение результатов поиска с очисткой данных и пагинацией"""
         try:
             # Получаем сырые данные напрямую от TourVisor клиента
-            from app.core.tourvisor_client import tourvisor_client
             raw_results = await tourvisor_client.get_search_results(request_id, page, per_page)
             
             data = raw_results.get("data", {})
@@ -524,14 +524,14 @@ class WebSocketManager:
                                 cleaned_tour = self._clean_tour_data(tour_data)
                                 cleaned_tours.append(cleaned_tour)
                         except Exception as tour_error:
-                            logger.warning(f"Ошибка при очистке тура: {tour_error}")
+                            logger.warning("Ошибка при очистке тура: %s", tour_error)
                             continue
                     
                     cleaned_hotel["tours"] = cleaned_tours
                     cleaned_hotels.append(cleaned_hotel)
                     
                 except Exception as hotel_error:
-                    logger.warning(f"Ошибка при очистке отеля: {hotel_error}")
+                    logger.warning("Ошибка при очистке отеля: %s", hotel_error)
                     continue
             
             return {
@@ -540,7 +540,7 @@ class WebSocketManager:
             }
             
         except Exception as e:
-            logger.error(f"Ошибка при безопасном получении результатов: {e}")
+            logger.error("Ошибка при безопасном получении результатов: %s", e)
             return {
                 "status": {
                     "state": "error",
@@ -556,7 +556,7 @@ class WebSocketManager:
     async def _monitor_search(self, request_id: str):
         """Мониторинг поиска и отправка обновлений"""
         try:
-            logger.info(f"Начат мониторинг поиска {request_id}")
+            logger.info("Начат мониторинг поиска %s", request_id)
             search_finished = False
             last_sent_count = 0  # Отслеживаем количество отправленных отелей
             
@@ -575,7 +575,7 @@ class WebSocketManager:
                     
                     # ГЛАВНОЕ ИСПРАВЛЕНИЕ: Автоматически отправляем результаты при появлении новых отелей
                     if current_hotels_count > last_sent_count:
-                        logger.info(f"🔄 Найдено новых отелей для {request_id}: {current_hotels_count} (было {last_sent_count})")
+                        logger.info("🔄 Найдено новых отелей для %s: %s (было %s)", request_id, current_hotels_count, last_sent_count)
                         
                         # Определяем, какие страницы можно отправить с текущим количеством отелей
                         max_available_page = (current_hotels_count + per_page - 1) // per_page if current_hotels_count > 0 else 1
@@ -585,14 +585,14 @@ class WebSocketManager:
                             if page not in pages_sent:
                                 min_hotels_needed = (page - 1) * per_page + 1
                                 if current_hotels_count >= min_hotels_needed:
-                                    logger.info(f"📤 Автоотправка страницы {page} для {request_id} (достаточно отелей: {current_hotels_count} >= {min_hotels_needed})")
+                                    logger.info("📤 Автоотправка страницы %s для %s (достаточно отелей: %s >= %s)", page, request_id, current_hotels_count, min_hotels_needed)
                                     
                                     try:
                                         await self._send_page_results(request_id, page)
                                         pages_sent.add(page)  # Отмечаем что страница отправлена
                                         
                                     except Exception as results_error:
-                                        logger.error(f"Ошибка при автоотправке страницы {page} для {request_id}: {results_error}")
+                                        logger.error("Ошибка при автоотправке страницы %s для %s: %s", page, request_id, results_error)
                                         continue
                         
                         # Обновляем счетчик отправленных отелей
@@ -600,7 +600,7 @@ class WebSocketManager:
                     
                     # Проверяем завершение поиска
                     if status.state == "finished":
-                        logger.info(f"✅ Поиск {request_id} завершен: {current_hotels_count} отелей найдено")
+                        logger.info("✅ Поиск %s завершен: %s отелей найдено", request_id, current_hotels_count)
                         
                         # Отмечаем поиск как завершенный
                         self.search_states[request_id]["is_finished"] = True
@@ -611,12 +611,12 @@ class WebSocketManager:
                         
                         for page in range(1, max_available_page + 1):
                             if page not in pages_sent:
-                                logger.info(f"📤 Финальная отправка страницы {page} для {request_id}")
+                                logger.info("📤 Финальная отправка страницы %s для %s", page, request_id)
                                 try:
                                     await self._send_page_results(request_id, page)
                                     pages_sent.add(page)
                                 except Exception as final_error:
-                                    logger.error(f"Ошибка при финальной отправке страницы {page}: {final_error}")
+                                    logger.error("Ошибка при финальной отправке страницы %s: %s", page, final_error)
                     
                     if search_finished:
                         break
@@ -625,13 +625,13 @@ class WebSocketManager:
                     await asyncio.sleep(2)
                     
                 except Exception as e:
-                    logger.error(f"Ошибка в мониторинге поиска {request_id}: {e}")
+                    logger.error("Ошибка в мониторинге поиска %s: %s", request_id, e)
                     await asyncio.sleep(5)
             
         except asyncio.CancelledError:
-            logger.info(f"Мониторинг поиска {request_id} отменен")
+            logger.info("Мониторинг поиска %s отменен", request_id)
         except Exception as e:
-            logger.error(f"Критическая ошибка в мониторинге {request_id}: {e}")
+            logger.error("Критическая ошибка в мониторинге %s: %s", request_id, e)
             await self._close_all_connections(request_id, close_code=1011, reason="Ошибка сервера")
         finally:
             if request_id in self.monitoring_tasks:
@@ -649,7 +649,7 @@ class WebSocketManager:
             try:
                 await websocket.send_text(message_text)
             except Exception as e:
-                logger.warning(f"Не удалось отправить сообщение через WebSocket: {e}")
+                logger.warning("Не удалось отправить сообщение через WebSocket: %s", e)
                 disconnected.add(websocket)
         
         # Удаляем отключенные соединения
@@ -666,9 +666,9 @@ class WebSocketManager:
         for websocket in connections_to_close:
             try:
                 await websocket.close(code=close_code, reason=reason)
-                logger.debug(f"WebSocket соединение закрыто для поиска {request_id}")
+                logger.debug("WebSocket соединение закрыто для поиска %s", request_id)
             except Exception as e:
-                logger.warning(f"Ошибка при закрытии WebSocket: {e}")
+                logger.warning("Ошибка при закрытии WebSocket: %s", e)
         
         # Очищаем все соединения для этого поиска
         if request_id in self.active_connections:
@@ -683,7 +683,7 @@ class WebSocketManager:
         if request_id in self.search_states:
             del self.search_states[request_id]
         
-        logger.info(f"Все WebSocket соединения закрыты для поиска {request_id}")
+        logger.info("Все WebSocket соединения закрыты для поиска %s", request_id)
     
     async def send_search_update(self, request_id: str, update_type: str, data: dict):
         """Публичный метод для отправки обновлений поиска"""
@@ -717,11 +717,11 @@ class WebSocketManager:
     async def close_all_clients_for_search(self, request_id: str, reason: str = "Закрыто администратором"):
         """Закрытие всех клиентских соединений для конкретного поиска"""
         if request_id not in self.active_connections:
-            logger.info(f"Нет активных соединений для поиска {request_id}")
+            logger.info("Нет активных соединений для поиска %s", request_id)
             return
         
         connections_to_close = list(self.active_connections[request_id])
-        logger.info(f"Закрытие {len(connections_to_close)} соединений для поиска {request_id}")
+        logger.info("Закрытие %s соединений для поиска %s", len(connections_to_close), request_id)
         
         # Уведомляем всех клиентов о предстоящем закрытии
         await self._broadcast_to_group(request_id, {
@@ -740,7 +740,7 @@ class WebSocketManager:
             try:
                 await websocket.close(code=1000, reason=reason)
             except Exception as e:
-                logger.warning(f"Ошибка при закрытии WebSocket: {e}")
+                logger.warning("Ошибка при закрытии WebSocket: %s", e)
         
         # Очищаем ресурсы
         await self._cleanup_search_resources(request_id)
@@ -761,10 +761,10 @@ class WebSocketManager:
             if request_id in self.search_states:
                 del self.search_states[request_id]
             
-            logger.info(f"Все ресурсы для поиска {request_id} очищены")
+            logger.info("Все ресурсы для поиска %s очищены", request_id)
             
         except Exception as e:
-            logger.error(f"Ошибка при очистке ресурсов для поиска {request_id}: {e}")
+            logger.error("Ошибка при очистке ресурсов для поиска %s: %s", request_id, e)
     
     def get_search_states_info(self) -> Dict[str, Dict[str, Any]]:
         """Получение информации о состояниях поисков"""
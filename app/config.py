@@ -20,11 +20,15 @@ class Settings:
     TOURVISOR_AUTH_LOGIN = os.getenv("TOURVISOR_AUTH_LOGIN", "alexandratur@yandex.ru")
     TOURVISOR_AUTH_PASS = os.getenv("TOURVISOR_AUTH_PASS", "BqgYFUGKesS6")
     TOURVISOR_BASE_URL = os.getenv("TOURVISOR_BASE_URL", "http://tourvisor.ru/xml")
+    # Максимум одновременных запросов к TourVisor из одного процесса
+    TOURVISOR_MAX_CONCURRENCY = int(os.getenv("TOURVISOR_MAX_CONCURRENCY", "20"))
     
     # Redis настройки для кэша
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
     CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
     POPULAR_TOURS_CACHE_TTL = int(os.getenv("POPULAR_TOURS_CACHE_TTL", "86400"))
+    # Короткий кэш актуализации тура (цены меняются быстро)
+    TOUR_DETAILS_CACHE_TTL = int(os.getenv("TOUR_DETAILS_CACHE_TTL", "60"))
     
     # Email настройки
     SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
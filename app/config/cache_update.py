@@ -280,6 +280,7 @@ class DirectionsCacheUpdateService:
             # Очищаем кэш для этой страны
             cache_key = f"directions_with_prices_country_{country_id}"
             await cache_service.delete(cache_key)
+            await directions_service.bump_version()
             
             # Получаем новые направления
             directions = await directions_service.get_directions_by_country(country_name)
@@ -288,8 +289,8 @@ class DirectionsCacheUpdateService:
             execution_time = (end_time - start_time).total_seconds()
             
             # Анализ качества результатов
-            with_prices = len([d for d in directions if d.get("min_price")])
-            with_images = len([d for d in directions if d.get("image_link")])
+            summary = directions_service.summarize_directions(directions)
+            with_prices, with_images = summary["with_prices"], summary["with_images"]
             real_prices = len([d for d in directions if d.get("min_price") and not str(d.get("min_price", "")).endswith("000")])
             
             # Проверка качества если требуется
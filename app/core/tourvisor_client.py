@@ -1,16 +1,46 @@
+import logging
 import aiohttp
 import asyncio
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Optional, List, Tuple
+from datetime import date, datetime, timedelta
 import xml.etree.ElementTree as ET
 import json
 import re
+import time
+from contextlib import asynccontextmanager
 
 from app.config import settings
+from app.utils.dates import format_date_offset
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Сколько секунд одновременные опросы статуса одного поиска делят один HTTP-запрос
+STATUS_CACHE_TTL = 0.5
+
+# Моменты опроса статуса (секунды от старта) для коротких служебных поисков: паузы растут
+# экспоненциально 0.1 → 2 сек, всего ~5 секунд
+SEARCH_BACKOFF_POLL_DELAYS = (0.1, 0.3, 0.7, 1.5, 3.1, 5.1)
+
+def search_hotels_found(status_data: Dict[str, Any]) -> int:
+    """Число найденных отелей из статуса поиска (TourVisor отдает его и строкой)"""
+    try:
+        return int(status_data.get("hotelsfound") or 0)
+    except (ValueError, TypeError):
+        return 0
+
+# Справочники TourVisor меняются редко: держим их в памяти процесса
+REFERENCES_CACHE_TTL = 3600
+# Быстро меняющиеся справочники держим в памяти меньше - не дольше, чем их отдает клиентам API
+REFERENCES_CACHE_TTL_BY_TYPE = {"currency": 300, "flydate": 600}
+# Фильтры приходят из запросов клиентов - ограничиваем число запомненных вариантов
+REFERENCES_CACHE_MAX_ENTRIES = 256
+# Ошибку справочника запоминаем ненадолго, чтобы при сбое API не повторять запрос на каждый вызов
+REFERENCES_ERROR_TTL = 30
+
+# Сколько секунд aiohttp хранит разрешенный адрес TourVisor (по умолчанию 10)
+TOURVISOR_DNS_CACHE_TTL = 300
+
 class TourVisorClient:
     def __init__(self):
         self.base_url = settings.TOURVISOR_BASE_URL
@@ -20,17 +50,41 @@ class TourVisorClient:
         }
         self.session: Optional[aiohttp.ClientSession] = None
         self.request_timeout = 600  # Увеличиваем таймаут запросов
+        # request_id -> (время запуска, future) для коротко живущего кэша статусов
+        self._status_cache: Dict[str, Tuple[float, asyncio.Future]] = {}
+        # (тип, фильтры) -> (истекает, future) для кэша справочников
+        self._references_cache: Dict[tuple, Tuple[float, asyncio.Future]] = {}
+        # Общий лимит одновременных запросов к TourVisor: при всплеске нагрузки лишние
+        # запросы ждут очереди до отправки, и ожидание не съедает таймаут самого запроса
+        self.max_concurrency = settings.TOURVISOR_MAX_CONCURRENCY
+        self._request_semaphore = asyncio.Semaphore(self.max_concurrency)
     
     async def get_session(self):
         if self.session is None or self.session.closed:
             timeout = aiohttp.ClientTimeout(total=self.request_timeout)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            # Держим keep-alive соединения к TourVisor: поиск, опросы статуса и
+            # результаты идут по уже открытым соединениям без нового TCP/TLS handshake.
+            # Адрес TourVisor не меняется - новые соединения не ждут DNS каждые 10 секунд
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.max_concurrency,
+                keepalive_timeout=30,
+                ttl_dns_cache=TOURVISOR_DNS_CACHE_TTL
+            )
+            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
         return self.session
     
     async def close(self):
         if self.session and not self.session.closed:
             await self.session.close()
     
+    @asynccontextmanager
+    async def _get(self, url: str, params: Dict[str, Any]):
+        """GET-запрос к TourVisor в пределах общего лимита одновременных запросов"""
+        session = await self.get_session()
+        async with self._request_semaphore:
+            async with session.get(url, params=params) as response:
+                yield response
+    
     async def _make_request_with_retry(self, endpoint: str, params: Dict[str, Any], max_retries: int = 3) -> Dict[str, Any]:
         """Выполнение запроса с повторными попытками"""
         last_error = None
@@ -42,16 +96,15 @@ class TourVisorClient:
                 last_error = e
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt  # Экспоненциальная задержка
-                    logger.warning(f"⚠️ Попытка {attempt + 1} неудачна, ждем {wait_time}с: {e}")
+                    logger.warning("⚠️ Попытка %s неудачна, ждем %sс: %s", attempt + 1, wait_time, e)
                     await asyncio.sleep(wait_time)
                 else:
-                    logger.error(f"❌ Все {max_retries} попыток исчерпаны")
+                    logger.error("❌ Все %s попыток исчерпаны", max_retries)
         
         raise last_error
     
     async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Базовый метод для выполнения запросов к TourVisor API"""
-        session = await self.get_session()
         full_params = {**self.auth_params, **params}
         
         try:
@@ -59,42 +112,42 @@ class TourVisorClient:
             
             # Логируем параметры без пароля
             safe_params = {k: v for k, v in full_params.items() if k != "authpass"}
-            logger.debug(f"🌐 Запрос к TourVisor: {url}")
-            logger.debug(f"📋 Параметры: {safe_params}")
+            logger.debug("🌐 Запрос к TourVisor: %s", url)
+            logger.debug("📋 Параметры: %s", safe_params)
             
-            async with session.get(url, params=full_params) as response:
+            async with self._get(url, full_params) as response:
                 response_text = await response.text()
                 
                 # Проверяем статус ответа
                 if response.status != 200:
-                    logger.error(f"❌ HTTP {response.status}: {response_text[:200]}")
+                    logger.error("❌ HTTP %s: %s", response.status, response_text[:200])
                     response.raise_for_status()
                 
-                logger.debug(f"✅ Ответ получен (длина: {len(response_text)} символов)")
+                logger.debug("✅ Ответ получен (длина: %s символов)", len(response_text))
                 
                 # Проверяем на ошибки в тексте ответа
                 if "error" in response_text.lower() or "ошибка" in response_text.lower():
-                    logger.warning(f"⚠️ Возможная ошибка в ответе: {response_text[:200]}")
+                    logger.warning("⚠️ Возможная ошибка в ответе: %s", response_text[:200])
                 
                 if params.get("format") == "json":
                     try:
                         return await response.json()
                     except Exception as e:
-                        logger.error(f"❌ Ошибка парсинга JSON: {e}")
-                        logger.error(f"📄 Ответ: {response_text[:500]}")
+                        logger.error("❌ Ошибка парсинга JSON: %s", e)
+                        logger.error("📄 Ответ: %s", response_text[:500])
                         raise
                 else:
                     # Парсинг XML
                     return self._parse_xml(response_text)
                     
         except aiohttp.ClientTimeout:
-            logger.error(f"⏰ Таймаут запроса к {endpoint} ({self.request_timeout}с)")
+            logger.error("⏰ Таймаут запроса к %s (%sс)", endpoint, self.request_timeout)
             raise
         except aiohttp.ClientError as e:
-            logger.error(f"🌐 Сетевая ошибка при запросе к {endpoint}: {e}")
+            logger.error("🌐 Сетевая ошибка при запросе к %s: %s", endpoint, e)
             raise
         except Exception as e:
-            logger.error(f"💥 Неожиданная ошибка при запросе к {endpoint}: {e}")
+            logger.error("💥 Неожиданная ошибка при запросе к %s: %s", endpoint, e)
             if hasattr(e, 'status') and e.status == 403:
                 logger.error("🔐 Ошибка авторизации! Проверьте TOURVISOR_AUTH_LOGIN и TOURVISOR_AUTH_PASS")
             raise
@@ -111,12 +164,13 @@ class TourVisorClient:
             root = ET.fromstring(xml_content)
             result = self._xml_to_dict(root)
             
-            logger.debug(f"📊 XML парсинг успешен, ключи верхнего уровня: {list(result.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📊 XML парсинг успешен, ключи верхнего уровня: %s", list(result.keys()))
             return result
             
         except ET.ParseError as e:
-            logger.error(f"❌ Ошибка парсинга XML: {e}")
-            logger.error(f"📄 XML содержимое: {xml_content[:500]}")
+            logger.error("❌ Ошибка парсинга XML: %s", e)
+            logger.error("📄 XML содержимое: %s", xml_content[:500])
             raise
     
     def _xml_to_dict(self, element) -> Dict[str, Any]:
@@ -174,7 +228,6 @@ class TourVisorClient:
         # Валидируем и форматируем параметры
         params = self._validate_search_params(params)
         
-        session = await self.get_session()
         full_params = {**self.auth_params, **params}
         
         try:
@@ -182,33 +235,33 @@ class TourVisorClient:
             
             # Безопасные параметры для логирования
             safe_params = {k: v for k, v in full_params.items() if k != "authpass"}
-            logger.info(f"🔍 Запуск поиска туров: {safe_params}")
+            logger.info("🔍 Запуск поиска туров: %s", safe_params)
             
-            async with session.get(url, params=full_params) as response:
+            async with self._get(url, full_params) as response:
                 response_text = await response.text()
                 
-                logger.info(f"📡 HTTP статус: {response.status}")
-                logger.info(f"📄 Длина ответа: {len(response_text)} символов")
-                logger.debug(f"📄 Первые 500 символов ответа: {response_text[:500]}")
+                logger.info("📡 HTTP статус: %s", response.status)
+                logger.info("📄 Длина ответа: %s символов", len(response_text))
+                logger.debug("📄 Первые 500 символов ответа: %s", response_text[:500])
                 
                 if response.status != 200:
-                    logger.error(f"❌ HTTP {response.status} при поиске")
-                    logger.error(f"📄 Полный ответ: {response_text}")
+                    logger.error("❌ HTTP %s при поиске", response.status)
+                    logger.error("📄 Полный ответ: %s", response_text)
                     raise ValueError(f"HTTP {response.status}: {response_text}")
                 
                 # Детальный анализ ответа
                 analysis_result = self._analyze_search_response(response_text)
                 
                 if analysis_result["request_id"]:
-                    logger.info(f"✅ Получен request_id: {analysis_result['request_id']}")
+                    logger.info("✅ Получен request_id: %s", analysis_result['request_id'])
                     return analysis_result["request_id"]
                 else:
-                    logger.error(f"❌ Не удалось извлечь request_id")
-                    logger.error(f"📊 Анализ ответа: {analysis_result}")
+                    logger.error("❌ Не удалось извлечь request_id")
+                    logger.error("📊 Анализ ответа: %s", analysis_result)
                     raise ValueError(f"Не удалось получить request_id: {analysis_result['error']}")
                     
         except Exception as e:
-            logger.error(f"💥 Ошибка запуска поиска туров: {e}")
+            logger.error("💥 Ошибка запуска поиска туров: %s", e)
             # Дополнительная диагностика
             await self._diagnose_search_failure(params, str(e))
             raise
@@ -219,12 +272,10 @@ class TourVisorClient:
         
         # Проверяем и форматируем даты
         if not validated_params.get("datefrom"):
-            tomorrow = datetime.now() + timedelta(days=7)
-            validated_params["datefrom"] = tomorrow.strftime("%d.%m.%Y")
+            validated_params["datefrom"] = format_date_offset(date.today(), 7)
             
         if not validated_params.get("dateto"):
-            date_to = datetime.now() + timedelta(days=14)
-            validated_params["dateto"] = date_to.strftime("%d.%m.%Y")
+            validated_params["dateto"] = format_date_offset(date.today(), 14)
         
         # Проверяем корректность дат
         try:
@@ -236,10 +287,10 @@ class TourVisorClient:
                 validated_params["dateto"] = (date_from + timedelta(days=7)).strftime("%d.%m.%Y")
                 
         except ValueError as e:
-            logger.warning(f"⚠️ Некорректный формат даты: {e}")
+            logger.warning("⚠️ Некорректный формат даты: %s", e)
             # Устанавливаем дефолтные даты
-            validated_params["datefrom"] = (datetime.now() + timedelta(days=7)).strftime("%d.%m.%Y")
-            validated_params["dateto"] = (datetime.now() + timedelta(days=14)).strftime("%d.%m.%Y")
+            validated_params["datefrom"] = format_date_offset(date.today(), 7)
+            validated_params["dateto"] = format_date_offset(date.today(), 14)
         
         # Валидируем числовые параметры
         int_params = ["departure", "country", "adults", "child", "nightsfrom", "nightsto"]
@@ -252,19 +303,19 @@ class TourVisorClient:
                         if value.strip():  # Проверяем, что строка не пустая
                             validated_params[param] = int(value.strip())
                         else:
-                            logger.warning(f"⚠️ Пустое значение для {param}, удаляем")
+                            logger.warning("⚠️ Пустое значение для %s, удаляем", param)
                             del validated_params[param]
                     elif isinstance(value, (int, float)):
                         validated_params[param] = int(value)
                     else:
-                        logger.warning(f"⚠️ Неподдерживаемый тип для {param}: {type(value)}")
+                        logger.warning("⚠️ Неподдерживаемый тип для %s: %s", param, type(value))
                         del validated_params[param]
                 except (ValueError, TypeError) as e:
-                    logger.warning(f"⚠️ Некорректное значение {param}: {validated_params[param]} -> {e}")
+                    logger.warning("⚠️ Некорректное значение %s: %s -> %s", param, validated_params[param], e)
                     # Удаляем некорректные значения
                     del validated_params[param]
         
-        logger.debug(f"✅ Валидированные параметры: {validated_params}")
+        logger.debug("✅ Валидированные параметры: %s", validated_params)
         return validated_params
     
     def _analyze_search_response(self, response_text: str) -> Dict[str, Any]:
@@ -294,7 +345,7 @@ class TourVisorClient:
                 if indicator in response_lower:
                     analysis["contains_error"] = True
                     analysis["error"] = f"Обнаружен индикатор ошибки: {indicator}"
-                    logger.warning(f"⚠️ {analysis['error']} в ответе: {response_text[:200]}")
+                    logger.warning("⚠️ %s в ответе: %s", analysis['error'], response_text[:200])
             
             # Случай 1: Простое число (традиционный request_id)
             if response_text.isdigit():
@@ -412,25 +463,54 @@ class TourVisorClient:
     async def _diagnose_search_failure(self, params: Dict[str, Any], error_message: str):
         """Диагностика неудачного поиска"""
         logger.error("🔍 ДИАГНОСТИКА НЕУДАЧНОГО ПОИСКА:")
-        logger.error(f"  📋 Параметры: {params}")
-        logger.error(f"  💥 Ошибка: {error_message}")
+        logger.error("  📋 Параметры: %s", params)
+        logger.error("  💥 Ошибка: %s", error_message)
         
         # Проверяем базовое подключение
         try:
             test_result = await self.test_connection()
-            logger.error(f"  🌐 Тест подключения: {test_result}")
+            logger.error("  🌐 Тест подключения: %s", test_result)
         except Exception as conn_error:
-            logger.error(f"  🌐 Ошибка подключения: {conn_error}")
+            logger.error("  🌐 Ошибка подключения: %s", conn_error)
         
         # Проверяем простейший справочник
         try:
             simple_ref = await self.get_references("departure")
             ref_status = "OK" if simple_ref else "Empty"
-            logger.error(f"  📚 Тест справочника: {ref_status}")
+            logger.error("  📚 Тест справочника: %s", ref_status)
         except Exception as ref_error:
-            logger.error(f"  📚 Ошибка справочника: {ref_error}")
+            logger.error("  📚 Ошибка справочника: %s", ref_error)
     
     async def get_search_status(self, request_id: str) -> Dict[str, Any]:
+        """
+        Получение статуса поиска
+        
+        Опросы одного request_id в пределах STATUS_CACHE_TTL секунд (в том числе
+        одновременные) получают результат одного запроса к TourVisor
+        """
+        now = time.monotonic()
+        cached = self._status_cache.get(request_id)
+        if cached and now - cached[0] < STATUS_CACHE_TTL:
+            return await asyncio.shield(cached[1])
+        
+        # Убираем устаревшие завершенные записи других поисков
+        for key, (started_at, future) in list(self._status_cache.items()):
+            if future.done() and now - started_at >= STATUS_CACHE_TTL:
+                del self._status_cache[key]
+        
+        future = asyncio.ensure_future(self._fetch_search_status(request_id))
+        future.add_done_callback(lambda done: self._forget_failed_status(request_id, done))
+        self._status_cache[request_id] = (now, future)
+        return await asyncio.shield(future)
+    
+    def _forget_failed_status(self, request_id: str, future: asyncio.Future):
+        """Ошибки не кэшируются: следующий опрос сделает новый запрос"""
+        if future.cancelled() or future.exception() is not None:
+            cached = self._status_cache.get(request_id)
+            if cached and cached[1] is future:
+                del self._status_cache[request_id]
+    
+    async def _fetch_search_status(self, request_id: str) -> Dict[str, Any]:
         """Получение статуса поиска с улучшенной обработкой разных форматов ответов"""
         try:
             params = {
@@ -439,11 +519,11 @@ class TourVisorClient:
                 "format": "xml"
             }
             
-            logger.debug(f"📊 Запрос статуса поиска {request_id}")
+            logger.debug("📊 Запрос статуса поиска %s", request_id)
             result = await self._make_request("result.php", params)
             
             # Логируем сырой ответ для диагностики
-            logger.debug(f"🔍 Сырой ответ статуса: {result}")
+            logger.debug("🔍 Сырой ответ статуса: %s", result)
             
             # Нормализуем структуру ответа
             normalized_result = self._normalize_status_response(result, request_id)
@@ -454,7 +534,7 @@ class TourVisorClient:
             return normalized_result
             
         except Exception as e:
-            logger.error(f"❌ Ошибка получения статуса {request_id}: {e.with_traceback}")
+            logger.error("❌ Ошибка получения статуса %s: %s", request_id, e.with_traceback)
             raise
     
     def _normalize_status_response(self, result: Dict[str, Any], request_id: str) -> Dict[str, Any]:
@@ -466,7 +546,7 @@ class TourVisorClient:
         
         # Вариант 1: статус находится в корне
         if "status" in result:
-            logger.info(f"🔧 Нормализация: статус в корне для {request_id}")
+            logger.info("🔧 Нормализация: статус в корне для %s", request_id)
             return {
                 "data": {
                     "status": result["status"]
@@ -476,7 +556,7 @@ class TourVisorClient:
         # Вариант 2: данные статуса прямо в корне (без обертки)
         status_fields = ["state", "hotelsfound", "toursfound", "minprice", "progress", "timepassed"]
         if any(field in result for field in status_fields):
-            logger.info(f"🔧 Нормализация: статус прямо в корне для {request_id}")
+            logger.info("🔧 Нормализация: статус прямо в корне для %s", request_id)
             
             # Собираем данные статуса с безопасным преобразованием типов
             status_data = {}
@@ -504,7 +584,7 @@ class TourVisorClient:
                         else:  # state
                             status_data[field] = str(value) if value is not None else ""
                     except (ValueError, TypeError) as e:
-                        logger.warning(f"⚠️ Ошибка преобразования {field}: {value} -> {e}")
+                        logger.warning("⚠️ Ошибка преобразования %s: %s -> %s", field, value, e)
                         # Значения по умолчанию
                         if field in ["hotelsfound", "toursfound", "progress", "timepassed"]:
                             status_data[field] = 0
@@ -524,7 +604,7 @@ class TourVisorClient:
         status_data = self._extract_status_from_structure(result)
         
         if status_data:
-            logger.info(f"🔧 Нормализация: извлечен статус из структуры для {request_id}")
+            logger.info("🔧 Нормализация: извлечен статус из структуры для %s", request_id)
             return {
                 "data": {
                     "status": status_data
@@ -532,8 +612,8 @@ class TourVisorClient:
             }
         
         # Вариант 4: создаем дефолтный статус
-        logger.warning(f"⚠️ Не удалось найти статус, создаем дефолтный для {request_id}")
-        logger.warning(f"🔍 Ключи ответа: {list(result.keys())}")
+        logger.warning("⚠️ Не удалось найти статус, создаем дефолтный для %s", request_id)
+        logger.warning("🔍 Ключи ответа: %s", list(result.keys()))
         
         return {
             "data": {
@@ -593,7 +673,7 @@ class TourVisorClient:
                         else:  # str
                             found_data[field] = str(value) if value is not None else ""
                     except (ValueError, TypeError) as e:
-                        logger.warning(f"⚠️ Не удалось преобразовать {field}: {data[field]} -> {e}")
+                        logger.warning("⚠️ Не удалось преобразовать %s: %s -> %s", field, data[field], e)
                         # Устанавливаем значения по умолчанию в случае ошибки
                         if field_type == int:
                             found_data[field] = 0
@@ -605,7 +685,8 @@ class TourVisorClient:
             
             # Если нашли хотя бы несколько полей, возвращаем
             if len(found_data) >= 2:
-                logger.debug(f"🔍 Найдены поля статуса в {path}: {list(found_data.keys())}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("🔍 Найдены поля статуса в %s: %s", path, list(found_data.keys()))
                 return found_data
             
             # Рекурсивный поиск в дочерних элементах
@@ -625,16 +706,18 @@ class TourVisorClient:
     
     def _diagnose_status_response(self, result: Dict[str, Any], request_id: str):
         """Диагностика ответа статуса"""
-        logger.debug(f"🔍 Диагностика статуса {request_id}:")
-        logger.debug(f"  📋 Ключи верхнего уровня: {list(result.keys())}")
+        logger.debug("🔍 Диагностика статуса %s:", request_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  📋 Ключи верхнего уровня: %s", list(result.keys()))
         
         if "data" in result:
             data = result["data"]
-            logger.debug(f"  📊 Ключи data: {list(data.keys()) if isinstance(data, dict) else type(data)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  📊 Ключи data: %s", list(data.keys()) if isinstance(data, dict) else type(data))
             
             if isinstance(data, dict) and "status" in data:
                 status = data["status"]
-                logger.debug(f"  ⭐ Статус: {status}")
+                logger.debug("  ⭐ Статус: %s", status)
                 
                 if isinstance(status, dict):
                     state = status.get("state", "unknown")
@@ -642,13 +725,13 @@ class TourVisorClient:
                     hotels = status.get("hotelsfound", 0)
                     tours = status.get("toursfound", 0)
                     
-                    logger.info(f"📈 Поиск {request_id}: {state}, {progress}%, отелей: {hotels}, туров: {tours}")
+                    logger.info("📈 Поиск %s: %s, %s%%, отелей: %s, туров: %s", request_id, state, progress, hotels, tours)
                 else:
-                    logger.warning(f"⚠️ Статус не является словарем: {type(status)}")
+                    logger.warning("⚠️ Статус не является словарем: %s", type(status))
             else:
-                logger.warning(f"⚠️ Нет блока 'status' в data для {request_id}")
+                logger.warning("⚠️ Нет блока 'status' в data для %s", request_id)
         else:
-            logger.warning(f"⚠️ Нет блока 'data' в ответе статуса для {request_id}")
+            logger.warning("⚠️ Нет блока 'data' в ответе статуса для %s", request_id)
     
     async def get_search_results(self, request_id: str, page: int = 1, onpage: int = 25) -> Dict[str, Any]:
         """Получение результатов поиска с улучшенной обработкой"""
@@ -661,11 +744,12 @@ class TourVisorClient:
                 "format": "xml"
             }
             
-            logger.debug(f"📥 Запрос результатов поиска {request_id} (страница {page})")
+            logger.debug("📥 Запрос результатов поиска %s (страница %s)", request_id, page)
             result = await self._make_request("result.php", params)
             
             # Логируем структуру для диагностики
-            logger.debug(f"🔍 Ключи результатов: {list(result.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 Ключи результатов: %s", list(result.keys()))
             
             # Нормализуем структуру результатов
             normalized_result = self._normalize_results_response(result, request_id)
@@ -676,7 +760,7 @@ class TourVisorClient:
             return normalized_result
             
         except Exception as e:
-            logger.error(f"❌ Ошибка получения результатов {request_id}: {e}")
+            logger.error("❌ Ошибка получения результатов %s: %s", request_id, e)
             raise
     
     def _normalize_results_response(self, result: Dict[str, Any], request_id: str) -> Dict[str, Any]:
@@ -699,7 +783,7 @@ class TourVisorClient:
         if result_data:
             normalized["data"]["result"] = result_data
         
-        logger.debug(f"🔧 Нормализованы результаты для {request_id}")
+        logger.debug("🔧 Нормализованы результаты для %s", request_id)
         return normalized
     
     def _extract_results_from_structure(self, data: Any) -> Dict[str, Any]:
@@ -725,7 +809,7 @@ class TourVisorClient:
     
     def _diagnose_results_response(self, result: Dict[str, Any], request_id: str):
         """Диагностика ответа с результатами"""
-        logger.debug(f"🔍 Диагностика результатов {request_id}:")
+        logger.debug("🔍 Диагностика результатов %s:", request_id)
         
         if "data" in result:
             data = result["data"]
@@ -736,7 +820,7 @@ class TourVisorClient:
                 if isinstance(status, dict):
                     state = status.get("state", "unknown")
                     hotels_found = status.get("hotelsfound", 0)
-                    logger.info(f"📊 Результаты {request_id}: {state}, отелей найдено: {hotels_found}")
+                    logger.info("📊 Результаты %s: %s, отелей найдено: %s", request_id, state, hotels_found)
             
             # Проверяем результаты
             if "result" in data:
@@ -744,19 +828,19 @@ class TourVisorClient:
                 if isinstance(result_data, dict) and "hotel" in result_data:
                     hotels = result_data["hotel"]
                     hotels_count = len(hotels) if isinstance(hotels, list) else (1 if hotels else 0)
-                    logger.info(f"🏨 Отелей в результатах: {hotels_count}")
+                    logger.info("🏨 Отелей в результатах: %s", hotels_count)
                     
                     if hotels_count > 0:
                         # Показываем пример отеля
                         sample_hotel = hotels[0] if isinstance(hotels, list) else hotels
                         if isinstance(sample_hotel, dict):
-                            logger.debug(f"🏨 Пример отеля: {sample_hotel.get('hotelname', 'No name')} - {sample_hotel.get('price', 'No price')}")
+                            logger.debug("🏨 Пример отеля: %s - %s", sample_hotel.get('hotelname', 'No name'), sample_hotel.get('price', 'No price'))
                 else:
-                    logger.warning(f"⚠️ Нет отелей в результатах для {request_id}")
+                    logger.warning("⚠️ Нет отелей в результатах для %s", request_id)
             else:
-                logger.warning(f"⚠️ Нет блока 'result' в ответе для {request_id}")
+                logger.warning("⚠️ Нет блока 'result' в ответе для %s", request_id)
         else:
-            logger.warning(f"⚠️ Нет блока 'data' в ответе результатов для {request_id}")
+            logger.warning("⚠️ Нет блока 'data' в ответе результатов для %s", request_id)
 
     async def continue_search(self, request_id: str) -> Dict[str, Any]:
         """Продолжение поиска для получения больше результатов"""
@@ -767,6 +851,64 @@ class TourVisorClient:
         
         return await self._make_request("search.php", params)
     
+    async def wait_for_search(
+        self,
+        request_id: str,
+        poll_delays: tuple = (0.2, 0.5, 1.0, 2.0, 3.5, 5.0, 7.0, 10.0),
+        ready: Optional[Callable[[Dict[str, Any], int], bool]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ожидание завершения поиска
+        
+        Запросы статуса запускаются заранее со ступенчатыми задержками (poll_delays -
+        моменты опроса от старта), поэтому время ответа TourVisor не складывается с паузами
+        между попытками. Возвращает первый статус "finished" или статус, для которого
+        ready(status, номер опроса) вернул True; иначе - последний полученный статус
+        """
+        async def poll_after(attempt: int, delay: float) -> Tuple[int, Dict[str, Any]]:
+            await asyncio.sleep(delay)
+            return attempt, await self.get_search_status(request_id)
+        
+        tasks = [asyncio.create_task(poll_after(attempt, delay)) for attempt, delay in enumerate(poll_delays)]
+        last_status = None
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    attempt, status_result = await next_done
+                except Exception as e:
+                    logger.debug("📊 Ошибка опроса статуса %s: %s", request_id, e)
+                    continue
+                
+                last_status = status_result
+                status_data = (status_result.get("data") or {}).get("status") or {}
+                if status_data.get("state") == "finished" or (ready and ready(status_data, attempt)):
+                    return status_result
+            
+            return last_status
+        finally:
+            # Оставшиеся запросы статуса больше не нужны
+            for task in tasks:
+                task.cancel()
+    
+    async def search_and_wait(
+        self,
+        search_params: Dict[str, Any],
+        page: int = 1,
+        onpage: int = 25,
+        poll_delays: tuple = (0.2, 0.5, 1.0, 2.0, 3.5, 5.0, 7.0, 10.0)
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Запуск поиска, ожидание завершения и получение результатов одним вызовом
+        
+        Все запросы идут через общую сессию с keep-alive соединениями.
+        Возвращает (request_id, результаты); статус поиска - в results["data"]["status"]
+        """
+        request_id = await self.search_tours(search_params)
+        await self.wait_for_search(request_id, poll_delays)
+        results = await self.get_search_results(request_id, page, onpage)
+        return request_id, results
+    
     async def get_hot_tours(self, city: int, items: int = 10, countries: str = None, **filters) -> Dict[str, Any]:
         params = {
             "city": city,
@@ -783,16 +925,64 @@ class TourVisorClient:
             
             # Логируем результат горящих туров
             hot_count = result.get("hotcount", 0)
-            logger.debug(f"🔥 Горящие туры для города {city}: найдено {hot_count}")
+            logger.debug("🔥 Горящие туры для города %s: найдено %s", city, hot_count)
             
             return result
             
         except (aiohttp.ClientError, asyncio.TimeoutError, Exception) as e:
-            logger.warning(f"⚠️ Ошибка получения горящих туров для города {city}: {e}")
+            logger.warning("⚠️ Ошибка получения горящих туров для города %s: %s", city, e)
             return {"hotcount": 0, "hottours": []}
     
     async def get_references(self, ref_type: str, **filters) -> Dict[str, Any]:
-        """Получение справочников"""
+        """
+        Получение справочников
+        
+        Ответы кэшируются в памяти на REFERENCES_CACHE_TTL секунд (для currency и flydate
+        меньше, см. REFERENCES_CACHE_TTL_BY_TYPE), одновременные
+        запросы одного справочника ждут один HTTP-запрос. Возвращаемые данные общие -
+        их нельзя изменять на месте.
+        """
+        key = (ref_type, tuple(sorted((name, str(value)) for name, value in filters.items())))
+        now = time.monotonic()
+        cached = self._references_cache.get(key)
+        if cached and now < cached[0]:
+            return await asyncio.shield(cached[1])
+        
+        # Убираем истекшие записи, а при переполнении - самые старые завершенные
+        for cached_key, (expires_at, future) in list(self._references_cache.items()):
+            if future.done() and now >= expires_at:
+                del self._references_cache[cached_key]
+        if len(self._references_cache) >= REFERENCES_CACHE_MAX_ENTRIES:
+            for cached_key, (_, future) in list(self._references_cache.items()):
+                if len(self._references_cache) < REFERENCES_CACHE_MAX_ENTRIES:
+                    break
+                if future.done():
+                    del self._references_cache[cached_key]
+        
+        ttl = REFERENCES_CACHE_TTL_BY_TYPE.get(ref_type, REFERENCES_CACHE_TTL)
+        future = asyncio.ensure_future(self._fetch_references(ref_type, filters))
+        future.add_done_callback(lambda done: self._expire_failed_references(key, done))
+        # Повторная вставка переносит ключ в конец - порядок словаря остается порядком добавления
+        self._references_cache.pop(key, None)
+        self._references_cache[key] = (now + ttl, future)
+        return await asyncio.shield(future)
+    
+    def clear_references_cache(self):
+        """Сброс справочников в памяти (POST /references/refresh)"""
+        self._references_cache.clear()
+    
+    def _expire_failed_references(self, key: tuple, future: asyncio.Future):
+        """Ошибка справочника хранится только REFERENCES_ERROR_TTL секунд"""
+        cached = self._references_cache.get(key)
+        if not cached or cached[1] is not future:
+            return
+        if future.cancelled():
+            del self._references_cache[key]
+        elif future.exception() is not None:
+            self._references_cache[key] = (time.monotonic() + REFERENCES_ERROR_TTL, future)
+    
+    async def _fetch_references(self, ref_type: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Запрос справочника к TourVisor API"""
         params = {
             "type": ref_type,
             "format": "json",
@@ -852,32 +1042,32 @@ class TourVisorClient:
         }
         
         # Добавляем детальное логирование
-        logger.info(f"🔍 Актуализация тура {tour_id} с параметрами: {params}")
+        logger.info("🔍 Актуализация тура %s с параметрами: %s", tour_id, params)
         
         try:
             result = await self._make_request("actualize.php", params)
             
             # Логируем результат запроса
-            logger.info(f"📊 Результат актуализации для {tour_id}:")
-            logger.info(f"   - Размер ответа: {len(str(result))} символов")
-            logger.info(f"   - Ключи в ответе: {list(result.keys()) if isinstance(result, dict) else 'не словарь'}")
+            logger.info("📊 Результат актуализации для %s:", tour_id)
+            logger.info("   - Размер ответа: %s символов", len(str(result)))
+            logger.info("   - Ключи в ответе: %s", list(result.keys()) if isinstance(result, dict) else 'не словарь')
             
             if isinstance(result, dict):
                 if "tour" in result:
                     tour_data = result["tour"]
-                    logger.info(f"   - Данные тура: {len(str(tour_data))} символов")
+                    logger.info("   - Данные тура: %s символов", len(str(tour_data)))
                     if isinstance(tour_data, dict):
-                        logger.info(f"   - Ключи тура: {list(tour_data.keys())}")
+                        logger.info("   - Ключи тура: %s", list(tour_data.keys()))
                     else:
-                        logger.info(f"   - Тип данных тура: {type(tour_data)}")
+                        logger.info("   - Тип данных тура: %s", type(tour_data))
                 
                 if "error" in result:
-                    logger.warning(f"⚠️ Ошибка в ответе TourVisor: {result['error']}")
+                    logger.warning("⚠️ Ошибка в ответе TourVisor: %s", result['error'])
             
             return result
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при актуализации тура {tour_id}: {e}")
+            logger.error("❌ Ошибка при актуализации тура %s: %s", tour_id, e)
             raise
 
     async def get_detailed_actualization(self, tour_id: str) -> Dict[str, Any]:
@@ -889,6 +1079,16 @@ class TourVisorClient:
         
         return await self._make_request("actdetail.php", params)
     
+    async def ping(self) -> bool:
+        """
+        Быстрая проверка доступности API: один запрос справочника городов вылета
+
+        В отличие от get_references, без кэша в памяти и без повторных попыток -
+        для health-проверок, которым нужно текущее состояние API
+        """
+        result = await self._make_request("list.php", {"type": "departure", "format": "json"})
+        return bool(result)
+    
     async def test_connection(self) -> Dict[str, Any]:
         """Тестирование подключения к API"""
         try:
@@ -903,7 +1103,7 @@ class TourVisorClient:
                     departures = result["departure"]
                     departures_count = len(departures) if isinstance(departures, list) else 1
                 
-                logger.info(f"✅ Подключение успешно, городов вылета: {departures_count}")
+                logger.info("✅ Подключение успешно, городов вылета: %s", departures_count)
                 return {
                     "success": True,
                     "message": "Подключение к TourVisor API работает",
@@ -917,7 +1117,7 @@ class TourVisorClient:
                 }
                 
         except Exception as e:
-            logger.error(f"❌ Ошибка подключения к TourVisor API: {e}")
+            logger.error("❌ Ошибка подключения к TourVisor API: %s", e)
             return {
                 "success": False,
                 "message": f"Ошибка подключения: {str(e)}"
@@ -932,28 +1132,27 @@ class TourVisorClient:
                 "format": "xml"
             }
             
-            session = await self.get_session()
             full_params = {**self.auth_params, **params}
             url = f"{self.base_url}/result.php"
             
-            async with session.get(url, params=full_params) as response:
+            async with self._get(url, full_params) as response:
                 response_text = await response.text()
                 
-                logger.info(f"🔍 Сырой XML ответ для {request_id}:")
-                logger.info(f"📄 Длина: {len(response_text)} символов")
-                logger.info(f"📄 Содержимое: {response_text[:500]}...")
+                logger.info("🔍 Сырой XML ответ для %s:", request_id)
+                logger.info("📄 Длина: %s символов", len(response_text))
+                logger.info("📄 Содержимое: %s...", response_text[:500])
                 
                 # Пробуем распарсить
                 try:
                     parsed = self._parse_xml(response_text)
-                    logger.info(f"📊 Парсированная структура: {parsed}")
+                    logger.info("📊 Парсированная структура: %s", parsed)
                     return {
                         "raw_text": response_text,
                         "parsed": parsed,
                         "length": len(response_text)
                     }
                 except Exception as parse_error:
-                    logger.error(f"❌ Ошибка парсинга: {parse_error}")
+                    logger.error("❌ Ошибка парсинга: %s", parse_error)
                     return {
                         "raw_text": response_text,
                         "parse_error": str(parse_error),
@@ -961,7 +1160,7 @@ class TourVisorClient:
                     }
                     
         except Exception as e:
-            logger.error(f"❌ Ошибка получения сырого ответа: {e}")
+            logger.error("❌ Ошибка получения сырого ответа: %s", e)
             raise
     
     async def debug_search_step_by_step(self, search_params: Dict[str, Any]) -> Dict[str, Any]:
@@ -992,7 +1191,6 @@ class TourVisorClient:
                 raise
             
             # Шаг 2: Подготовка запроса
-            session = await self.get_session()
             full_params = {**self.auth_params, **validated_params}
             url = f"{self.base_url}/search.php"
             
@@ -1004,7 +1202,7 @@ class TourVisorClient:
             })
             
             # Шаг 3: Выполнение запроса
-            async with session.get(url, params=full_params) as response:
+            async with self._get(url, full_params) as response:
                 response_text = await response.text()
                 
                 debug_info["steps"].append({
@@ -1058,32 +1256,32 @@ class TourVisorClient:
             
             # Полный URL для отладки
             full_url = f"{self.base_url}/hotel.php"
-            logger.info(f"🏨 Запрос к URL: {full_url}")
-            logger.info(f"🏨 Параметры: {params}")
+            logger.info("🏨 Запрос к URL: %s", full_url)
+            safe_params = {k: v for k, v in params.items() if k != "authpass"}
+            logger.info("🏨 Параметры: %s", safe_params)
             
-            timeout = aiohttp.ClientTimeout(total=self.request_timeout)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(full_url, params=params) as response:
-                    response_text = await response.text()
-                    logger.info(f"📝 Статус ответа: {response.status}")
-                    logger.info(f"📝 Заголовки ответа: {dict(response.headers)}")
-                    logger.info(f"📝 Тело ответа (первые 500 символов): {response_text[:500]}")
-                    
-                    if response.status == 200:
-                        try:
-                            data = await response.json()
-                            logger.info(f"✅ Получена информация об отеле {hotel_code}")
-                            return data
-                        except:
-                            # Если не JSON, возвращаем как есть
-                            logger.warning(f"⚠️ Ответ не является JSON, возвращаем текст")
-                            return {"raw_response": response_text}
-                    else:
-                        logger.error(f"❌ Ошибка получения информации об отеле {hotel_code}: {response.status}")
-                        return {"error": f"HTTP {response.status}", "response": response_text}
-                            
+            # Общая сессия клиента (соединения переиспользуются) и общий лимит запросов
+            async with self._get(full_url, params) as response:
+                response_text = await response.text()
+                logger.info("📝 Статус ответа: %s", response.status)
+                logger.info("📝 Заголовки ответа: %s", dict(response.headers))
+                logger.info("📝 Тело ответа (первые 500 символов): %s", response_text[:500])
+                
+                if response.status == 200:
+                    try:
+                        data = await response.json()
+                        logger.info("✅ Получена информация об отеле %s", hotel_code)
+                        return data
+                    except:
+                        # Если не JSON, возвращаем как есть
+                        logger.warning("⚠️ Ответ не является JSON, возвращаем текст")
+                        return {"raw_response": response_text}
+                else:
+                    logger.error("❌ Ошибка получения информации об отеле %s: %s", hotel_code, response.status)
+                    return {"error": f"HTTP {response.status}", "response": response_text}
+                        
         except Exception as e:
-            logger.error(f"❌ Ошибка запроса информации об отеле {hotel_code}: {e}")
+            logger.error("❌ Ошибка запроса информации об отеле %s: %s", hotel_code, e)
             raise
 # Синглтон клиента
 tourvisor_client = TourVisorClient()
\ No newline at end of file
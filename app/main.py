@@ -1,22 +1,34 @@
 # app/main.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import asyncio
-from datetime import datetime
+import orjson
 
 from app.config import settings
 from app.api.v1 import tours, hotels, references, applications, sitemap
 from app.api.websockets import websocket_manager
+from app.core.tourvisor_client import tourvisor_client
+from app.services.cache_service import cache_service
 from app.tasks.cache_warmup import warm_up_cache
 from app.tasks.random_tours_update import update_random_tours
 from app.tasks.mass_directions_update import periodic_directions_update, initial_directions_collection
 # Импорт автообновления кэша направлений
-from app.tasks.directions_cache_update import start_directions_cache_update_task, stop_directions_cache_update_task
+from app.tasks.directions_cache_update import (
+    directions_cache_update_service, start_directions_cache_update_task, stop_directions_cache_update_task
+)
 # НОВОЕ: Импорт автообновления кэша случайных туров
-from app.tasks.random_tours_cache_update import start_random_tours_cache_update_task, stop_random_tours_cache_update_task
+from app.tasks.random_tours_cache_update import (
+    random_tours_cache_update_service, start_random_tours_cache_update_task, stop_random_tours_cache_update_task
+)
+from app.utils.compression import GZIP_MINIMUM_SIZE, PrecompressedBody
+from app.utils.dates import now_iso
+from app.utils.exceptions import unhandled_exception_handler
 from app.utils.logger import setup_logger
+from app.utils.singleflight import CachedFlight
 from fastapi.staticfiles import StaticFiles
 import os
 
@@ -33,6 +45,14 @@ mass_directions_task = None
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
     logger.info("🚀 Запуск приложения...")
+    logger.info("🔁 Event loop: %s", type(asyncio.get_running_loop()).__name__)
+    
+    # OpenAPI-схема собирается один раз при старте, а не на первом запросе /docs
+    app.openapi()
+    
+    # Общая HTTP-сессия TourVisor создается до фоновых задач и первых запросов,
+    # которые иначе создавали бы ее в момент обращения
+    await tourvisor_client.get_session()
     
     logger.info("🔧 Запуск фоновых задач...")
     
@@ -127,15 +147,24 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.error(f"❌ Ошибка остановки задачи {task_name}: {e}")
     
+    # Закрываем общую HTTP-сессию TourVisor
+    try:
+        await tourvisor_client.close()
+    except Exception as e:
+        logger.error(f"❌ Ошибка закрытия сессии TourVisor: {e}")
+    
     logger.info("✅ Приложение остановлено")
 
 app = FastAPI(
     title="Travel Agency Backend",
     description="Backend для турагентства с полным автообновлением кэша направлений и случайных туров",
     version="2.2.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+app.add_exception_handler(Exception, unhandled_exception_handler)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -145,6 +174,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Сжатие JSON ответов (списки туров, направлений и отелей хорошо сжимаются)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=5)
+
 # API routes
 app.include_router(tours.router, prefix="/backend/v1/tours", tags=["tours"])
 app.include_router(hotels.router, prefix="/backend/v1/hotels", tags=["hotels"])
@@ -176,266 +208,306 @@ app.include_router(
     tags=["Random Tours Cache Management"]
 )
 
+def _encode_static_json(content: dict) -> bytes:
+    """Сериализация статического ответа так же, как это делает ORJSONResponse"""
+    return orjson.dumps(content)
+
+# Статические ответы можно кэшировать на клиенте и в прокси
+STATIC_CACHE_CONTROL = "public, max-age=300"
+
+def _static_json_response(request: Request, body: PrecompressedBody) -> Response:
+    """Статический JSON-ответ с поддержкой условного запроса (If-None-Match -> 304)"""
+    return body.response(request, headers={"Cache-Control": STATIC_CACHE_CONTROL})
+
 # WebSocket endpoint
 @app.websocket("/ws/tours/{request_id}")
 async def websocket_tours(websocket: WebSocket, request_id: str):
     await websocket_manager.connect(websocket, request_id)
 
+# Статические ответы сериализуются один раз при импорте
+ROOT_INFO = {
+    "message": "Alexandra Travel Agency Backend API", 
+    "version": "2.2.0",
+    "features": [
+        "Массовый сбор направлений из всех стран",
+        "Автоматическое обновление кэша направлений каждые 24 часа",
+        "Автоматическое обновление кэша случайных туров каждые 12 часов с hoteltypes фильтрацией",
+        "Долгосрочное кэширование (30 дней)",
+        "Автоматическое обновление направлений",
+        "Real-time поиск туров через WebSocket",
+        "Случайные туры с фильтрацией по типам отелей через TourVisor API",
+        "Система заявок с email уведомлениями",
+        "API управления всеми видами кэша"
+    ],
+    "cache_management": {
+        "directions": {
+            "auto_update": "каждые 24 часа",
+            "status": "/backend/v1/directions/cache/status",
+            "force_update": "/backend/v1/directions/cache/force-update",
+            "health_check": "/backend/v1/directions/cache/health"
+        },
+        "random_tours": {
+            "auto_update": "каждые 12 часов", 
+            "status": "/backend/v1/random-tours/cache/status",
+            "force_update": "/backend/v1/random-tours/cache/force-update",
+            "health_check": "/backend/v1/random-tours/cache/health",
+            "hotel_types": "/backend/v1/random-tours/cache/hotel-types",
+            "api_integration": "TourVisor hoteltypes фильтрация"
+        }
+    }
+}
+ROOT_INFO_BODY = PrecompressedBody(_encode_static_json(ROOT_INFO))
+
 # ИСПРАВЛЕНО: Используем @app.get вместо @router.get
 @app.get("/")
-async def root():
+async def root(request: Request):
+    return _static_json_response(request, ROOT_INFO_BODY)
+
+# Таймаут одной проверки компонента в /health
+HEALTH_PROBE_TIMEOUT = 2.0
+# Свой таймаут TourVisor короче общего: медленный API - degraded, а не unhealthy по общему таймауту
+TOURVISOR_PROBE_TIMEOUT = 1.5
+HEALTH_STATUS_TTL = 5
+_health_status_flights = CachedFlight(ttl=HEALTH_STATUS_TTL)
+
+async def _probe_cache() -> dict:
+    """Проверка кэша: запись, чтение и удаление тестового ключа"""
+    roundtrip_ok = await cache_service.check_roundtrip("health_check")
+    
+    return {"status": "healthy" if roundtrip_ok else "degraded"}
+
+async def _probe_tourvisor() -> dict:
+    """Доступность TourVisor API: запрос без кэша клиента и повторных попыток
+
+    Без TourVisor сервис продолжает отдавать данные из кэша, поэтому ошибка
+    или медленный ответ - degraded, а не unhealthy
+    """
+    try:
+        available = await asyncio.wait_for(tourvisor_client.ping(), timeout=TOURVISOR_PROBE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": "degraded", "error": f"timeout after {TOURVISOR_PROBE_TIMEOUT}s"}
+    except Exception as e:
+        return {"status": "degraded", "error": str(e)}
+    
+    return {"status": "healthy" if available else "degraded"}
+
+async def _probe_directions() -> dict:
+    """Состояние мастер-кэша направлений"""
+    from app.services.mass_directions_collector import mass_directions_collector
+    
+    directions_status = await mass_directions_collector.get_collection_status()
+    master_cache = directions_status.get("master_cache", {})
+    
     return {
-        "message": "Alexandra Travel Agency Backend API", 
-        "version": "2.2.0",
-        "features": [
-            "Массовый сбор направлений из всех стран",
-            "Автоматическое обновление кэша направлений каждые 24 часа",
-            "Автоматическое обновление кэша случайных туров каждые 12 часов с hoteltypes фильтрацией",
-            "Долгосрочное кэширование (30 дней)",
-            "Автоматическое обновление направлений",
-            "Real-time поиск туров через WebSocket",
-            "Случайные туры с фильтрацией по типам отелей через TourVisor API",
-            "Система заявок с email уведомлениями",
-            "API управления всеми видами кэша"
-        ],
-        "cache_management": {
-            "directions": {
-                "auto_update": "каждые 24 часа",
-                "status": "/backend/v1/directions/cache/status",
-                "force_update": "/backend/v1/directions/cache/force-update",
-                "health_check": "/backend/v1/directions/cache/health"
-            },
-            "random_tours": {
-                "auto_update": "каждые 12 часов", 
-                "status": "/backend/v1/random-tours/cache/status",
-                "force_update": "/backend/v1/random-tours/cache/force-update",
-                "health_check": "/backend/v1/random-tours/cache/health",
-                "hotel_types": "/backend/v1/random-tours/cache/hotel-types",
-                "api_integration": "TourVisor hoteltypes фильтрация"
-            }
-        }
+        "status": "healthy" if master_cache.get("exists") else "needs_initialization",
+        "directions_count": master_cache.get("directions_count", 0),
+        "last_collection": master_cache.get("last_collection")
     }
 
+async def _probe_directions_cache_auto_update() -> dict:
+    """Состояние автообновления кэша направлений"""
+    directions_cache_status = await directions_cache_update_service.get_update_status()
+    
+    return {
+        "status": "running" if directions_cache_status.get("is_running") else "stopped",
+        "last_update": directions_cache_status.get("last_update"),
+        "scheduler_running": directions_cache_status.get("is_running", False)
+    }
+
+async def _probe_random_tours_cache_auto_update() -> dict:
+    """Состояние автообновления кэша случайных туров"""
+    random_tours_cache_status = await random_tours_cache_update_service.get_update_status()
+    
+    return {
+        "status": "running" if random_tours_cache_status.get("is_running") else "stopped",
+        "last_update": random_tours_cache_status.get("last_update"),
+        "current_hotel_type": random_tours_cache_status.get("current_hotel_type"),
+        "scheduler_running": random_tours_cache_status.get("is_running", False),
+        "supported_hotel_types": len(random_tours_cache_status.get("hotel_types_supported", []))
+    }
+
+HEALTH_PROBES = {
+    "cache": _probe_cache,
+    "tourvisor": _probe_tourvisor,
+    "directions": _probe_directions,
+    "directions_cache_auto_update": _probe_directions_cache_auto_update,
+    "random_tours_cache_auto_update": _probe_random_tours_cache_auto_update,
+}
+
+async def _collect_health_status() -> dict:
+    """Опрос всех компонентов и итоговый статус системы"""
+    health_status = {
+        "status": "healthy",
+        "timestamp": now_iso(),
+        "components": {}
+    }
+    
+    # Компоненты независимы - проверяем параллельно, зависший не тормозит остальные
+    results = await asyncio.gather(
+        *(asyncio.wait_for(probe(), timeout=HEALTH_PROBE_TIMEOUT) for probe in HEALTH_PROBES.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(HEALTH_PROBES, results):
+        if isinstance(result, asyncio.TimeoutError):
+            result = {"status": "unhealthy", "error": f"timeout after {HEALTH_PROBE_TIMEOUT}s"}
+        elif isinstance(result, Exception):
+            result = {"status": "unhealthy", "error": str(result)}
+        health_status["components"][name] = result
+    
+    # Определяем общий статус
+    component_statuses = [comp["status"] for comp in health_status["components"].values()]
+    if all(s in ["healthy", "needs_initialization", "running"] for s in component_statuses):
+        health_status["status"] = "healthy"
+    elif any(s == "unhealthy" for s in component_statuses):
+        health_status["status"] = "unhealthy"
+    else:
+        health_status["status"] = "degraded"
+    
+    return health_status
+
 @app.get("/health")
 async def health_check():
     """Расширенная проверка здоровья системы с обеими системами кэширования"""
     try:
-        from app.services.mass_directions_collector import mass_directions_collector
-        from app.services.cache_service import cache_service
-        from app.tasks.directions_cache_update import directions_cache_update_service
-        # НОВОЕ: Импорт сервиса автообновления случайных туров
-        from app.tasks.random_tours_cache_update import random_tours_cache_update_service
+        # Мониторинг опрашивает часто - компоненты проверяем не чаще раза в HEALTH_STATUS_TTL
+        health_status = await _health_status_flights.do("health", _collect_health_status)
         
-        health_status = {
-            "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
-            "components": {}
-        }
-        
-        # Проверяем кэш
-        try:
-            await cache_service.set("health_check", "test", ttl=60)
-            test_value = await cache_service.get("health_check")
-            await cache_service.delete("health_check")
-            
-            health_status["components"]["cache"] = {
-                "status": "healthy" if test_value == "test" else "degraded"
-            }
-        except Exception as e:
-            health_status["components"]["cache"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        
-        # Проверяем состояние направлений
-        try:
-            directions_status = await mass_directions_collector.get_collection_status()
-            master_cache = directions_status.get("master_cache", {})
-            
-            health_status["components"]["directions"] = {
-                "status": "healthy" if master_cache.get("exists") else "needs_initialization",
-                "directions_count": master_cache.get("directions_count", 0),
-                "last_collection": master_cache.get("last_collection")
-            }
-        except Exception as e:
-            health_status["components"]["directions"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        
-        # Проверяем состояние автообновления кэша направлений
-        try:
-            directions_cache_status = await directions_cache_update_service.get_update_status()
-            
-            health_status["components"]["directions_cache_auto_update"] = {
-                "status": "running" if directions_cache_status.get("is_running") else "stopped",
-                "last_update": directions_cache_status.get("last_update"),
-                "scheduler_running": directions_cache_status.get("is_running", False)
-            }
-        except Exception as e:
-            health_status["components"]["directions_cache_auto_update"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        
-        # НОВОЕ: Проверяем состояние автообновления кэша случайных туров
-        try:
-            random_tours_cache_status = await random_tours_cache_update_service.get_update_status()
-            
-            health_status["components"]["random_tours_cache_auto_update"] = {
-                "status": "running" if random_tours_cache_status.get("is_running") else "stopped",
-                "last_update": random_tours_cache_status.get("last_update"),
-                "current_hotel_type": random_tours_cache_status.get("current_hotel_type"),
-                "scheduler_running": random_tours_cache_status.get("is_running", False),
-                "supported_hotel_types": len(random_tours_cache_status.get("hotel_types_supported", []))
-            }
-        except Exception as e:
-            health_status["components"]["random_tours_cache_auto_update"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        
-        # Определяем общий статус
-        component_statuses = [comp["status"] for comp in health_status["components"].values()]
-        if all(s in ["healthy", "needs_initialization", "running"] for s in component_statuses):
-            health_status["status"] = "healthy"
-        elif any(s == "unhealthy" for s in component_statuses):
-            health_status["status"] = "unhealthy"
-        else:
-            health_status["status"] = "degraded"
-        
-        return health_status
+        # Ответ собирается из простых типов - сериализуем один раз, без jsonable_encoder
+        return Response(content=orjson.dumps(health_status, default=str), media_type="application/json")
         
     except Exception as e:
         return {
             "status": "unhealthy",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
-@app.get("/system-info")
-async def get_system_info():
-    """Информация о системе и её возможностях"""
-    return {
-        "application": {
-            "name": "Travel Agency Backend",
-            "version": "2.2.0",
-            "description": "Backend для турагентства с полным автообновлением кэша направлений и случайных туров"
+SYSTEM_INFO = {
+    "application": {
+        "name": "Travel Agency Backend",
+        "version": "2.2.0",
+        "description": "Backend для турагентства с полным автообновлением кэша направлений и случайных туров"
+    },
+    "features": {
+        "mass_directions_collection": {
+            "description": "Массовый сбор направлений из всех доступных стран",
+            "cache_duration": "30 дней",
+            "automatic_updates": True,
+            "real_photos": True,
+            "price_calculation": True
         },
-        "features": {
-            "mass_directions_collection": {
-                "description": "Массовый сбор направлений из всех доступных стран",
-                "cache_duration": "30 дней",
-                "automatic_updates": True,
-                "real_photos": True,
-                "price_calculation": True
-            },
-            "auto_directions_cache": {
-                "description": "Автоматическое обновление кэша направлений каждые 24 часа",
-                "interval": "24 часа",
-                "batch_processing": True,
-                "quality_control": True,
-                "retry_mechanism": True,
-                "api_management": True,
-                "monitoring": True
-            },
-            "auto_random_tours_cache": {
-                "description": "Автоматическое обновление кэша случайных туров с hoteltypes фильтрацией",
-                "interval": "12 часов",
-                "hotel_types": ["любой", "активный", "релакс", "семейный", "оздоровительный", "городской", "пляжный", "делюкс"],
-                "api_integration": "TourVisor hoteltypes поле",
-                "tours_per_type": 8,
-                "generation_strategies": ["search", "hot_tours", "mock"],
-                "quality_tracking": True,
-                "api_management": True
-            },
-            "real_time_search": {
-                "description": "Real-time поиск туров через WebSocket",
-                "progress_tracking": True,
-                "continue_search": True
-            },
-            "applications_system": {
-                "description": "Система приема и обработки заявок",
-                "email_notifications": True,
-                "storage_duration": "30 дней"
+        "auto_directions_cache": {
+            "description": "Автоматическое обновление кэша направлений каждые 24 часа",
+            "interval": "24 часа",
+            "batch_processing": True,
+            "quality_control": True,
+            "retry_mechanism": True,
+            "api_management": True,
+            "monitoring": True
+        },
+        "auto_random_tours_cache": {
+            "description": "Автоматическое обновление кэша случайных туров с hoteltypes фильтрацией",
+            "interval": "12 часов",
+            "hotel_types": ["любой", "активный", "релакс", "семейный", "оздоровительный", "городской", "пляжный", "делюкс"],
+            "api_integration": "TourVisor hoteltypes поле",
+            "tours_per_type": 8,
+            "generation_strategies": ["search", "hot_tours", "mock"],
+            "quality_tracking": True,
+            "api_management": True
+        },
+        "real_time_search": {
+            "description": "Real-time поиск туров через WebSocket",
+            "progress_tracking": True,
+            "continue_search": True
+        },
+        "applications_system": {
+            "description": "Система приема и обработки заявок",
+            "email_notifications": True,
+            "storage_duration": "30 дней"
+        }
+    },
+    "endpoints": {
+        "directions": {
+            "get": "/backend/v1/tours/directions",
+            "collect_all": "/backend/v1/tours/directions/collect-all",
+            "status": "/backend/v1/tours/directions/status",
+            "refresh": "/backend/v1/tours/directions/refresh",
+            "new_service": {
+                "by_country": "/backend/v1/directions/country/{country_id}",
+                "flat_format": "/backend/v1/directions/country/{country_id}/flat",
+                "quick_mode": "/backend/v1/directions/country/{country_id}/quick",
+                "countries_list": "/backend/v1/directions/countries/list"
             }
         },
-        "endpoints": {
+        "cache_management": {
             "directions": {
-                "get": "/backend/v1/tours/directions",
-                "collect_all": "/backend/v1/tours/directions/collect-all",
-                "status": "/backend/v1/tours/directions/status",
-                "refresh": "/backend/v1/tours/directions/refresh",
-                "new_service": {
-                    "by_country": "/backend/v1/directions/country/{country_id}",
-                    "flat_format": "/backend/v1/directions/country/{country_id}/flat",
-                    "quick_mode": "/backend/v1/directions/country/{country_id}/quick",
-                    "countries_list": "/backend/v1/directions/countries/list"
-                }
-            },
-            "cache_management": {
-                "directions": {
-                    "status": "/backend/v1/directions/cache/status",
-                    "detailed_stats": "/backend/v1/directions/cache/stats",
-                    "health_check": "/backend/v1/directions/cache/health",
-                    "force_update": "/backend/v1/directions/cache/force-update",
-                    "scheduler": {
-                        "start": "/backend/v1/directions/cache/scheduler/start",
-                        "stop": "/backend/v1/directions/cache/scheduler/stop"
-                    }
-                },
-                "random_tours": {
-                    "status": "/backend/v1/random-tours/cache/status",
-                    "detailed_stats": "/backend/v1/random-tours/cache/stats", 
-                    "health_check": "/backend/v1/random-tours/cache/health",
-                    "force_update": "/backend/v1/random-tours/cache/force-update",
-                    "clear_cache": "/backend/v1/random-tours/cache/clear",
-                    "hotel_types": "/backend/v1/random-tours/cache/hotel-types",
-                    "generate_specific": "/backend/v1/random-tours/cache/generate/{hotel_type}",
-                    "preview": "/backend/v1/random-tours/cache/preview/{hotel_type}",
-                    "compare_strategies": "/backend/v1/random-tours/cache/compare-strategies/{hotel_type}",
-                    "scheduler": {
-                        "start": "/backend/v1/random-tours/cache/scheduler/start",
-                        "stop": "/backend/v1/random-tours/cache/scheduler/stop"
-                    }
+                "status": "/backend/v1/directions/cache/status",
+                "detailed_stats": "/backend/v1/directions/cache/stats",
+                "health_check": "/backend/v1/directions/cache/health",
+                "force_update": "/backend/v1/directions/cache/force-update",
+                "scheduler": {
+                    "start": "/backend/v1/directions/cache/scheduler/start",
+                    "stop": "/backend/v1/directions/cache/scheduler/stop"
                 }
             },
             "random_tours": {
-                "get": "/backend/v1/tours/random",
-                "post": "/backend/v1/tours/random",
-                "generate": "/backend/v1/tours/random/generate"
-            },
-            "search": {
-                "start": "/backend/v1/tours/search",
-                "status": "/backend/v1/tours/search/{id}/status",
-                "results": "/backend/v1/tours/search/{id}/results",
-                "websocket": "/ws/tours/{id}"
+                "status": "/backend/v1/random-tours/cache/status",
+                "detailed_stats": "/backend/v1/random-tours/cache/stats", 
+                "health_check": "/backend/v1/random-tours/cache/health",
+                "force_update": "/backend/v1/random-tours/cache/force-update",
+                "clear_cache": "/backend/v1/random-tours/cache/clear",
+                "hotel_types": "/backend/v1/random-tours/cache/hotel-types",
+                "generate_specific": "/backend/v1/random-tours/cache/generate/{hotel_type}",
+                "preview": "/backend/v1/random-tours/cache/preview/{hotel_type}",
+                "compare_strategies": "/backend/v1/random-tours/cache/compare-strategies/{hotel_type}",
+                "scheduler": {
+                    "start": "/backend/v1/random-tours/cache/scheduler/start",
+                    "stop": "/backend/v1/random-tours/cache/scheduler/stop"
+                }
             }
         },
-        "background_tasks": {
-            "directions_auto_cache": "Автоматическое обновление кэша направлений каждые 24 часа",
-            "random_tours_auto_cache": "Автоматическое обновление кэша случайных туров каждые 12 часов с hoteltypes API",
-            "directions_update": "Ежедневная проверка и обновление направлений", 
-            "random_tours_update": "Ежедневное обновление случайных туров (совместимость)", 
-            "cache_warmup": "Периодический прогрев кэша"
+        "random_tours": {
+            "get": "/backend/v1/tours/random",
+            "post": "/backend/v1/tours/random",
+            "generate": "/backend/v1/tours/random/generate"
         },
-        "configuration": {
-            "directions_cache": {
-                "update_interval": "24 часа (CACHE_UPDATE_INTERVAL_HOURS)",
-                "batch_size": "3 страны (CACHE_UPDATE_BATCH_SIZE)",
-                "search_timeout": "120 секунд (CACHE_SEARCH_TIMEOUT)",
-                "auto_start": "Включен (CACHE_AUTO_START)"
-            },
-            "random_tours_cache": {
-                "update_interval": "12 часов (RANDOM_TOURS_UPDATE_INTERVAL_HOURS)",
-                "tours_per_type": "8 туров (RANDOM_TOURS_PER_TYPE)",
-                "strategies": "search,hot_tours,mock (RANDOM_TOURS_STRATEGIES)",
-                "countries": "1,2,4,9,8 (RANDOM_TOURS_COUNTRIES)",
-                "hotel_types": "8 типов с hoteltypes API фильтрацией",
-                "auto_start": "Включен (RANDOM_TOURS_AUTO_START)"
-            }
+        "search": {
+            "start": "/backend/v1/tours/search",
+            "status": "/backend/v1/tours/search/{id}/status",
+            "results": "/backend/v1/tours/search/{id}/results",
+            "websocket": "/ws/tours/{id}"
+        }
+    },
+    "background_tasks": {
+        "directions_auto_cache": "Автоматическое обновление кэша направлений каждые 24 часа",
+        "random_tours_auto_cache": "Автоматическое обновление кэша случайных туров каждые 12 часов с hoteltypes API",
+        "directions_update": "Ежедневная проверка и обновление направлений", 
+        "random_tours_update": "Ежедневное обновление случайных туров (совместимость)", 
+        "cache_warmup": "Периодический прогрев кэша"
+    },
+    "configuration": {
+        "directions_cache": {
+            "update_interval": "24 часа (CACHE_UPDATE_INTERVAL_HOURS)",
+            "batch_size": "3 страны (CACHE_UPDATE_BATCH_SIZE)",
+            "search_timeout": "120 секунд (CACHE_SEARCH_TIMEOUT)",
+            "auto_start": "Включен (CACHE_AUTO_START)"
+        },
+        "random_tours_cache": {
+            "update_interval": "12 часов (RANDOM_TOURS_UPDATE_INTERVAL_HOURS)",
+            "tours_per_type": "8 туров (RANDOM_TOURS_PER_TYPE)",
+            "strategies": "search,hot_tours,mock (RANDOM_TOURS_STRATEGIES)",
+            "countries": "1,2,4,9,8 (RANDOM_TOURS_COUNTRIES)",
+            "hotel_types": "8 типов с hoteltypes API фильтрацией",
+            "auto_start": "Включен (RANDOM_TOURS_AUTO_START)"
         }
     }
+}
+SYSTEM_INFO_BODY = PrecompressedBody(_encode_static_json(SYSTEM_INFO))
+
+@app.get("/system-info")
+async def get_system_info(request: Request):
+    """Информация о системе и её возможностях"""
+    return _static_json_response(request, SYSTEM_INFO_BODY)
 
 # Статические файлы
 static_path = os.path.join(os.path.dirname(__file__), "services", "mockup_images")
@@ -451,9 +523,13 @@ else:
 if __name__ == "__main__":
     import uvicorn
     
+    # auto: uvloop и httptools, если установлены (uvicorn[standard]), как в Dockerfile;
+    # на Windows, где uvloop нет, - стандартный asyncio
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="auto",
+        http="auto",
         reload=True
     )
\ No newline at end of file
@@ -381,16 +381,8 @@ class CityDirectionsService:
     async def clear_cities_cache(self) -> int:
         """Очистка кэша направлений по городам"""
         try:
-            # Получаем все ключи кэша для городов
-            pattern = "city_directions_*"
-            # В зависимости от реализации cache_service, может потребоваться другой метод
-            
-            # Пример очистки (нужно адаптировать под ваш cache_service)
-            cleared_count = 0
-            for country_id in range(1, 50):  # Примерный диапазон ID стран
-                cache_key = f"city_directions_{country_id}"
-                if await self.cache.delete(cache_key):
-                    cleared_count += 1
+            # Все ключи кэша для городов удаляются пакетами, а не запросом на каждую страну
+            cleared_count = await self.cache.delete_pattern("city_directions_*")
             
             logger.info(f"🧹 Очищено {cleared_count} записей кэша направлений по городам")
             
@@ -414,9 +406,11 @@ class CityDirectionsService:
             
             # Проверяем какие страны есть в кэше
             cached_countries = []
-            for country_id in [47, 4, 2, 9, 1, 8, 13, 12, 46, 10, 3, 16, 40]:  # Страны из бара сайта
-                cache_key = f"city_directions_{country_id}"
-                cached_data = await self.cache.get(cache_key)
+            country_ids = [47, 4, 2, 9, 1, 8, 13, 12, 46, 10, 3, 16, 40]  # Страны из бара сайта
+            # Кэши всех стран читаем из Redis одним пакетным запросом
+            cached_by_key = await self.cache.get_multiple([f"city_directions_{country_id}" for country_id in country_ids])
+            for country_id in country_ids:
+                cached_data = cached_by_key.get(f"city_directions_{country_id}")
                 if cached_data:
                     country_name = await self._get_country_name(country_id)
                     cached_countries.append({
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from enum import Enum
 
 # import validator from pydantic
 from pydantic import field_validator
@@ -107,7 +108,7 @@ class HotelInfo(BaseModel):
     hotelrating: float
     hoteldescription: Optional[str] = None
     fulldesclink: Optional[str] = None
-    reviewlink: Union[str, Dict[str, Any], List[Any], int] = Field(None, description="Link to reviews")
+    reviewlink: Optional[Union[str, Dict[str, Any], List[Any], int]] = Field(None, description="Link to reviews")
     picturelink: Optional[str] = None
     isphoto: Optional[int] = None
     iscoords: Optional[int] = None
@@ -130,14 +131,33 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     request_id: str
 
+class HotelTypeEnum(str, Enum):
+    """Типы отелей, которые понимает фильтр hoteltypes TourVisor"""
+    active = "active"
+    relax = "relax"
+    family = "family"
+    health = "health"
+    city = "city"
+    beach = "beach"
+    deluxe = "deluxe"
+
+VALID_HOTEL_TYPES = frozenset(hotel_type.value for hotel_type in HotelTypeEnum)
+
+# Строка "beach,relax" из query-параметра: только известные типы через запятую;
+# пустое значение и пустые элементы ("beach,") допустимы - их отбрасывает разбор
+_HOTEL_TYPE_ALTERNATIVES = "|".join(hotel_type.value for hotel_type in HotelTypeEnum)
+HOTEL_TYPES_QUERY_PATTERN = rf"^\s*({_HOTEL_TYPE_ALTERNATIVES})?\s*(,\s*({_HOTEL_TYPE_ALTERNATIVES})?\s*)*$"
+
 class RandomTourRequest(BaseModel):
     count: int = Field(6, ge=1, le=20, description="Количество случайных туров")
-    hotel_types: Optional[List[str]] = Field(
+    hotel_types: Optional[List[HotelTypeEnum]] = Field(
         None, 
         description="Типы отелей для фильтрации: active, relax, family, health, city, beach, deluxe"
     )
     
     class Config:
+        # Сервисы и ключи кэша работают со строковыми значениями типов
+        use_enum_values = True
         schema_extra = {
             "example": {
                 "count": 6,
@@ -214,6 +234,19 @@ class DetailedTourInfo(BaseModel):
     flights: List[FlightInfo] = Field(..., description="Информация о рейсах")
     tourinfo: Optional[TourContent] = Field(None, description="Дополнительная информация")
 
+# Максимум туров в одном пакетном запросе
+TOUR_BATCH_MAX_SIZE = 20
+
+class BatchTourRequest(BaseModel):
+    """Пакетное получение туров по ID"""
+    ids: List[str] = Field(..., min_length=1, max_length=TOUR_BATCH_MAX_SIZE, description="ID туров")
+
+class BatchActualizationRequest(BaseModel):
+    """Пакетная актуализация туров"""
+    tours: List[TourActualizationRequest] = Field(
+        ..., min_length=1, max_length=TOUR_BATCH_MAX_SIZE, description="Запросы актуализации"
+    )
+
 # app/models/tour.py - добавить эти модели
 
 class SpecificTourSearchRequest(BaseModel):
@@ -2,6 +2,8 @@ import json
 import pickle
 from typing import Any, Optional, Union
 import redis.asyncio as redis
+from pydantic import BaseModel
+from pydantic_core import to_json
 
 from app.config import settings
 from app.utils.logger import setup_logger
@@ -27,7 +29,7 @@ class CacheService:
             await self.redis_client.ping()
             return self.redis_client
         except Exception as e:
-            logger.warning(f"Redis переподключение: {e}")
+            logger.warning("Redis переподключение: %s", e)
             self.redis_client = redis.from_url(
                 settings.REDIS_URL,
                 decode_responses=False,
@@ -48,7 +50,7 @@ class CacheService:
         
         Args:
             key: Ключ для сохранения
-            value: Значение для сохранения
+            value: Значение для сохранения (dict/list/Pydantic-модель сохраняются как JSON)
             ttl: Время жизни в секундах (по умолчанию из настроек)
         
         Returns:
@@ -57,9 +59,10 @@ class CacheService:
         try:
             client = await self.get_client()
             
-            # Сериализуем значение
-            if isinstance(value, (dict, list, tuple)):
-                serialized_value = json.dumps(value, ensure_ascii=False, default=str)
+            # Сериализуем значение (Pydantic-модели, в том числе вложенные в списки
+            # и словари, pydantic-core пишет в JSON напрямую, без промежуточных dict)
+            if isinstance(value, (dict, list, tuple, BaseModel)):
+                serialized_value = to_json(value, by_alias=False, fallback=str).decode("utf-8")
                 key_type = "json"
             else:
                 serialized_value = pickle.dumps(value)
@@ -71,11 +74,11 @@ class CacheService:
             ttl = ttl or settings.CACHE_TTL
             await client.setex(key, ttl, final_value)
             
-            logger.debug(f"Значение сохранено в кэш: {key} (TTL: {ttl}s)")
+            logger.debug("Значение сохранено в кэш: %s (TTL: %ss)", key, ttl)
             return True
             
         except Exception as e:
-            logger.error(f"Ошибка при сохранении в кэш {key}: {e}")
+            logger.error("Ошибка при сохранении в кэш %s: %s", key, e)
             return False
     
     async def get(self, key: str) -> Optional[Any]:
@@ -95,28 +98,109 @@ class CacheService:
             if cached_value is None:
                 return None
             
-            # Декодируем если bytes
-            if isinstance(cached_value, bytes):
-                cached_value = cached_value.decode('utf-8')
-            
-            # Определяем тип и десериализуем
-            if cached_value.startswith("json:"):
-                value_str = cached_value[5:]  # Убираем префикс "json:"
-                return json.loads(value_str)
-            elif cached_value.startswith("pickle:"):
-                value_str = cached_value[7:]  # Убираем префикс "pickle:"
-                return pickle.loads(value_str.encode('utf-8'))
-            else:
-                # Обратная совместимость - пытаемся как JSON
-                try:
-                    return json.loads(cached_value)
-                except:
-                    return cached_value
+            return self._deserialize(cached_value)
+            
+        except Exception as e:
+            logger.error("Ошибка при получении из кэша %s: %s", key, e)
+            return None
+    
+    @staticmethod
+    def _deserialize(cached_value: Union[bytes, str]) -> Any:
+        """Десериализация значения с префиксом типа ("json:" / "pickle:")"""
+        # Декодируем если bytes
+        if isinstance(cached_value, bytes):
+            cached_value = cached_value.decode('utf-8')
+        
+        # Определяем тип и десериализуем
+        if cached_value.startswith("json:"):
+            value_str = cached_value[5:]  # Убираем префикс "json:"
+            return json.loads(value_str)
+        elif cached_value.startswith("pickle:"):
+            value_str = cached_value[7:]  # Убираем префикс "pickle:"
+            return pickle.loads(value_str.encode('utf-8'))
+        else:
+            # Обратная совместимость - пытаемся как JSON
+            try:
+                return json.loads(cached_value)
+            except:
+                return cached_value
+    
+    async def pipeline_get(self, keys: list[str]) -> list[Optional[bytes]]:
+        """
+        Получение сырых значений нескольких ключей за один запрос к Redis
+        
+        Args:
+            keys: Список ключей для получения
+        
+        Returns:
+            Список сырых значений (None для отсутствующих ключей) в порядке keys
+        """
+        if not keys:
+            return []
+        
+        try:
+            client = await self.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                return await pipe.execute()
+            
+        except Exception as e:
+            logger.error("Ошибка при пакетном получении из кэша: %s", e)
+            return [None] * len(keys)
+    
+    async def check_roundtrip(self, key: str, value: str = "test", ttl: int = 60) -> bool:
+        """
+        Проверка Redis: запись, чтение и удаление тестового ключа за один запрос
+        
+        Returns:
+            True если прочитанное значение совпало с записанным
+        """
+        try:
+            client = await self.get_client()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.setex(key, ttl, value)
+                pipe.get(key)
+                pipe.delete(key)
+                _, stored, _ = await pipe.execute()
+            
+            if isinstance(stored, bytes):
+                stored = stored.decode("utf-8")
+            return stored == value
+            
+        except Exception as e:
+            logger.error("Ошибка проверки кэша %s: %s", key, e)
+            return False
+    
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        Получение байтов как есть, без десериализации
+        
+        Для готовых ответов API, сохраненных через set_raw
+        """
+        try:
+            client = await self.get_client()
+            return await client.get(key)
             
         except Exception as e:
-            logger.error(f"Ошибка при получении из кэша {key}: {e}")
+            logger.error("Ошибка при получении из кэша %s: %s", key, e)
             return None
     
+    async def set_raw(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """
+        Сохранение готовых байтов без сериализации и префикса типа
+        
+        Такие ключи читаются только через get_raw
+        """
+        try:
+            client = await self.get_client()
+            await client.setex(key, ttl or settings.CACHE_TTL, value)
+            return True
+            
+        except Exception as e:
+            logger.error("Ошибка при сохранении в кэш %s: %s", key, e)
+            return False
+    
     async def delete(self, key: str) -> bool:
         """
         Удаление значения из кэша
@@ -131,13 +215,69 @@ class CacheService:
             client = await self.get_client()
             result = await client.delete(key)
             
-            logger.debug(f"Ключ удален из кэша: {key}")
+            logger.debug("Ключ удален из кэша: %s", key)
             return bool(result)
             
         except Exception as e:
-            logger.error(f"Ошибка при удалении из кэша {key}: {e}")
+            logger.error("Ошибка при удалении из кэша %s: %s", key, e)
             return False
     
+    async def delete_many(self, keys: list[str]) -> int:
+        """
+        Удаление нескольких ключей одной командой UNLINK
+        
+        Args:
+            keys: Список ключей для удаления
+        
+        Returns:
+            Количество удаленных ключей
+        """
+        if not keys:
+            return 0
+        
+        try:
+            client = await self.get_client()
+            # UNLINK освобождает память в фоне, не блокируя Redis
+            return await client.unlink(*keys)
+            
+        except Exception as e:
+            logger.error("Ошибка при пакетном удалении из кэша: %s", e)
+            return 0
+    
+    async def delete_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """
+        Удаление всех ключей по паттерну
+        
+        Ключи обходятся через SCAN и удаляются пачками по batch_size через UNLINK
+        
+        Args:
+            pattern: Паттерн ключей (например, "random_tours_type_*")
+            batch_size: Размер пачки для SCAN и UNLINK
+        
+        Returns:
+            Количество удаленных ключей
+        """
+        try:
+            client = await self.get_client()
+            deleted = 0
+            batch = []
+            
+            async for key in client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await client.unlink(*batch)
+                    batch = []
+            
+            if batch:
+                deleted += await client.unlink(*batch)
+            
+            logger.debug("Удалено %s ключей по паттерну: %s", deleted, pattern)
+            return deleted
+            
+        except Exception as e:
+            logger.error("Ошибка при удалении ключей по паттерну %s: %s", pattern, e)
+            return 0
+    
     async def exists(self, key: str) -> bool:
         """
         Проверка существования ключа в кэше
@@ -154,7 +294,7 @@ class CacheService:
             return bool(result)
             
         except Exception as e:
-            logger.error(f"Ошибка при проверке существования ключа {key}: {e}")
+            logger.error("Ошибка при проверке существования ключа %s: %s", key, e)
             return False
     
     async def get_keys_pattern(self, pattern: str) -> list[str]:
@@ -169,7 +309,8 @@ class CacheService:
         """
         try:
             client = await self.get_client()
-            keys = await client.keys(pattern)
+            # SCAN обходит ключи порциями и, в отличие от KEYS, не блокирует Redis
+            keys = [key async for key in client.scan_iter(match=pattern, count=500)]
             
             # Декодируем ключи если они в bytes
             if keys and isinstance(keys[0], bytes):
@@ -178,7 +319,7 @@ class CacheService:
             return keys
             
         except Exception as e:
-            logger.error(f"Ошибка при поиске ключей по паттерну {pattern}: {e}")
+            logger.error("Ошибка при поиске ключей по паттерну %s: %s", pattern, e)
             return []
     
     async def set_multiple(self, data: dict[str, Any], ttl: Optional[int] = None) -> bool:
@@ -201,7 +342,7 @@ class CacheService:
             return success_count == len(data)
             
         except Exception as e:
-            logger.error(f"Ошибка при массовом сохранении в кэш: {e}")
+            logger.error("Ошибка при массовом сохранении в кэш: %s", e)
             return False
     
     async def get_multiple(self, keys: list[str]) -> dict[str, Any]:
@@ -216,15 +357,19 @@ class CacheService:
         """
         result = {}
         try:
-            for key in keys:
-                value = await self.get(key)
-                if value is not None:
-                    result[key] = value
+            raw_values = await self.pipeline_get(keys)
+            for key, raw_value in zip(keys, raw_values):
+                if raw_value is None:
+                    continue
+                try:
+                    result[key] = self._deserialize(raw_value)
+                except Exception as e:
+                    logger.error("Ошибка при получении из кэша %s: %s", key, e)
             
             return result
             
         except Exception as e:
-            logger.error(f"Ошибка при массовом получении из кэша: {e}")
+            logger.error("Ошибка при массовом получении из кэша: %s", e)
             return result
     
     async def close(self):
@@ -1,6 +1,7 @@
 # app/services/directions_service.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 
 import logging
+import time
 from typing import List, Dict, Any, Optional
 from app.core.tourvisor_client import tourvisor_client
 from app.services.cache_service import cache_service
@@ -30,6 +31,62 @@ class DirectionsService:
         # "Камбоджа": {"country_id": 40, "country_code": 40},
     }
 
+    # Обратный индекс для поиска страны по ID за O(1)
+    COUNTRY_NAMES_BY_ID = {
+        info["country_id"]: name
+        for name, info in COUNTRIES_MAPPING.items()
+        if info["country_id"] is not None
+    }
+
+    # Версия содержимого кэша направлений (для ETag в API)
+    VERSION_CACHE_KEY = "directions_cache_version"
+
+    @staticmethod
+    def summarize_directions(directions: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Статистика по списку направлений за один проход
+
+        Returns:
+            with_prices, with_images, price_sum (сумма известных цен) и countries (число стран)
+        """
+        with_prices = 0
+        with_images = 0
+        price_sum = 0
+        country_ids = set()
+        for direction in directions:
+            min_price = direction.get("min_price")
+            if min_price:
+                with_prices += 1
+                price_sum += min_price
+            if direction.get("image_link"):
+                with_images += 1
+            country_ids.add(direction.get("country_id"))
+        
+        return {
+            "with_prices": with_prices,
+            "with_images": with_images,
+            "price_sum": price_sum,
+            "countries": len(country_ids)
+        }
+
+    async def current_version(self) -> str:
+        """
+        Текущая версия кэша направлений
+
+        Версия меняется при каждой записи направлений в кэш, поэтому по ней можно
+        отвечать 304 без чтения и сериализации самих направлений.
+        """
+        cached = await cache_service.get(self.VERSION_CACHE_KEY)
+        if cached and cached.get("version"):
+            return cached["version"]
+        return await self.bump_version()
+
+    async def bump_version(self) -> str:
+        """Новая версия кэша направлений - вызывается после изменения закэшированных данных"""
+        version = str(time.time_ns())
+        await cache_service.set(self.VERSION_CACHE_KEY, {"version": version}, ttl=86400 * 30)
+        return version
+
  
     async def get_directions_by_country(self, country_name: str) -> List[Dict[str, Any]]:
         """
@@ -121,6 +178,7 @@ class DirectionsService:
             if valid_results:
                 try:
                     await cache_service.set(cache_key, valid_results, ttl=86400 * 30)  # 30 дней
+                    await self.bump_version()
                     logger.info(f"💾 Сохранено {len(valid_results)} направлений в кеш для {country_name}")
                 except Exception as e:
                     logger.warning(f"⚠️ Ошибка сохранения в кеш для {country_name}: {e}")
@@ -369,7 +427,8 @@ class DirectionsService:
             
             # ИСПРАВЛЕНИЕ: Увеличен таймаут до 120 секунд для более качественных результатов
             import asyncio
-            max_attempts = 60  # 60 попыток по 2 секунды = 120 сек
+            max_attempts = 60  # Задержка растет от 0.1 до 2 секунд, итого ~115 сек
+            delay = 0.1
             
             for attempt in range(max_attempts):
                 try:
@@ -379,7 +438,7 @@ class DirectionsService:
                     if not status_result:
                         continue
                         
-                    status_data = status_result.get("data", {}).get("status", {})
+                    status_data = (status_result.get("data") or {}).get("status") or {}
                     state = status_data.get("state", "")
                     min_price = status_data.get("minprice")
                     hotels_found = status_data.get("hotelsfound", 0)
@@ -403,11 +462,13 @@ class DirectionsService:
                         break
                     
                     # Если поиск еще идет, ждем
-                    await asyncio.sleep(2)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 2.0)
                     
                 except Exception as e:
                     logger.debug(f"🔄 Ошибка проверки статуса для {city_name}: {e}")
-                    await asyncio.sleep(2)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 2.0)
                     continue
             
             logger.warning(f"⏰ Таймаут поиска для {city_name} (120 сек)")
@@ -468,7 +529,7 @@ class DirectionsService:
                 return None
             
             # Ищем отели в результатах
-            result_data = search_results.get("data", {}).get("result", {})
+            result_data = (search_results.get("data") or {}).get("result") or {}
             hotels = result_data.get("hotel", [])
             
             if not isinstance(hotels, list):
@@ -704,11 +765,7 @@ class DirectionsService:
             logger.info(f"🔍 Фильтрация направлений по country_id: {country_id}")
             
             # Находим название страны по ID
-            country_name = None
-            for name, info in self.COUNTRIES_MAPPING.items():
-                if info["country_id"] == country_id:
-                    country_name = name
-                    break
+            country_name = self.COUNTRY_NAMES_BY_ID.get(country_id)
             
             if not country_name:
                 logger.warning(f"⚠️ Страна с country_id {country_id} не найдена в маппинге")
@@ -1,12 +1,43 @@
 import asyncio
-from typing import Optional
-from datetime import datetime, timedelta
+import re
+from typing import Dict, Optional
+from datetime import date
+from urllib.parse import quote_plus
 
-from app.core.tourvisor_client import tourvisor_client
+from app.core.tourvisor_client import SEARCH_BACKOFF_POLL_DELAYS, search_hotels_found, tourvisor_client
+from app.utils.dates import format_date_offset
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Признаки заглушки в адресе изображения (без учета регистра)
+PLACEHOLDER_INDICATORS = (
+    "placeholder.com",
+    "via.placeholder",
+    "placehold",
+    "no-image",
+    "default",
+    "noimage"
+)
+# Все признаки проверяются одним проходом скомпилированного выражения
+_PLACEHOLDER_RE = re.compile("|".join(map(re.escape, PLACEHOLDER_INDICATORS)), re.IGNORECASE)
+
+# Варианты пробного поиска туров для получения фото отеля
+PHOTO_SEARCH_VARIANTS = (
+    {  # Стандартный поиск
+        "nightsfrom": 7, "nightsto": 10,
+        "stars": 4, "adults": 2, "child": 0
+    },
+    {  # Поиск люкс отелей
+        "nightsfrom": 3, "nightsto": 7,
+        "stars": 5, "adults": 2, "child": 0
+    },
+    {  # Простой поиск без фильтров
+        "nightsfrom": 7, "nightsto": 14,
+        "adults": 2, "child": 0
+    }
+)
+
 class PhotoService:
     """Сервис для получения фотографий отелей"""
     
@@ -16,16 +47,12 @@ class PhotoService:
         if not image_url:
             return True
         
-        placeholder_indicators = [
-            "placeholder.com",
-            "via.placeholder",
-            "placehold",
-            "no-image",
-            "default",
-            "noimage"
-        ]
-        
-        return any(indicator in image_url.lower() for indicator in placeholder_indicators)
+        return _PLACEHOLDER_RE.search(image_url) is not None
+    
+    @classmethod
+    def is_real_photo(cls, image_url: Optional[str]) -> bool:
+        """Непустая ссылка на настоящее фото, а не placeholder"""
+        return bool(image_url and image_url.strip()) and not cls.is_placeholder_image(image_url)
     
     @staticmethod
     def get_fallback_image(country_code: int, country_name: str) -> str:
@@ -43,7 +70,7 @@ class PhotoService:
         color = colors.get(country_code, "6C7CE7")
         
         # Создаем красивую placeholder фотографию
-        fallback_url = f"https://via.placeholder.com/400x300/{color}/FFFFFF?text={country_name.replace(' ', '+')}"
+        fallback_url = f"https://via.placeholder.com/400x300/{color}/FFFFFF?text={quote_plus(country_name)}"
         
         logger.info(f"🎨 Используем fallback изображение для {country_name}: {fallback_url}")
         return fallback_url
@@ -77,41 +104,54 @@ class PhotoService:
             logger.error(f"❌ Ошибка быстрого получения фото для {country_name}: {e}")
             return None
 
+    def _photo_from_hot_tours(self, hot_tours_data: Dict) -> Optional[tuple]:
+        """Первое настоящее фото отеля в ответе горящих туров: (url, название отеля)"""
+        tours_list = hot_tours_data.get("hottours", [])
+        if not isinstance(tours_list, list):
+            tours_list = [tours_list] if tours_list else []
+        
+        return next(
+            (
+                (photo_url, tour.get("hotelname", "Unknown"))
+                for tour in tours_list
+                if self.is_real_photo(photo_url := tour.get("hotelpicture"))
+            ),
+            None
+        )
+    
     async def _get_photo_via_hot_tours(self, country_code: int, country_name: str) -> Optional[str]:
         """Получение фото отеля через горящие туры (самый быстрый способ)"""
         try:
             logger.info(f"🔥 Получение фото через горящие туры для {country_name}")
             
-            # Пробуем получить горящие туры для страны из разных городов
+            # Горящие туры из разных городов запрашиваются одновременно: берем фото
+            # из первого ответившего с фото города, остальные запросы отменяем
             cities_to_try = [1, 2, 3]  # Москва, Пермь, Екатеринбург
             
-            for city in cities_to_try:
-                try:
-                    hot_tours_data = await tourvisor_client.get_hot_tours(
-                        city=city,
-                        items=10,  # Увеличиваем количество для большего выбора
-                        countries=str(country_code)
-                    )
-                    
-                    tours_list = hot_tours_data.get("hottours", [])
-                    if not isinstance(tours_list, list):
-                        tours_list = [tours_list] if tours_list else []
-                    
-                    logger.info(f"🔥 Найдено {len(tours_list)} горящих туров для {country_name} из города {city}")
-                    
-                    # Ищем тур с фотографией отеля
-                    for tour in tours_list:
-                        photo_url = tour.get("hotelpicture")
-                        if photo_url and photo_url.strip() and not self.is_placeholder_image(photo_url):
-                            logger.info(f"🔥✅ Найдено фото через горящие туры для {country_name}: {tour.get('hotelname', 'Unknown')}")
+            pending = {
+                asyncio.ensure_future(tourvisor_client.get_hot_tours(
+                    city=city,
+                    items=10,  # Увеличиваем количество для большего выбора
+                    countries=str(country_code)
+                ))
+                for city in cities_to_try
+            }
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception():
+                            logger.debug(f"🔥 Ошибка запроса горящих туров: {task.exception()}")
+                            continue
+                        
+                        found = self._photo_from_hot_tours(task.result())
+                        if found:
+                            photo_url, hotel_name = found
+                            logger.info(f"🔥✅ Найдено фото через горящие туры для {country_name}: {hotel_name}")
                             return photo_url
-                    
-                    # Задержка между попытками
-                    await asyncio.sleep(0.3)
-                    
-                except Exception as city_error:
-                    logger.debug(f"🔥 Ошибка для города {city}: {city_error}")
-                    continue
+            finally:
+                for task in pending:
+                    task.cancel()
             
             logger.debug(f"🔥 Нет подходящих фото в горящих турах для {country_name}")
             return None
@@ -170,7 +210,7 @@ class PhotoService:
                             
                             for field in photo_fields:
                                 photo_url = hotel_details.get(field)
-                                if photo_url and photo_url.strip() and not self.is_placeholder_image(photo_url):
+                                if self.is_real_photo(photo_url):
                                     logger.info(f"📋✅ Найдено фото отеля для {country_name}: {hotel_name}")
                                     return photo_url
                             
@@ -183,7 +223,7 @@ class PhotoService:
                                 else:
                                     photo_url = str(first_image)
                                 
-                                if photo_url and photo_url.strip() and not self.is_placeholder_image(photo_url):
+                                if self.is_real_photo(photo_url):
                                     logger.info(f"📋✅ Найдено фото отеля для {country_name}: {hotel_name}")
                                     return photo_url
                             
@@ -215,66 +255,50 @@ class PhotoService:
             logger.info(f"🔍 Поиск фото отеля через туры для {country_name}")
             
             # Пробуем разные варианты поиска
-            search_variants = [
-                {  # Стандартный поиск
-                    "nightsfrom": 7, "nightsto": 10,
-                    "stars": 4, "adults": 2, "child": 0
-                },
-                {  # Поиск люкс отелей
-                    "nightsfrom": 3, "nightsto": 7,
-                    "stars": 5, "adults": 2, "child": 0
-                },
-                {  # Простой поиск без фильтров
-                    "nightsfrom": 7, "nightsto": 14,
-                    "adults": 2, "child": 0
-                }
-            ]
-            
-            for variant in search_variants:
+            for variant in PHOTO_SEARCH_VARIANTS:
                 try:
                     search_params = {
                         "departure": 1,  # Москва
                         "country": country_code,
-                        "datefrom": (datetime.now() + timedelta(days=7)).strftime("%d.%m.%Y"),
-                        "dateto": (datetime.now() + timedelta(days=14)).strftime("%d.%m.%Y"),
+                        "datefrom": format_date_offset(date.today(), 7),
+                        "dateto": format_date_offset(date.today(), 14),
                         **variant
                     }
                     
                     logger.debug(f"🔍 Поиск с параметрами: {variant}")
                     request_id = await tourvisor_client.search_tours(search_params)
                     
-                    # Ждем результатов (максимум 5 секунд)
-                    for attempt in range(5):
-                        await asyncio.sleep(1)
+                    # Ждем первых найденных отелей или завершения поиска
+                    status_result = await tourvisor_client.wait_for_search(
+                        request_id,
+                        SEARCH_BACKOFF_POLL_DELAYS,
+                        ready=lambda status_data, attempt: search_hotels_found(status_data) > 0
+                    ) or {}
+                    status_data = (status_result.get("data") or {}).get("status") or {}
+                    state = status_data.get("state", "searching")
+                    hotels_found = search_hotels_found(status_data)
+                    
+                    logger.debug(f"🔍 Статус = {state}, отелей = {hotels_found}")
+                    
+                    if state == "finished" or hotels_found > 0:
+                        # Получаем результаты
+                        results = await tourvisor_client.get_search_results(request_id, 1, 5)
                         
-                        status_result = await tourvisor_client.get_search_status(request_id)
-                        status_data = status_result.get("data", {}).get("status", {})
-                        state = status_data.get("state", "searching")
-                        hotels_found = status_data.get("hotelsfound", 0)
+                        data = results.get("data", {})
+                        result_data = data.get("result", {})
+                        hotel_list = result_data.get("hotel", [])
                         
-                        logger.debug(f"🔍 Попытка {attempt+1}: статус = {state}, отелей = {hotels_found}")
+                        if not isinstance(hotel_list, list):
+                            hotel_list = [hotel_list] if hotel_list else []
                         
-                        if state == "finished" or hotels_found > 0:
-                            # Получаем результаты
-                            results = await tourvisor_client.get_search_results(request_id, 1, 5)
-                            
-                            data = results.get("data", {})
-                            result_data = data.get("result", {})
-                            hotel_list = result_data.get("hotel", [])
-                            
-                            if not isinstance(hotel_list, list):
-                                hotel_list = [hotel_list] if hotel_list else []
-                            
-                            # Ищем отель с фотографией
-                            for hotel in hotel_list:
-                                photo_url = hotel.get("picturelink")
-                                hotel_name = hotel.get("hotelname", "Unknown")
-                                
-                                if photo_url and photo_url.strip() and not self.is_placeholder_image(photo_url):
-                                    logger.info(f"🔍✅ Найдено фото отеля через поиск для {country_name}: {hotel_name}")
-                                    return photo_url
+                        # Ищем отель с фотографией
+                        for hotel in hotel_list:
+                            photo_url = hotel.get("picturelink")
+                            hotel_name = hotel.get("hotelname", "Unknown")
                             
-                            break
+                            if self.is_real_photo(photo_url):
+                                logger.info(f"🔍✅ Найдено фото отеля через поиск для {country_name}: {hotel_name}")
+                                return photo_url
                     
                     # Задержка между вариантами поиска
                     await asyncio.sleep(0.5)
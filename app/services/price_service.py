@@ -1,87 +1,95 @@
 import asyncio
 from typing import Dict, Any
-from datetime import datetime, timedelta
+from datetime import date
 
-from app.core.tourvisor_client import tourvisor_client
+from app.core.tourvisor_client import SEARCH_BACKOFF_POLL_DELAYS, tourvisor_client
+from app.utils.dates import format_date_offset
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Варианты пробного поиска для получения цены
+PRICE_SEARCH_VARIANTS = (
+    {  # Стандартный поиск на неделю
+        "nightsfrom": 7, "nightsto": 10,
+        "adults": 2, "child": 0
+    },
+    {  # Короткий тур
+        "nightsfrom": 3, "nightsto": 7,
+        "adults": 2, "child": 0
+    },
+    {  # Длинный тур
+        "nightsfrom": 10, "nightsto": 14,
+        "adults": 2, "child": 0
+    }
+)
+
+# Дефолтные цены по странам - статичны, собираются один раз при импорте
+DEFAULT_PRICES: Dict[int, float] = {
+    1: 85000.0,    # Египет
+    4: 75000.0,    # Турция
+    22: 180000.0,  # Таиланд
+    8: 95000.0,    # Греция
+    15: 120000.0,  # ОАЭ
+    35: 250000.0   # Мальдивы
+}
+DEFAULT_FALLBACK_PRICE = 80000.0
+
+def _status_min_price(status_data: Dict[str, Any]) -> float:
+    """Минимальная цена из статуса поиска (0, если ее еще нет)"""
+    min_price = status_data.get("minprice")
+    return float(min_price) if min_price else 0.0
+
 class PriceService:
     """Сервис для работы с ценами туров"""
     
     @staticmethod
     def get_default_prices() -> Dict[int, float]:
         """Дефолтные цены по странам"""
-        return {
-            1: 85000.0,    # Египет
-            4: 75000.0,    # Турция
-            22: 180000.0,  # Таиланд
-            8: 95000.0,    # Греция
-            15: 120000.0,  # ОАЭ
-            35: 250000.0   # Мальдивы
-        }
+        return dict(DEFAULT_PRICES)
     
     async def get_country_min_price(self, country_code: int, country_name: str) -> float:
         """Получение минимальной цены для страны с улучшенной логикой"""
         try:
             logger.info(f"💰 Получение минимальной цены для {country_name}")
             
-            # Пробуем разные варианты поиска для получения цены
-            price_search_variants = [
-                {  # Стандартный поиск на неделю
-                    "nightsfrom": 7, "nightsto": 10,
-                    "adults": 2, "child": 0
-                },
-                {  # Короткий тур
-                    "nightsfrom": 3, "nightsto": 7,
-                    "adults": 2, "child": 0
-                },
-                {  # Длинный тур
-                    "nightsfrom": 10, "nightsto": 14,
-                    "adults": 2, "child": 0
-                }
-            ]
-            
             best_price = None
             
-            for variant in price_search_variants:
+            # Пробуем разные варианты поиска для получения цены
+            for variant in PRICE_SEARCH_VARIANTS:
                 try:
                     search_params = {
                         "departure": 1,  # Москва
                         "country": country_code,
-                        "datefrom": (datetime.now() + timedelta(days=7)).strftime("%d.%m.%Y"),
-                        "dateto": (datetime.now() + timedelta(days=21)).strftime("%d.%m.%Y"),
+                        "datefrom": format_date_offset(date.today(), 7),
+                        "dateto": format_date_offset(date.today(), 21),
                         **variant
                     }
                     
                     request_id = await tourvisor_client.search_tours(search_params)
                     
-                    # Ждем результатов (максимум 5 секунд)
-                    for attempt in range(5):
-                        await asyncio.sleep(1)
-                        
-                        status_result = await tourvisor_client.get_search_status(request_id)
-                        status_data = status_result.get("data", {}).get("status", {})
-                        
-                        # Проверяем минимальную цену в статусе
-                        min_price_from_status = status_data.get("minprice")
-                        if min_price_from_status and float(min_price_from_status) > 0:
-                            price = float(min_price_from_status)
-                            if best_price is None or price < best_price:
-                                best_price = price
-                            logger.info(f"💰 Найдена цена {price} для {country_name} (вариант {variant})")
-                            break
-                        
-                        if status_data.get("state") == "finished":
-                            # Получаем результаты для поиска цены
-                            results = await tourvisor_client.get_search_results(request_id, 1, 5)
-                            extracted_price = self._extract_min_price_from_results(results)
-                            if extracted_price > 0:
-                                if best_price is None or extracted_price < best_price:
-                                    best_price = extracted_price
-                                logger.info(f"💰 Извлечена цена {extracted_price} для {country_name}")
-                            break
+                    # Ждем минимальную цену в статусе или завершения поиска
+                    status_result = await tourvisor_client.wait_for_search(
+                        request_id,
+                        SEARCH_BACKOFF_POLL_DELAYS,
+                        ready=lambda status_data, attempt: _status_min_price(status_data) > 0
+                    ) or {}
+                    status_data = (status_result.get("data") or {}).get("status") or {}
+                    
+                    # Проверяем минимальную цену в статусе
+                    price = _status_min_price(status_data)
+                    if price > 0:
+                        if best_price is None or price < best_price:
+                            best_price = price
+                        logger.info(f"💰 Найдена цена {price} для {country_name} (вариант {variant})")
+                    elif status_data.get("state") == "finished":
+                        # Получаем результаты для поиска цены
+                        results = await tourvisor_client.get_search_results(request_id, 1, 5)
+                        extracted_price = self._extract_min_price_from_results(results)
+                        if extracted_price > 0:
+                            if best_price is None or extracted_price < best_price:
+                                best_price = extracted_price
+                            logger.info(f"💰 Извлечена цена {extracted_price} для {country_name}")
                     
                     # Если нашли приемлемую цену, можем остановиться
                     if best_price and best_price > 0:
@@ -100,16 +108,14 @@ class PriceService:
                 return best_price
             
             # Иначе возвращаем дефолтную цену
-            default_prices = self.get_default_prices()
-            fallback_price = default_prices.get(country_code, 80000.0)
+            fallback_price = DEFAULT_PRICES.get(country_code, DEFAULT_FALLBACK_PRICE)
             logger.warning(f"💰 Используем дефолтную цену для {country_name}: {fallback_price}")
             return fallback_price
             
         except Exception as e:
             logger.error(f"❌ Ошибка получения цены для {country_name}: {e}")
             # Возвращаем дефолтную цену при ошибке
-            default_prices = self.get_default_prices()
-            return default_prices.get(country_code, 80000.0)
+            return DEFAULT_PRICES.get(country_code, DEFAULT_FALLBACK_PRICE)
     
     def _extract_min_price_from_results(self, results: Dict[str, Any]) -> float:
         """Извлечение минимальной цены из результатов поиска"""
@@ -1,17 +1,56 @@
 import asyncio
 import random
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
 
-from app.core.tourvisor_client import tourvisor_client
+from app.core.tourvisor_client import SEARCH_BACKOFF_POLL_DELAYS, search_hotels_found, tourvisor_client
 from app.services.cache_service import cache_service
 from app.services.tour_service import tour_service
-from app.models.tour import RandomTourRequest, HotTourInfo
+from app.models.tour import RandomTourRequest, HotTourInfo, VALID_HOTEL_TYPES
 from app.config import settings
+from app.utils.dates import format_date_offset
 from app.utils.logger import setup_logger
+from app.utils.singleflight import SingleFlight
 
 logger = setup_logger(__name__)
 
+# Пул mock-туров: генерируется раз в час, запросы получают выборку из него
+MOCK_TOURS_POOL_SIZE = 100
+MOCK_TOURS_POOL_TTL = 3600
+
+# Реалистичные данные для mock-туров (неизменяемые, создаются один раз)
+MOCK_DESTINATIONS = (
+    {"code": 1, "name": "Египет", "regions": ("Хургада", "Шарм-эль-Шейх"), "base_price": 45000},
+    {"code": 4, "name": "Турция", "regions": ("Анталья", "Кемер", "Белек"), "base_price": 35000},
+    {"code": 8, "name": "Греция", "regions": ("Крит", "Родос", "Халкидики"), "base_price": 55000},
+    {"code": 15, "name": "ОАЭ", "regions": ("Дубай", "Абу-Даби", "Шарджа"), "base_price": 75000},
+    {"code": 22, "name": "Таиланд", "regions": ("Пхукет", "Паттайя", "Самуи"), "base_price": 95000},
+)
+MOCK_CITIES = (
+    {"code": 1, "name": "Москва", "namefrom": "Москвы"},
+    {"code": 2, "name": "Пермь", "namefrom": "Перми"},
+    {"code": 3, "name": "Екатеринбург", "namefrom": "Екатеринбурга"},
+    {"code": 5, "name": "Санкт-Петербург", "namefrom": "Санкт-Петербурга"},
+)
+MOCK_OPERATORS = ("Pegas Touristik", "Coral Travel", "Anex Tour", "TEZ TOUR", "Sunmar")
+MOCK_MEALS = ("Завтрак", "Полупансион", "Всё включено", "Ultra All Inclusive")
+MOCK_PICTURE_COLORS = ("4a90e2", "e74c3c")
+MOCK_HOTEL_STARS = (3, 4, 5)
+MOCK_DELUXE_HOTEL_STARS = (4, 5, 5, 5)
+MOCK_NIGHTS = (7, 10, 14)
+
+# Направления и города вылета для полностью случайной генерации (неизменяемые)
+FULLY_RANDOM_COUNTRIES = (1, 4, 8, 9, 11, 15, 16, 17, 19, 20, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35)
+FULLY_RANDOM_CITIES = tuple(range(1, 16))
+
+# Таймаут проверки TourVisor API в статусе системы (секунды)
+STATUS_PROBE_TIMEOUT = 1.5
+
+def random_request_key(request: RandomTourRequest) -> Tuple[int, Tuple[str, ...]]:
+    """Ключ объединения запросов случайных туров (порядок типов отелей не важен)"""
+    return request.count, tuple(sorted(request.hotel_types or ()))
+
 class RandomToursService:
     """Улучшенный сервис для работы со случайными турами"""
     
@@ -21,12 +60,16 @@ class RandomToursService:
         self.popular_countries = [1, 4, 8, 15, 22, 35]  # Египет, Турция, Греция, ОАЭ, Таиланд, Мальдивы
         self.all_cities = [1, 2, 3, 5, 6]  # Москва, Пермь, Екатеринбург, СПб, Казань
         self.current_request = None  # Для хранения текущего запроса
+        # Объединение одновременных генераций с одинаковыми параметрами
+        self._generation_flights = SingleFlight()
+        # Пулы готовых mock-туров по вариантам: {variant: (истекает, туры)}
+        self._mock_tours_pools: Dict[str, tuple] = {}
     
     async def get_random_tours(self, request: RandomTourRequest) -> List[HotTourInfo]:
         """Получение случайных туров с многоуровневой стратегией"""
         cache_key = f"random_tours_count_{request.count}"
         
-        logger.info(f"🎯 Запрос {request.count} случайных туров")
+        logger.info("🎯 Запрос %d случайных туров", request.count)
         # Сохраняем запрос для использования в стратегиях
         self.current_request = request
         
@@ -34,18 +77,22 @@ class RandomToursService:
         try:
             cached_tours = await self._get_cached_tours_with_filters(request)
             if cached_tours and len(cached_tours) >= request.count:
-                logger.info(f"✅ Возвращено {len(cached_tours)} туров из кэша с фильтрацией")
+                logger.info("✅ Возвращено %d туров из кэша с фильтрацией", len(cached_tours))
                 return cached_tours[:request.count]
         except Exception as e:
-            logger.error(f"❌ Ошибка при работе с кэшем: {e}")
+            logger.error("❌ Ошибка при работе с кэшем: %s", e)
         
-        # Генерируем новые туры
+        # Генерируем новые туры: одновременные одинаковые запросы ждут одну генерацию,
+        # чтобы истекший кэш не превращался в лавину запросов к TourVisor
         logger.info("🔄 Генерируем новые случайные туры")
-        return await self._generate_random_tours_multilevel(request)
+        return await self._generation_flights.do(
+            random_request_key(request),
+            lambda: self._generate_random_tours_multilevel(request)
+        )
     
     async def _generate_random_tours_multilevel(self, request: RandomTourRequest) -> List[HotTourInfo]:
         """Многоуровневая генерация случайных туров"""
-        logger.info(f"🎲 НАЧИНАЕМ МНОГОУРОВНЕВУЮ ГЕНЕРАЦИЮ {request.count} ТУРОВ")
+        logger.info("🎲 НАЧИНАЕМ МНОГОУРОВНЕВУЮ ГЕНЕРАЦИЮ %s ТУРОВ", request.count)
         
         random_tours = []
         
@@ -54,30 +101,30 @@ class RandomToursService:
         hot_tours_result = await self._try_hot_tours_strategy()
         if hot_tours_result and len(hot_tours_result) >= request.count:
             random_tours = hot_tours_result[:request.count]
-            logger.info(f"🔥 Успех на уровне 1: получено {len(random_tours)} туров")
+            logger.info("🔥 Успех на уровне 1: получено %s туров", len(random_tours))
         else:
             if hot_tours_result:
                 random_tours.extend(hot_tours_result)
-                logger.info(f"🔥 Частичный успех на уровне 1: {len(hot_tours_result)} туров")
+                logger.info("🔥 Частичный успех на уровне 1: %s туров", len(hot_tours_result))
         
         # Уровень 2: Обычный поиск (если нужно больше туров)
         if len(random_tours) < request.count:
             needed = request.count - len(random_tours)
-            logger.info(f"📍 Уровень 2: Нужно еще {needed} туров, запускаем поиск")
+            logger.info("📍 Уровень 2: Нужно еще %s туров, запускаем поиск", needed)
             
             search_tours = await self._try_search_strategy(needed)
             if search_tours:
                 random_tours.extend(search_tours)
-                logger.info(f"🔍 Успех на уровне 2: добавлено {len(search_tours)} туров")
+                logger.info("🔍 Успех на уровне 2: добавлено %s туров", len(search_tours))
         
         # Уровень 3: Mock-данные (гарантированный результат)
         if len(random_tours) < request.count:
             needed = request.count - len(random_tours)
-            logger.info(f"📍 Уровень 3: Создаем {needed} mock-туров")
+            logger.info("📍 Уровень 3: Создаем %s mock-туров", needed)
             
             mock_tours = await self._create_smart_mock_tours(needed)
             random_tours.extend(mock_tours)
-            logger.info(f"🎭 Добавлено {len(mock_tours)} mock-туров")
+            logger.info("🎭 Добавлено %s mock-туров", len(mock_tours))
         
         # Перемешиваем результат
         random.shuffle(random_tours)
@@ -89,14 +136,14 @@ class RandomToursService:
                 cache_key = f"random_tours_count_{request.count}"
                 await self.cache.set(
                     cache_key,
-                    [tour.dict() for tour in final_tours],
+                    final_tours,
                     ttl=1800  # 30 минут для случайных туров
                 )
-                logger.info(f"💾 Сохранено {len(final_tours)} туров в кэш")
+                logger.info("💾 Сохранено %s туров в кэш", len(final_tours))
             except Exception as cache_error:
-                logger.error(f"❌ Ошибка сохранения в кэш: {cache_error}")
+                logger.error("❌ Ошибка сохранения в кэш: %s", cache_error)
         
-        logger.info(f"🏁 ГЕНЕРАЦИЯ ЗАВЕРШЕНА: {len(final_tours)} туров")
+        logger.info("🏁 ГЕНЕРАЦИЯ ЗАВЕРШЕНА: %s туров", len(final_tours))
         return final_tours
     
     async def _try_hot_tours_strategy(self) -> List[HotTourInfo]:
@@ -134,7 +181,7 @@ class RandomToursService:
             for city in self.all_cities[:3]:  # Берем первые 3 города
                 for strategy in strategies:
                     try:
-                        logger.debug(f"🔥 Тестируем город {city} со стратегией {strategy}")
+                        logger.debug("🔥 Тестируем город %s со стратегией %s", city, strategy)
                         
                         hot_tours_data = await tourvisor_client.get_hot_tours(
                             city=city,
@@ -145,14 +192,14 @@ class RandomToursService:
                         if not isinstance(tours_list, list):
                             tours_list = [tours_list] if tours_list else []
                         
-                        logger.debug(f"🔥 Город {city}: найдено {len(tours_list)} туров")
+                        logger.debug("🔥 Город %s: найдено %s туров", city, len(tours_list))
                         
                         for tour_data in tours_list:
                             try:
                                 tour = HotTourInfo(**tour_data)
                                 all_tours.append(tour)
                             except Exception as tour_error:
-                                logger.debug(f"Ошибка создания тура: {tour_error}")
+                                logger.debug("Ошибка создания тура: %s", tour_error)
                                 continue
                         
                         # Если нашли туры, переходим к следующему городу
@@ -162,7 +209,7 @@ class RandomToursService:
                         await asyncio.sleep(0.2)
                         
                     except Exception as strategy_error:
-                        logger.debug(f"🔥 Ошибка стратегии {strategy}: {strategy_error}")
+                        logger.debug("🔥 Ошибка стратегии %s: %s", strategy, strategy_error)
                         continue
                 
                 # Задержка между городами
@@ -177,19 +224,19 @@ class RandomToursService:
                         seen_hotels.add(tour.hotelcode)
                         unique_tours.append(tour)
                 
-                logger.info(f"🔥 Стратегия горящих туров: {len(unique_tours)} уникальных туров")
+                logger.info("🔥 Стратегия горящих туров: %s уникальных туров", len(unique_tours))
                 return unique_tours
             
             logger.info("🔥 Стратегия горящих туров не дала результатов")
             return []
             
         except Exception as e:
-            logger.error(f"🔥 Ошибка стратегии горящих туров: {e}")
+            logger.error("🔥 Ошибка стратегии горящих туров: %s", e)
             return []
     async def _try_search_strategy(self, needed_count: int) -> List[HotTourInfo]:
         """Стратегия получения туров через обычный поиск"""
         try:
-            logger.info(f"🔍 Пробуем стратегию поиска для {needed_count} туров")
+            logger.info("🔍 Пробуем стратегию поиска для %s туров", needed_count)
         
             found_tours = []
             max_attempts = min(needed_count * 2, 12)  # Увеличиваем до 12 попыток
@@ -205,21 +252,21 @@ class RandomToursService:
                     country_name = tour_service._get_country_name(search_params['country'])
                     city_name = tour_service._get_city_name(search_params['departure'])
                 
-                    logger.debug(f"🔍 Поиск {i+1}/{len(search_variants)}: {country_name} из {city_name}")
-                    logger.debug(f"🔍 Этап 1: Ожидание finished или ошибки. Параметры: {search_params}")
+                    logger.debug("🔍 Поиск %s/%s: %s из %s", i+1, len(search_variants), country_name, city_name)
+                    logger.debug("🔍 Этап 1: Ожидание finished или ошибки. Параметры: %s", search_params)
                 
                     # Запускаем поиск
                     request_id = await tourvisor_client.search_tours(search_params)
                 
                     # Ждем статус finished или ошибку
-                    start_time = time.time()
+                    start_time = time.perf_counter()
                     while True:
                         status = await tourvisor_client.get_search_status(request_id)
                         if status == "finished":
                             break
                         if status == "error":
                             raise Exception("Search failed with error status")
-                        if time.time() - start_time > 30:  # 30 секунд таймаут
+                        if time.perf_counter() - start_time > 30:  # 30 секунд таймаут
                             raise Exception("Search timeout in phase 1")
                         await asyncio.sleep(1)
                 
@@ -228,13 +275,13 @@ class RandomToursService:
                 
                     if found_tours_from_search:
                         found_tours.extend(found_tours_from_search)
-                        logger.debug(f"✅ Этап 1: Найдено {len(found_tours_from_search)} туров из поиска")
+                        logger.debug("✅ Этап 1: Найдено %s туров из поиска", len(found_tours_from_search))
                 
                     # Короткая задержка
                     await asyncio.sleep(0.3)
                 
                 except Exception as e:
-                    logger.debug(f"🔍 Этап 1: Ошибка поиска {i+1}: {e}")
+                    logger.debug("🔍 Этап 1: Ошибка поиска %s: %s", i+1, e)
                     continue
         
             # Этап 2: Длительный поиск (если не нашли достаточно туров)
@@ -248,18 +295,18 @@ class RandomToursService:
                         country_name = tour_service._get_country_name(search_params['country'])
                         city_name = tour_service._get_city_name(search_params['departure'])
                     
-                        logger.debug(f"🔍 Длительный поиск {i+1}/{len(search_variants)}: {country_name} из {city_name}")
-                        logger.debug(f"🔍 Этап 2: Параметры поиска: {search_params}")
+                        logger.debug("🔍 Длительный поиск %s/%s: %s из %s", i+1, len(search_variants), country_name, city_name)
+                        logger.debug("🔍 Этап 2: Параметры поиска: %s", search_params)
                     
                         request_id = await tourvisor_client.search_tours(search_params)
                     
                         # Ждем до 10 минут
-                        start_time = time.time()
+                        start_time = time.perf_counter()
                         while True:
                             status = await tourvisor_client.get_search_status(request_id)
                             if status == "finished" or status == "error":
                                 break
-                            if time.time() - start_time > 600:  # 10 минут
+                            if time.perf_counter() - start_time > 600:  # 10 минут
                                 break
                             await asyncio.sleep(5)
                     
@@ -267,19 +314,19 @@ class RandomToursService:
                     
                         if found_tours_from_search:
                             found_tours.extend(found_tours_from_search)
-                            logger.debug(f"✅ Этап 2: Найдено {len(found_tours_from_search)} туров из длительного поиска")
+                            logger.debug("✅ Этап 2: Найдено %s туров из длительного поиска", len(found_tours_from_search))
                     
                         await asyncio.sleep(0.3)
                     
                     except Exception as e:
-                        logger.debug(f"🔍 Этап 2: Ошибка длительного поиска {i+1}: {e}")
+                        logger.debug("🔍 Этап 2: Ошибка длительного поиска %s: %s", i+1, e)
                         continue
         
-            logger.info(f"🔍 Стратегия поиска завершена: найдено {len(found_tours)} туров")
+            logger.info("🔍 Стратегия поиска завершена: найдено %s туров", len(found_tours))
             return found_tours
         
         except Exception as e:
-            logger.error(f"🔍 Ошибка стратегии поиска: {e}")
+            logger.error("🔍 Ошибка стратегии поиска: %s", e)
             return []
     
     def _create_optimized_search_variants(self, max_variants: int, needed_count: int = None) -> List[Dict[str, Any]]:
@@ -298,8 +345,8 @@ class RandomToursService:
         
         # Базовые параметры поиска
         base_dates = {
-            "datefrom": (datetime.now() + timedelta(days=14)).strftime("%d.%m.%Y"),
-            "dateto": (datetime.now() + timedelta(days=21)).strftime("%d.%m.%Y")
+            "datefrom": format_date_offset(date.today(), 14),
+            "dateto": format_date_offset(date.today(), 21)
         }
         
         base_params = {
@@ -357,24 +404,13 @@ class RandomToursService:
     async def _get_multiple_tours_from_search(self, request_id: str, search_params: Dict[str, Any], max_tours: int) -> List[HotTourInfo]:
         """Получение нескольких туров из одного поискового запроса"""
         try:
-            # Ждем результатов поиска (максимум 4 секунды)
-            for attempt in range(4):
-                await asyncio.sleep(1)
-                
-                status_result = await tourvisor_client.get_search_status(request_id)
-                status_data = status_result.get("data", {}).get("status", {})
-                state = status_data.get("state", "searching")
-                hotels_found = status_data.get("hotelsfound", 0)
-                
-                # Безопасное преобразование в int
-                try:
-                    hotels_found = int(hotels_found) if hotels_found else 0
-                except (ValueError, TypeError):
-                    hotels_found = 0
-                
-                # Прерываем если есть результаты или поиск завершен
-                if state == "finished" or (hotels_found > 0 and attempt >= 2):
-                    break
+            # Ждем завершения поиска; найденные отели принимаем не раньше третьего опроса,
+            # чтобы их успело набраться больше
+            await tourvisor_client.wait_for_search(
+                request_id,
+                SEARCH_BACKOFF_POLL_DELAYS,
+                ready=lambda status_data, attempt: attempt >= 2 and search_hotels_found(status_data) > 0
+            )
             
             # Получаем результаты (больше отелей)
             results = await tourvisor_client.get_search_results(request_id, 1, 10)  # Увеличено с 5 до 10
@@ -416,17 +452,17 @@ class RandomToursService:
                     tour = HotTourInfo(**hot_tour_data)
                     extracted_tours.append(tour)
                     
-                    logger.debug(f"🏨 Извлечен тур: {tour.hotelname} - {tour.price} руб.")
+                    logger.debug("🏨 Извлечен тур: %s - %s руб.", tour.hotelname, tour.price)
                     
                 except Exception as e:
-                    logger.debug(f"❌ Ошибка при создании тура: {e}")
+                    logger.debug("❌ Ошибка при создании тура: %s", e)
                     continue
             
-            logger.info(f"🔍 Извлечено {len(extracted_tours)} туров из {len(hotel_list)} отелей")
+            logger.info("🔍 Извлечено %s туров из %s отелей", len(extracted_tours), len(hotel_list))
             return extracted_tours
             
         except Exception as e:
-            logger.debug(f"❌ Ошибка получения множественных туров: {e}")
+            logger.debug("❌ Ошибка получения множественных туров: %s", e)
             return []
     
     def _convert_search_to_hot_tour(self, hotel_data: Dict, tour_data: Dict, search_params: Dict) -> Dict[str, Any]:
@@ -461,36 +497,50 @@ class RandomToursService:
         }
     
     async def _create_smart_mock_tours(self, count: int) -> List[HotTourInfo]:
-        """Создание умных mock-туров с реалистичными данными"""
-        logger.info(f"🎭 Создаем {count} умных mock-туров")
+        """Выбор умных mock-туров из заранее сгенерированного пула в кэше"""
+        variant = self._get_mock_tours_variant()
         
-        mock_tours = []
-        
-        # Реалистичные данные для mock-туров
-        destinations = [
-            {"code": 1, "name": "Египет", "regions": ["Хургада", "Шарм-эль-Шейх"], "base_price": 45000},
-            {"code": 4, "name": "Турция", "regions": ["Анталья", "Кемер", "Белек"], "base_price": 35000},
-            {"code": 8, "name": "Греция", "regions": ["Крит", "Родос", "Халкидики"], "base_price": 55000},
-            {"code": 15, "name": "ОАЭ", "regions": ["Дубай", "Абу-Даби", "Шарджа"], "base_price": 75000},
-            {"code": 22, "name": "Таиланд", "regions": ["Пхукет", "Паттайя", "Самуи"], "base_price": 95000},
-        ]
+        # Готовые объекты HotTourInfo держим в памяти процесса до истечения TTL пула
+        local_pool = self._mock_tours_pools.get(variant)
+        if local_pool and local_pool[0] > time.monotonic():
+            pool = local_pool[1]
+        else:
+            cache_key = f"random_tours_mock_pool_{variant}"
+            pool_data = await self.cache.get(cache_key)
+            if pool_data:
+                pool = [HotTourInfo.model_construct(**tour_data) for tour_data in pool_data]
+            else:
+                pool = self._build_smart_mock_tours(MOCK_TOURS_POOL_SIZE, variant)
+                await self.cache.set(cache_key, pool, ttl=MOCK_TOURS_POOL_TTL)
+            
+            self._mock_tours_pools[variant] = (time.monotonic() + MOCK_TOURS_POOL_TTL, pool)
         
-        cities = [
-            {"code": 1, "name": "Москва", "namefrom": "Москвы"},
-            {"code": 2, "name": "Пермь", "namefrom": "Перми"},
-            {"code": 3, "name": "Екатеринбург", "namefrom": "Екатеринбурга"},
-            {"code": 5, "name": "Санкт-Петербург", "namefrom": "Санкт-Петербурга"},
-        ]
+        selected = random.sample(pool, min(count, len(pool)))
+        logger.info("🎭 Взято %d mock-туров из пула '%s'", len(selected), variant)
+        return selected
+    
+    def _get_mock_tours_variant(self) -> str:
+        """Вариант пула mock-туров в зависимости от запрошенных типов отелей"""
+        hotel_types = self.current_request.hotel_types if self.current_request else None
+        if hotel_types:
+            if "deluxe" in hotel_types:
+                return "deluxe"
+            if "beach" in hotel_types:
+                return "beach"
+        return "any"
+    
+    def _build_smart_mock_tours(self, count: int, variant: str = "any") -> List[HotTourInfo]:
+        """Создание умных mock-туров с реалистичными данными"""
+        logger.info("🎭 Создаем %s умных mock-туров", count)
         
-        operators = ["Pegas Touristik", "Coral Travel", "Anex Tour", "TEZ TOUR", "Sunmar"]
-        meals = ["Завтрак", "Полупансион", "Всё включено", "Ultra All Inclusive"]
+        mock_tours = []
         
         for i in range(count):
-            destination = random.choice(destinations)
-            city = random.choice(cities)
-            operator = random.choice(operators)
+            destination = random.choice(MOCK_DESTINATIONS)
+            city = random.choice(MOCK_CITIES)
+            operator = random.choice(MOCK_OPERATORS)
             region = random.choice(destination["regions"])
-            meal = random.choice(meals)
+            meal = random.choice(MOCK_MEALS)
             
             # Генерируем реалистичную цену
             base_price = destination["base_price"]
@@ -510,13 +560,13 @@ class RandomToursService:
                 "operatorname": operator,
                 "hotelcode": str(1000 + i),
                 "hotelname": f"{destination['name'].upper()} RESORT {region.upper()} {i+1}",
-                "hotelstars": random.choice([3, 4, 5]),
+                "hotelstars": random.choice(MOCK_HOTEL_STARS),
                 "hotelregioncode": str(100 + i),
                 "hotelregionname": region,
-                "hotelpicture": f"https://via.placeholder.com/250x150/{'4a90e2' if i % 2 == 0 else 'e74c3c'}/ffffff?text={region}+Resort",
+                "hotelpicture": f"https://via.placeholder.com/250x150/{MOCK_PICTURE_COLORS[i % 2]}/ffffff?text={region}+Resort",
                 "fulldesclink": f"https://example.com/hotel/{1000+i}",
                 "flydate": departure_date.strftime("%d.%m.%Y"),
-                "nights": random.choice([7, 10, 14]),
+                "nights": random.choice(MOCK_NIGHTS),
                 "meal": meal,
                 "price": float(final_price),
                 "priceold": float(final_price + random.randint(5000, 15000)),
@@ -524,31 +574,29 @@ class RandomToursService:
             }
             
             # Учитываем фильтрацию по типам отелей в mock-данных
-            if hasattr(self, 'current_request') and self.current_request and self.current_request.hotel_types:
-                # Если запрошены люкс отели, делаем больше 5* отелей
-                if "deluxe" in self.current_request.hotel_types:
-                    mock_tour_data["hotelstars"] = random.choice([4, 5, 5, 5])  # Больше вероятность 5*
-                # Если пляжные - добавляем пляжную тематику в название
-                elif "beach" in self.current_request.hotel_types:
-                    mock_tour_data["hotelname"] = f"BEACH {destination['name'].upper()} RESORT {region.upper()} {i+1}"
-            
-            try:
-                mock_tour = HotTourInfo(**mock_tour_data)
-                mock_tours.append(mock_tour)
-            except Exception as e:
-                logger.warning(f"Ошибка создания mock-тура: {e}")
-                continue
+            # Если запрошены люкс отели, делаем больше 5* отелей
+            if variant == "deluxe":
+                mock_tour_data["hotelstars"] = random.choice(MOCK_DELUXE_HOTEL_STARS)  # Больше вероятность 5*
+            # Если пляжные - добавляем пляжную тематику в название
+            elif variant == "beach":
+                mock_tour_data["hotelname"] = f"BEACH {destination['name'].upper()} RESORT {region.upper()} {i+1}"
+            
+            # Данные собраны из доверенных литералов - валидация Pydantic не нужна
+            mock_tours.append(HotTourInfo.model_construct(**mock_tour_data))
         
-        logger.info(f"🎭 Создано {len(mock_tours)} умных mock-туров")
+        logger.info("🎭 Создано %s умных mock-туров", len(mock_tours))
         return mock_tours
     
     async def get_random_tours_status(self) -> Dict[str, Any]:
         """Получение статуса системы случайных туров"""
         try:
-            # Проверяем кэш
-            cache_keys = await self.cache.get_keys_pattern("random_tours_count_*")
+            # Проверка кэша и API независимы - выполняем параллельно
+            cache_keys, api_status = await asyncio.gather(
+                self.cache.get_keys_pattern("random_tours_count_*"),
+                self._probe_api_status()
+            )
             
-            status = {
+            return {
                 "cache_status": {
                     "cached_variants": len(cache_keys),
                     "cache_keys": cache_keys
@@ -559,30 +607,32 @@ class RandomToursService:
                     "search": "Получение через обычный поиск (медленно)",
                     "mock": "Создание mock-данных (гарантированно)"
                 },
-                "api_status": "unknown"
+                "api_status": api_status
             }
             
-            # Проверяем API
-            try:
-                test_result = await tourvisor_client.test_connection()
-                status["api_status"] = "working" if test_result.get("success") else "error"
-            except:
-                status["api_status"] = "error"
-            
-            return status
-            
         except Exception as e:
             return {"error": str(e)}
     
+    async def _probe_api_status(self) -> str:
+        """Проверка TourVisor API с жестким таймаутом, чтобы статус отвечал быстро"""
+        try:
+            test_result = await asyncio.wait_for(
+                tourvisor_client.test_connection(),
+                timeout=STATUS_PROBE_TIMEOUT
+            )
+            return "working" if test_result.get("success") else "error"
+        except asyncio.TimeoutError:
+            return "degraded"
+        except Exception:
+            return "error"
+    
     async def refresh_random_tours(self, count: int = 6) -> Dict[str, Any]:
         """Принудительное обновление случайных туров"""
         try:
-            logger.info(f"🔄 Принудительное обновление {count} случайных туров")
+            logger.info("🔄 Принудительное обновление %s случайных туров", count)
             
             # Очищаем кэш
-            cache_keys = await self.cache.get_keys_pattern("random_tours_count_*")
-            for key in cache_keys:
-                await self.cache.delete(key)
+            cleared = await self.cache.delete_pattern("random_tours_count_*")
             
             # Генерируем новые туры
             request = RandomTourRequest(count=count)
@@ -591,7 +641,7 @@ class RandomToursService:
             return {
                 "success": True,
                 "message": f"Обновлено {len(new_tours)} случайных туров",
-                "cleared_cache_keys": len(cache_keys),
+                "cleared_cache_keys": cleared,
                 "tours_generated": len(new_tours),
                 "tours_preview": [
                     {
@@ -604,7 +654,7 @@ class RandomToursService:
             }
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при обновлении случайных туров: {e}")
+            logger.error("❌ Ошибка при обновлении случайных туров: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -612,15 +662,11 @@ class RandomToursService:
     
     async def _generate_fully_random_tours(self, request: RandomTourRequest) -> List[HotTourInfo]:
         """Генерация полностью случайных туров без использования кэша"""
-        logger.info(f"🎲 ПРИНУДИТЕЛЬНАЯ ГЕНЕРАЦИЯ {request.count} ПОЛНОСТЬЮ СЛУЧАЙНЫХ ТУРОВ")
+        logger.info("🎲 ПРИНУДИТЕЛЬНАЯ ГЕНЕРАЦИЯ %s ПОЛНОСТЬЮ СЛУЧАЙНЫХ ТУРОВ", request.count)
         
         # Сохраняем запрос для использования в стратегиях фильтрации
         self.current_request = request
         
-        # Расширенные списки для полностью случайных туров
-        self.all_countries = [1, 4, 8, 9, 11, 15, 16, 17, 19, 20, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35]
-        self.all_cities = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
-        
         try:
             random_tours = []
             
@@ -629,22 +675,22 @@ class RandomToursService:
             hot_tours_result = await self._try_fully_random_hot_tours_strategy(request.count)
             if hot_tours_result:
                 random_tours.extend(hot_tours_result)
-                logger.info(f"🔥 Получено {len(hot_tours_result)} туров через горящие туры")
+                logger.info("🔥 Получено %s туров через горящие туры", len(hot_tours_result))
             
             # Уровень 2: Случайный поиск (если нужно больше туров)
             if len(random_tours) < request.count:
                 needed = request.count - len(random_tours)
-                logger.info(f"📍 Уровень 2: Случайный поиск для {needed} туров")
+                logger.info("📍 Уровень 2: Случайный поиск для %s туров", needed)
                 
                 search_tours = await self._try_fully_random_search_strategy(needed)
                 if search_tours:
                     random_tours.extend(search_tours)
-                    logger.info(f"🔍 Добавлено {len(search_tours)} туров через поиск")
+                    logger.info("🔍 Добавлено %s туров через поиск", len(search_tours))
             
             # Уровень 3: Умные mock-туры (заполняем до нужного количества)
             if len(random_tours) < request.count:
                 needed = request.count - len(random_tours)
-                logger.info(f"📍 Уровень 3: Mock-туры для {needed} оставшихся")
+                logger.info("📍 Уровень 3: Mock-туры для %s оставшихся", needed)
                 
                 mock_tours = await self._create_smart_mock_tours(needed)
                 random_tours.extend(mock_tours)
@@ -660,10 +706,10 @@ class RandomToursService:
                     cache_key = f"random_tours_count_{request.count}"
                     await self.cache.set(
                         cache_key,
-                        [tour.dict() for tour in final_tours],
+                        final_tours,
                         ttl=1800  # 30 минут для случайных туров
                     )
-                    logger.info(f"💾 Сохранено {len(final_tours)} сгенерированных туров в кэш")
+                    logger.info("💾 Сохранено %s сгенерированных туров в кэш", len(final_tours))
                     
                     # Также сохраняем по типам отелей если указаны
                     if request.hotel_types:
@@ -674,19 +720,19 @@ class RandomToursService:
                             if filtered_tours:
                                 await self.cache.set(
                                     type_cache_key,
-                                    [tour.dict() for tour in filtered_tours],
+                                    filtered_tours,
                                     ttl=settings.RANDOM_TOURS_CACHE_TTL
                                 )
-                                logger.info(f"💾 Сохранено {len(filtered_tours)} туров типа '{hotel_type}' в кэш")
+                                logger.info("💾 Сохранено %s туров типа '%s' в кэш", len(filtered_tours), hotel_type)
                     
                 except Exception as cache_error:
-                    logger.error(f"❌ Ошибка сохранения сгенерированных туров в кэш: {cache_error}")
+                    logger.error("❌ Ошибка сохранения сгенерированных туров в кэш: %s", cache_error)
 
-            logger.info(f"🏁 ГЕНЕРАЦИЯ ЗАВЕРШЕНА: {len(final_tours)} полностью случайных туров")
+            logger.info("🏁 ГЕНЕРАЦИЯ ЗАВЕРШЕНА: %s полностью случайных туров", len(final_tours))
             return final_tours
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при генерации полностью случайных туров: {e}")
+            logger.error("❌ Ошибка при генерации полностью случайных туров: %s", e)
             # В случае ошибки создаем только mock-туры
             return await self._create_smart_mock_tours(request.count)
 
@@ -699,8 +745,8 @@ class RandomToursService:
             import random
             
             # Случайно выбираем города и страны
-            random_cities = random.sample(self.all_cities, min(5, len(self.all_cities)))
-            random_countries = random.sample(self.all_countries, min(8, len(self.all_countries)))
+            random_cities = random.sample(FULLY_RANDOM_CITIES, 5)
+            random_countries = random.sample(FULLY_RANDOM_COUNTRIES, 8)
             
             for city in random_cities:
                 if len(all_tours) >= needed_count * 2:  # Получаем с запасом
@@ -730,7 +776,7 @@ class RandomToursService:
                     await asyncio.sleep(0.3)
                     
                 except Exception as e:
-                    logger.debug(f"🔥 Ошибка для города {city}: {e}")
+                    logger.debug("🔥 Ошибка для города %s: %s", city, e)
                     continue
             
             # Перемешиваем и возвращаем нужное количество
@@ -741,13 +787,13 @@ class RandomToursService:
             return []
             
         except Exception as e:
-            logger.error(f"🔥 Ошибка полностью случайных горящих туров: {e}")
+            logger.error("🔥 Ошибка полностью случайных горящих туров: %s", e)
             return []
 
     async def _try_fully_random_search_strategy(self, needed_count: int) -> List[HotTourInfo]:
         """Стратегия полностью случайного поиска"""
         try:
-            logger.info(f"🔍 Полностью случайный поиск для {needed_count} туров")
+            logger.info("🔍 Полностью случайный поиск для %s туров", needed_count)
             
             found_tours = []
             import random
@@ -757,8 +803,8 @@ class RandomToursService:
             for i in range(min(needed_count * 2, 10)):  # Не более 10 поисков
                 try:
                     # Случайные параметры
-                    country = random.choice(self.all_countries)
-                    city = random.choice(self.all_cities)
+                    country = random.choice(FULLY_RANDOM_COUNTRIES)
+                    city = random.choice(FULLY_RANDOM_CITIES)
                     nights_from = random.choice([3, 5, 7, 10, 14])
                     nights_to = nights_from + random.choice([0, 3, 7])
                     adults = random.choice([1, 2, 2, 2, 3, 4])  # Чаще 2
@@ -782,20 +828,20 @@ class RandomToursService:
                     # Добавляем фильтрацию по типам отелей
                     if hasattr(self, 'current_request') and self.current_request and self.current_request.hotel_types:
                         hotel_type = random.choice(self.current_request.hotel_types)
-                        if hotel_type in ["beach", "relax", "family", "health", "city", "active", "deluxe"]:
+                        if hotel_type in VALID_HOTEL_TYPES:
                             search_params["hoteltypes"] = hotel_type
                     
                     # Иногда добавляем звездность
                     if random.random() < 0.3:  # 30% вероятность
                         search_params["stars"] = random.choice([3, 4, 5])
                     
-                    logger.debug(f"🔍 Случайный поиск {i+1}: страна {country}, город {city}")
+                    logger.debug("🔍 Случайный поиск %s: страна %s, город %s", i+1, country, city)
                     
                     # Быстрый поиск
                     tour_found = await self._quick_random_search(search_params)
                     if tour_found:
                         found_tours.append(tour_found)
-                        logger.debug(f"✅ Найден случайный тур: {tour_found.hotelname}")
+                        logger.debug("✅ Найден случайный тур: %s", tour_found.hotelname)
                     
                     if len(found_tours) >= needed_count:
                         break
@@ -803,14 +849,14 @@ class RandomToursService:
                     await asyncio.sleep(0.5)
                     
                 except Exception as e:
-                    logger.debug(f"🔍 Ошибка случайного поиска {i+1}: {e}")
+                    logger.debug("🔍 Ошибка случайного поиска %s: %s", i+1, e)
                     continue
             
-            logger.info(f"🔍 Найдено {len(found_tours)} туров через случайный поиск")
+            logger.info("🔍 Найдено %s туров через случайный поиск", len(found_tours))
             return found_tours
             
         except Exception as e:
-            logger.error(f"🔍 Ошибка полностью случайного поиска: {e}")
+            logger.error("🔍 Ошибка полностью случайного поиска: %s", e)
             return []
 
     async def _quick_random_search(self, search_params: Dict[str, Any]) -> Optional[HotTourInfo]:
@@ -823,7 +869,7 @@ class RandomToursService:
                 await asyncio.sleep(1)
                 
                 status_result = await tourvisor_client.get_search_status(request_id)
-                status_data = status_result.get("data", {}).get("status", {})
+                status_data = (status_result.get("data") or {}).get("status") or {}
                 
                 # Прерываем если есть хоть что-то
                 hotels_found = int(status_data.get("hotelsfound", 0)) if status_data.get("hotelsfound") else 0
@@ -860,7 +906,7 @@ class RandomToursService:
             return HotTourInfo(**hot_tour_data)
             
         except Exception as e:
-            logger.debug(f"❌ Ошибка быстрого случайного поиска: {e}")
+            logger.debug("❌ Ошибка быстрого случайного поиска: %s", e)
             return None
 
     def _filter_tours_by_hotel_types(self, tours_list: List[Dict]) -> List[Dict]:
@@ -905,27 +951,36 @@ class RandomToursService:
                 cache_key = f"random_tours_count_{request.count}"
                 cached_data = await self.cache.get(cache_key)
                 if cached_data:
-                    return [HotTourInfo(**tour_data) for tour_data in cached_data]
+                    # Кэш пишет только этот сервис из готовых HotTourInfo - повторная валидация не нужна
+                    return [HotTourInfo.model_construct(**tour_data) for tour_data in cached_data]
                 return []
             
             # Если есть фильтрация, собираем туры из разных кэшей по типам
             all_filtered_tours = []
             
+            # Все возможные ключи по типам и размерам читаем одним пакетным запросом
+            cache_counts = (6, 8, 10)
+            cached_by_key = await self.cache.get_multiple([
+                f"random_tours_type_{hotel_type}_count_{count}"
+                for hotel_type in request.hotel_types
+                for count in cache_counts
+            ])
+            
             for hotel_type in request.hotel_types:
                 # Пробуем разные размеры кэша для этого типа
-                for count in [6, 8, 10]:
+                for count in cache_counts:
                     cache_key = f"random_tours_type_{hotel_type}_count_{count}"
-                    cached_data = await self.cache.get(cache_key)
+                    cached_data = cached_by_key.get(cache_key)
                     
                     if cached_data:
-                        logger.debug(f"🏨 Найден кэш для типа '{hotel_type}': {len(cached_data)} туров")
+                        logger.debug("🏨 Найден кэш для типа '%s': %d туров", hotel_type, len(cached_data))
                         
                         for tour_data in cached_data:
                             try:
                                 tour = HotTourInfo(**tour_data)
                                 all_filtered_tours.append(tour)
                             except Exception as e:
-                                logger.debug(f"Ошибка при создании тура из кэша: {e}")
+                                logger.debug("Ошибка при создании тура из кэша: %s", e)
                                 continue
                         break  # Нашли кэш для этого типа, переходим к следующему
             
@@ -945,36 +1000,29 @@ class RandomToursService:
                         if len(unique_tours) >= request.count * 2:  # Собираем с запасом
                             break
                 
-                logger.info(f"🏨 Собрано {len(unique_tours)} уникальных туров из кэшей типов {request.hotel_types}")
+                logger.info("🏨 Собрано %s уникальных туров из кэшей типов %s", len(unique_tours), request.hotel_types)
                 return unique_tours
             
             return []
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при получении туров из кэша с фильтрацией: {e}")
+            logger.error("❌ Ошибка при получении туров из кэша с фильтрацией: %s", e)
             return []
 
     async def clear_hotel_type_cache(self) -> int:
         """Очистка кэша туров по типам отелей"""
         try:
-            # Очищаем кэш туров по типам
-            type_cache_keys = await self.cache.get_keys_pattern("random_tours_type_*")
-            
-            # Очищаем обычный кэш туров
-            regular_cache_keys = await self.cache.get_keys_pattern("random_tours_count_*")
-            
-            all_keys = type_cache_keys + regular_cache_keys
-            
-            cleared_count = 0
-            for key in all_keys:
-                if await self.cache.delete(key):
-                    cleared_count += 1
+            # Очищаем кэш туров по типам и обычный кэш туров
+            cleared_count = (
+                await self.cache.delete_pattern("random_tours_type_*")
+                + await self.cache.delete_pattern("random_tours_count_*")
+            )
             
-            logger.info(f"🗑️ Очищено {cleared_count} ключей кэша случайных туров (включая типы отелей)")
+            logger.info("🗑️ Очищено %s ключей кэша случайных туров (включая типы отелей)", cleared_count)
             return cleared_count
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при очистке кэша типов отелей: {e}")
+            logger.error("❌ Ошибка при очистке кэша типов отелей: %s", e)
             return 0
     def _tour_matches_type(self, tour: HotTourInfo, hotel_type: str) -> bool:
         """Проверка соответствия тура типу отеля"""
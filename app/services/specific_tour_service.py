@@ -1,6 +1,7 @@
 # app/services/specific_tour_service.py
 
 import asyncio
+import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 
@@ -210,16 +211,16 @@ class SpecificTourService:
             # Ждем завершения поиска (используем существующую логику)
             logger.info(f"⏳ Ждем завершения поиска...")
             max_wait_time = 45  # Увеличиваем до 45 секунд
-            start_wait = datetime.now()
+            start_wait = time.perf_counter()
             
             final_results = None
             
-            while (datetime.now() - start_wait).total_seconds() < max_wait_time:
+            while time.perf_counter() - start_wait < max_wait_time:
                 try:
                     status_result = await tourvisor_client.get_search_status(request_id)
                     
                     if status_result:
-                        status_data = status_result.get("data", {}).get("status", {})
+                        status_data = (status_result.get("data") or {}).get("status") or {}
                         state = status_data.get("state", "")
                         hotels_found = status_data.get("hotelsfound", 0)
                         
@@ -247,7 +248,7 @@ class SpecificTourService:
                             logger.info(f"🎯 Найдено достаточно отелей ({hotels_found}), получаем результаты")
                             try:
                                 final_results = await tourvisor_client.get_search_results(request_id)
-                                if final_results and final_results.get("data", {}).get("result"):
+                                if final_results and (final_results.get("data") or {}).get("result"):
                                     logger.info(f"✅ Получены промежуточные результаты с {hotels_found} отелями")
                                     break
                                 else:
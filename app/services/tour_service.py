@@ -1,6 +1,5 @@
-import asyncio
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import date
 import time
 from app.core.tourvisor_client import tourvisor_client
 from app.services.cache_service import cache_service
@@ -8,15 +7,86 @@ from app.models.tour import (
     TourSearchRequest, SearchResponse, SearchResult, SearchStatus,
     HotelInfo, TourInfo, TourActualizationRequest, DetailedTourInfo
 )
+from app.utils.dates import format_date_offset
 from app.utils.logger import setup_logger
+from app.utils.singleflight import SingleFlight
 
 logger = setup_logger(__name__)
 
+# Названия стран по коду TourVisor
+COUNTRY_NAMES = {
+    1: "Египет",
+    4: "Турция",
+    8: "Греция",
+    9: "Кипр",
+    11: "Болгария",
+    15: "ОАЭ",
+    16: "Тунис",
+    17: "Черногория",
+    19: "Испания",
+    20: "Италия",
+    22: "Таиланд",
+    23: "Индия",
+    24: "Шри-Ланка",
+    25: "Вьетнам",
+    26: "Китай",
+    27: "Индонезия",
+    28: "Малайзия",
+    29: "Сингапур",
+    30: "Филиппины",
+    31: "Маврикий",
+    32: "Сейшелы",
+    33: "Танзания",
+    34: "Кения",
+    35: "Мальдивы"
+}
+
+# Названия городов вылета по коду TourVisor
+CITY_NAMES = {
+    1: "Москва",
+    2: "Пермь",
+    3: "Екатеринбург",
+    4: "Уфа",
+    5: "Санкт-Петербург",
+    6: "Казань",
+    7: "Нижний Новгород",
+    8: "Самара",
+    9: "Ростов-на-Дону",
+    10: "Краснодар",
+    11: "Волгоград",
+    12: "Воронеж",
+    13: "Саратов",
+    14: "Тольятти",
+    15: "Ижевск"
+}
+
+# Названия городов вылета в родительном падеже
+CITY_NAMES_FROM = {
+    1: "Москвы",
+    2: "Перми",
+    3: "Екатеринбурга",
+    4: "Уфы",
+    5: "Санкт-Петербурга",
+    6: "Казани",
+    7: "Нижнего Новгорода",
+    8: "Самары",
+    9: "Ростова-на-Дону",
+    10: "Краснодара",
+    11: "Волгограда",
+    12: "Воронежа",
+    13: "Саратова",
+    14: "Тольятти",
+    15: "Ижевска"
+}
+
 class TourService:
     """Основной сервис для работы с турами"""
     
     def __init__(self):
         self.cache = cache_service
+        # actdetail.php зависит только от tour_id: одновременные актуализации одного тура
+        # (из /tour/{id}, /actualize с любыми request_check/currency) делают один запрос
+        self._detailed_actualization_flights = SingleFlight()
         
     async def search_tours(self, search_request: TourSearchRequest) -> SearchResponse:
         """Запуск поиска туров"""
@@ -26,12 +96,10 @@ class TourService:
             
             # Автоматическое заполнение дат если не указаны
             if not search_params.get("datefrom"):
-                tomorrow = datetime.now() + timedelta(days=1)
-                search_params["datefrom"] = tomorrow.strftime("%d.%m.%Y")
+                search_params["datefrom"] = format_date_offset(date.today(), 1)
             
             if not search_params.get("dateto"):
-                week_later = datetime.now() + timedelta(days=8)
-                search_params["dateto"] = week_later.strftime("%d.%m.%Y")
+                search_params["dateto"] = format_date_offset(date.today(), 8)
             
             request_id = await tourvisor_client.search_tours(search_params)
             
@@ -45,14 +113,14 @@ class TourService:
             return SearchResponse(request_id=request_id)
             
         except Exception as e:
-            logger.error(f"Ошибка при запуске поиска туров: {e}")
+            logger.error("Ошибка при запуске поиска туров: %s", e)
             raise
     
     async def get_search_status(self, request_id: str) -> SearchStatus:
         """Получение статуса поиска"""
         try:
             result = await tourvisor_client.get_search_status(request_id)
-            status_data = result.get("data", {}).get("status", {})
+            status_data = (result.get("data") or {}).get("status") or {}
             
             return SearchStatus(
                 state=status_data.get("state", "searching"),
@@ -64,7 +132,7 @@ class TourService:
             )
             
         except Exception as e:
-            logger.error(f"Ошибка при получении статуса поиска: {e}")
+            logger.error("Ошибка при получении статуса поиска: %s", e)
             raise
     
     async def get_search_results(self, request_id: str, page: int = 1, onpage: int = 25) -> SearchResult:
@@ -112,7 +180,7 @@ class TourService:
             return SearchResult(status=status, result=hotels)
             
         except Exception as e:
-            logger.error(f"Ошибка при получении результатов поиска: {e}")
+            logger.error("Ошибка при получении результатов поиска: %s", e)
             raise
     
     async def continue_search(self, request_id: str) -> Dict[str, Any]:
@@ -120,7 +188,7 @@ class TourService:
         try:
             return await tourvisor_client.continue_search(request_id)
         except Exception as e:
-            logger.error(f"Ошибка при продолжении поиска: {e}")
+            logger.error("Ошибка при продолжении поиска: %s", e)
             raise
     
         
@@ -130,28 +198,31 @@ class TourService:
         """Актуализация тура с детальным логированием"""
         try:
             # 🔍 КРИТИЧЕСКИ ВАЖНОЕ ЛОГИРОВАНИЕ
-            logger.error(f"🆔 TOUR_ID ЗАПРОС: {request.tour_id}")
-            logger.error(f"🆔 REQUEST_CHECK: {request.request_check}")
-            logger.error(f"🆔 CURRENCY: {request.currency}")
+            logger.error("🆔 TOUR_ID ЗАПРОС: %s", request.tour_id)
+            logger.error("🆔 REQUEST_CHECK: %s", request.request_check)
+            logger.error("🆔 CURRENCY: %s", request.currency)
             
             # Время начала для измерения производительности
-            start_time = time.time()
+            start_time = time.perf_counter()
             
-            logger.info(f"🔍 Начинаем актуализацию тура {request.tour_id}")
+            logger.info("🔍 Начинаем актуализацию тура %s", request.tour_id)
             
             # ТОЛЬКО ОДИН запрос - actdetail.php
-            detailed_info = await tourvisor_client.get_detailed_actualization(request.tour_id)
+            detailed_info = await self._detailed_actualization_flights.do(
+                request.tour_id,
+                lambda: tourvisor_client.get_detailed_actualization(request.tour_id)
+            )
             
-            end_time = time.time()
-            logger.error(f"⏱️ ВРЕМЯ ВЫПОЛНЕНИЯ: {end_time - start_time:.2f} секунд")
+            end_time = time.perf_counter()
+            logger.error("⏱️ ВРЕМЯ ВЫПОЛНЕНИЯ: %.2f секунд", end_time - start_time)
             
             # Проверяем что получили
             if not detailed_info:
-                logger.error(f"❌ ПУСТОЙ ОТВЕТ от actdetail.php для tour_id: {request.tour_id}")
+                logger.error("❌ ПУСТОЙ ОТВЕТ от actdetail.php для tour_id: %s", request.tour_id)
                 return DetailedTourInfo(tour={}, flights=[], tourinfo={})
             
             # Логируем структуру ответа  
-            logger.error(f"📊 КЛЮЧИ В ОТВЕТЕ: {list(detailed_info.keys()) if isinstance(detailed_info, dict) else 'НЕ СЛОВАРЬ'}")
+            logger.error("📊 КЛЮЧИ В ОТВЕТЕ: %s", list(detailed_info.keys()) if isinstance(detailed_info, dict) else 'НЕ СЛОВАРЬ')
             
             # Извлекаем данные
             tour_data = detailed_info.get("tour", {})
@@ -159,17 +230,17 @@ class TourService:
             tourinfo_data = detailed_info.get("tourinfo", {})
             
             # Логируем количество рейсов
-            logger.error(f"✈️ КОЛИЧЕСТВО ВАРИАНТОВ РЕЙСОВ: {len(flights_data) if isinstance(flights_data, list) else 'НЕ СПИСОК'}")
+            logger.error("✈️ КОЛИЧЕСТВО ВАРИАНТОВ РЕЙСОВ: %s", len(flights_data) if isinstance(flights_data, list) else 'НЕ СПИСОК')
             
             # Если нет tour данных в actdetail, берем из actualize.php
             if not tour_data:
-                logger.warning(f"⚠️ НЕТ tour данных в actdetail.php, делаем fallback запрос")
+                logger.warning("⚠️ НЕТ tour данных в actdetail.php, делаем fallback запрос")
                 basic_info = await tourvisor_client.actualize_tour(
                     request.tour_id,
                     request.request_check
                 )
-                tour_data = basic_info.get("data", {}).get("tour", {}) if basic_info else {}
-                logger.error(f"📋 FALLBACK tour данные получены: {bool(tour_data)}")
+                tour_data = ((basic_info or {}).get("data") or {}).get("tour") or {}
+                logger.error("📋 FALLBACK tour данные получены: %s", bool(tour_data))
             
             # Обрабатываем flights как есть, без изменений
             processed_flights = []
@@ -177,7 +248,7 @@ class TourService:
                 for i, flight_group in enumerate(flights_data):
                     if isinstance(flight_group, dict):
                         # Логируем каждый рейс для отладки
-                        logger.error(f"✈️ РЕЙС {i+1}: {flight_group.get('dateforward')} → {flight_group.get('datebackward')}, default: {flight_group.get('isdefault')}")
+                        logger.error("✈️ РЕЙС %s: %s → %s, default: %s", i+1, flight_group.get('dateforward'), flight_group.get('datebackward'), flight_group.get('isdefault'))
                         
                         processed_flights.append({
                             "forward": flight_group.get("forward", []),
@@ -195,12 +266,12 @@ class TourService:
                 tourinfo=tourinfo_data
             )
             
-            logger.error(f"✅ ИТОГ: tour_id={request.tour_id}, рейсов={len(processed_flights)}, tour_данных={bool(tour_data)}")
+            logger.error("✅ ИТОГ: tour_id=%s, рейсов=%s, tour_данных=%s", request.tour_id, len(processed_flights), bool(tour_data))
             return result
             
         except Exception as e:
-            logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА tour_id {request.tour_id}: {e}")
-            logger.error(f"❌ ТИП ОШИБКИ: {type(e)}")
+            logger.error("❌ КРИТИЧЕСКАЯ ОШИБКА tour_id %s: %s", request.tour_id, e)
+            logger.error("❌ ТИП ОШИБКИ: %s", type(e))
             raise
     async def search_tour_by_id(self, tour_id: str) -> Optional[Dict[str, Any]]:
         """Поиск тура по ID"""
@@ -209,7 +280,7 @@ class TourService:
                 TourActualizationRequest(tour_id=tour_id, request_check=2)
             )
         except Exception as e:
-            logger.error(f"Ошибка при поиске тура по ID: {e}")
+            logger.error("Ошибка при поиске тура по ID: %s", e)
             return None
     
     async def search_tours_by_hotel_name(self, hotel_name: str, country_code: int) -> List[HotelInfo]:
@@ -248,12 +319,8 @@ class TourService:
                 
                 search_response = await self.search_tours(search_request)
                 
-                # Ждем завершения поиска
-                for _ in range(10):  # Максимум 10 попыток
-                    await asyncio.sleep(1)
-                    status = await self.get_search_status(search_response.request_id)
-                    if status.state == "finished":
-                        break
+                # Ждем завершения поиска (не дольше ~10 секунд)
+                await tourvisor_client.wait_for_search(search_response.request_id)
                 
                 # Получаем результаты
                 search_results = await self.get_search_results(search_response.request_id)
@@ -263,80 +330,20 @@ class TourService:
             return results
             
         except Exception as e:
-            logger.error(f"Ошибка при поиске туров по названию отеля: {e}")
+            logger.error("Ошибка при поиске туров по названию отеля: %s", e)
             return []
 
     def _get_country_name(self, country_code: int) -> str:
         """Получение названия страны по коду (расширенный список)"""
-        country_map = {
-            1: "Египет",
-            4: "Турция", 
-            8: "Греция",
-            9: "Кипр",
-            11: "Болгария",
-            15: "ОАЭ",
-            16: "Тунис",
-            17: "Черногория",
-            19: "Испания",
-            20: "Италия",
-            22: "Таиланд",
-            23: "Индия",
-            24: "Шри-Ланка",
-            25: "Вьетнам",
-            26: "Китай",
-            27: "Индонезия",
-            28: "Малайзия",
-            29: "Сингапур",
-            30: "Филиппины",
-            31: "Маврикий",
-            32: "Сейшелы",
-            33: "Танзания",
-            34: "Кения",
-            35: "Мальдивы"
-        }
-        return country_map.get(country_code, f"Страна {country_code}")
+        return COUNTRY_NAMES.get(country_code, f"Страна {country_code}")
     
     def _get_city_name(self, city_code: int) -> str:
         """Получение названия города по коду (расширенный список)"""
-        city_map = {
-            1: "Москва",
-            2: "Пермь", 
-            3: "Екатеринбург",
-            4: "Уфа",
-            5: "Санкт-Петербург",
-            6: "Казань",
-            7: "Нижний Новгород",
-            8: "Самара",
-            9: "Ростов-на-Дону",
-            10: "Краснодар",
-            11: "Волгоград",
-            12: "Воронеж",
-            13: "Саратов",
-            14: "Тольятти",
-            15: "Ижевск"
-        }
-        return city_map.get(city_code, f"Город {city_code}")
+        return CITY_NAMES.get(city_code, f"Город {city_code}")
     
     def _get_city_name_from(self, city_code: int) -> str:
         """Получение названия города в родительном падеже (расширенный список)"""
-        city_map = {
-            1: "Москвы",
-            2: "Перми",
-            3: "Екатеринбурга", 
-            4: "Уфы",
-            5: "Санкт-Петербурга",
-            6: "Казани",
-            7: "Нижнего Новгорода",
-            8: "Самары",
-            9: "Ростова-на-Дону",
-            10: "Краснодара",
-            11: "Волгограда",
-            12: "Воронежа",
-            13: "Саратова",
-            14: "Тольятти",
-            15: "Ижевска"
-        }
-        return city_map.get(city_code, f"Города {city_code}")
+        return CITY_NAMES_FROM.get(city_code, f"Города {city_code}")
 
 # Создаем экземпляр основного сервиса
 tour_service = TourService()
\ No newline at end of file
@@ -1,13 +1,14 @@
 import asyncio
-from datetime import datetime, timedelta
+from datetime import date
 from typing import List, Dict, Any
 
 from app.core.tourvisor_client import tourvisor_client
 from app.services.cache_service import cache_service
 from app.config import settings
+from app.utils.dates import format_date_offset
 from app.utils.logger import setup_logger
 from app.services.random_tours_service import random_tours_service
-from app.models.tour import RandomTourRequest
+from app.models.tour import RandomTourRequest, HotelTypeEnum
 
 logger = setup_logger(__name__)
 
@@ -56,7 +57,7 @@ class CacheWarmupService:
         """Прогрев случайных туров по всем типам отелей"""
         logger.info("🏨 Прогрев случайных туров по типам отелей...")
         
-        hotel_types = ["active", "relax", "family", "health", "city", "beach", "deluxe"]
+        hotel_types = [hotel_type.value for hotel_type in HotelTypeEnum]
         tour_counts = [6, 8, 10]  # Разные количества туров
         
         for hotel_type in hotel_types:
@@ -75,7 +76,7 @@ class CacheWarmupService:
                         cache_key = f"random_tours_type_{hotel_type}_count_{count}"
                         await cache_service.set(
                             cache_key,
-                            [tour.dict() for tour in tours],
+                            tours,
                             ttl=settings.RANDOM_TOURS_CACHE_TTL
                         )
                         
@@ -118,10 +119,10 @@ class CacheWarmupService:
         ]
         
         # Даты на ближайшие 2 недели
-        today = datetime.now()
+        today = date.today()
         date_range = {
-            "datefrom": (today + timedelta(days=7)).strftime("%d.%m.%Y"),
-            "dateto": (today + timedelta(days=14)).strftime("%d.%m.%Y")
+            "datefrom": format_date_offset(today, 7),
+            "dateto": format_date_offset(today, 14)
         }
         
         for i, search_params in enumerate(search_combinations):
@@ -130,34 +131,20 @@ class CacheWarmupService:
                 
                 logger.info(f"🔍 Поиск {i+1}/3: страна {search_params['country']} из города {search_params['departure']}")
                 
-                # Запускаем поиск
-                request_id = await tourvisor_client.search_tours(full_params)
+                # Запускаем поиск и ждем результатов (максимум ~10 секунд)
+                _, results = await tourvisor_client.search_and_wait(full_params, 1, 10)
+                status = (results.get("data") or {}).get("status") or {}
                 
-                # Ждем завершения поиска (максимум 15 секунд)
-                max_wait_time = 15
-                wait_count = 0
-                
-                while wait_count < max_wait_time:
-                    await asyncio.sleep(2)
-                    wait_count += 2
+                if status.get("state") == "finished":
+                    # Кэшируем результаты
+                    cache_key = f"popular_search:{search_params['country']}_{search_params['departure']}_{search_params['nightsfrom']}"
+                    await cache_service.set(
+                        cache_key,
+                        results,
+                        ttl=settings.POPULAR_TOURS_CACHE_TTL
+                    )
                     
-                    status_result = await tourvisor_client.get_search_status(request_id)
-                    status = status_result.get("data", {}).get("status", {})
-                    
-                    if status.get("state") == "finished":
-                        # Получаем результаты
-                        results = await tourvisor_client.get_search_results(request_id, 1, 10)
-                        
-                        # Кэшируем результаты
-                        cache_key = f"popular_search:{search_params['country']}_{search_params['departure']}_{search_params['nightsfrom']}"
-                        await cache_service.set(
-                            cache_key,
-                            results,
-                            ttl=settings.POPULAR_TOURS_CACHE_TTL
-                        )
-                        
-                        logger.info(f"✅ Закэширован поиск: страна {search_params['country']}")
-                        break
+                    logger.info(f"✅ Закэширован поиск: страна {search_params['country']}")
                 
                 # Задержка между поисками
                 await asyncio.sleep(1)
@@ -192,8 +192,8 @@ class DirectionsCacheUpdateService:
             execution_time = (end_time - start_time).total_seconds()
             
             # Анализ качества результатов
-            with_prices = len([d for d in directions if d.get("min_price")])
-            with_images = len([d for d in directions if d.get("image_link")])
+            summary = directions_service.summarize_directions(directions)
+            with_prices, with_images = summary["with_prices"], summary["with_images"]
             
             # Проверяем, что получили данные
             if directions:
@@ -219,16 +219,18 @@ class DirectionsCacheUpdateService:
                     
                     # Восстанавливаем старый кеш с новым TTL
                     await cache_service.set(cache_key, old_cache, ttl=86400 * 30)
+                    await directions_service.bump_version()
+                    summary = directions_service.summarize_directions(old_cache)
                     
                     return {
                         "success": True,
                         "directions_count": len(old_cache),
                         "execution_time_seconds": execution_time,
                         "quality_stats": {
-                            "with_prices": len([d for d in old_cache if d.get("min_price")]),
-                            "with_images": len([d for d in old_cache if d.get("image_link")]),
-                            "price_coverage": f"{(len([d for d in old_cache if d.get('min_price')])/len(old_cache)*100):.1f}%",
-                            "image_coverage": f"{(len([d for d in old_cache if d.get('image_link')])/len(old_cache)*100):.1f}%"
+                            "with_prices": summary["with_prices"],
+                            "with_images": summary["with_images"],
+                            "price_coverage": f"{(summary['with_prices']/len(old_cache)*100):.1f}%",
+                            "image_coverage": f"{(summary['with_images']/len(old_cache)*100):.1f}%"
                         },
                         "cache_action": "kept_old_cache"
                     }
@@ -252,7 +254,9 @@ class DirectionsCacheUpdateService:
             if old_cache:
                 try:
                     await cache_service.set(cache_key, old_cache, ttl=86400 * 30)
+                    await directions_service.bump_version()
                     logger.info(f"🔄 Восстановлен старый кеш для {country_name} после ошибки")
+                    summary = directions_service.summarize_directions(old_cache)
                     
                     return {
                         "success": True,  # Считаем успехом, так как данные есть
@@ -261,8 +265,8 @@ class DirectionsCacheUpdateService:
                         "error": str(e),
                         "cache_action": "restored_old_cache_after_error",
                         "quality_stats": {
-                            "with_prices": len([d for d in old_cache if d.get("min_price")]),
-                            "with_images": len([d for d in old_cache if d.get("image_link")]),
+                            "with_prices": summary["with_prices"],
+                            "with_images": summary["with_images"],
                         }
                     }
                 except Exception as restore_error:
@@ -302,6 +306,7 @@ class DirectionsCacheUpdateService:
             # Очищаем кеш принудительно
             cache_key = f"directions_with_prices_country_{country_id}"
             await cache_service.delete(cache_key)
+            await directions_service.bump_version()
             logger.info(f"🗑️ Очищен кеш для {country_name}")
             
             # Обновляем данные
@@ -1,6 +1,7 @@
 # app/tasks/random_tours_cache_update.py - ОПТИМИЗИРОВАННАЯ ВЕРСИЯ
 
 import asyncio
+import time
 import logging
 import json
 from datetime import datetime, timedelta
@@ -16,9 +17,35 @@ import os
 
 logger = setup_logger(__name__)
 
+# Стратегии генерации с реальными данными TourVisor (остальные - mock)
+REAL_TOUR_STRATEGIES = frozenset({"search", "hot_tours"})
+
 class RandomToursCacheUpdateService:
     """Сервис для автоматического обновления кэша случайных туров"""
     
+    @staticmethod
+    def summarize_tours(tours: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Качество закэшированных туров за один проход
+
+        Returns:
+            real_tours (число реальных туров), has_descriptions и has_tours_data
+        """
+        real_tours = 0
+        has_descriptions = False
+        has_tours_data = False
+        for tour in tours:
+            if tour.get("generation_strategy") in REAL_TOUR_STRATEGIES:
+                real_tours += 1
+            has_descriptions = has_descriptions or bool(tour.get("hoteldescriptions"))
+            has_tours_data = has_tours_data or bool(tour.get("tours"))
+        
+        return {
+            "real_tours": real_tours,
+            "has_descriptions": has_descriptions,
+            "has_tours_data": has_tours_data
+        }
+    
     def __init__(self):
         self.update_interval = int(os.getenv("RANDOM_TOURS_UPDATE_INTERVAL_HOURS", "12")) * 3600
         self.tours_per_type = int(os.getenv("RANDOM_TOURS_PER_TYPE", "8"))
@@ -203,7 +230,7 @@ class RandomToursCacheUpdateService:
                     strategy = tour.get("generation_strategy", "unknown")
                     strategies_used[strategy] = strategies_used.get(strategy, 0) + 1
                     
-                    if strategy in ["search", "hot_tours"]:
+                    if strategy in REAL_TOUR_STRATEGIES:
                         real_tours += 1
                     else:
                         mock_tours += 1
@@ -381,7 +408,7 @@ class RandomToursCacheUpdateService:
             logger.info(f"🚀 Поиск {request_id} запущен для {display_name}")
             
             # Ждем до завершения (без ограничения времени)
-            start_time = datetime.now()
+            start_time = time.perf_counter()
             
             while True:
                 try:
@@ -390,12 +417,12 @@ class RandomToursCacheUpdateService:
                     api_calls_made += 1
                     
                     if status_result:
-                        status_data = status_result.get("data", {}).get("status", {})
+                        status_data = (status_result.get("data") or {}).get("status") or {}
                         state = status_data.get("state", "")
                         hotels_found = int(status_data.get("hotelsfound", 0))
                         progress = int(status_data.get("progress", 0))
                         
-                        elapsed = (datetime.now() - start_time).total_seconds()
+                        elapsed = time.perf_counter() - start_time
                         logger.info(f"📊 Поиск {request_id} для {display_name}: {state}, {progress}%, отелей: {hotels_found}, время: {elapsed:.0f}с")
                         
                         # Завершаем только при статусе finished или error
@@ -418,7 +445,7 @@ class RandomToursCacheUpdateService:
                     await asyncio.sleep(5)
                     
                     # Если ошибки статуса повторяются долго, завершаем
-                    if (datetime.now() - start_time).total_seconds() > 300:  # 5 минут
+                    if time.perf_counter() - start_time > 300:  # 5 минут
                         logger.warning(f"⏰ Слишком много ошибок статуса для {display_name}, завершаем")
                         break
             
@@ -485,15 +512,15 @@ class RandomToursCacheUpdateService:
             
             # Ждем с увеличенным таймаутом (3 минуты)
             max_wait_time = 180  # 3 минуты
-            start_wait = datetime.now()
+            start_wait = time.perf_counter()
             
-            while (datetime.now() - start_wait).total_seconds() < max_wait_time:
+            while time.perf_counter() - start_wait < max_wait_time:
                 try:
                     status_result = await tourvisor_client.get_search_status(request_id)
                     api_calls_made += 1
                     
                     if status_result:
-                        status_data = status_result.get("data", {}).get("status", {})
+                        status_data = (status_result.get("data") or {}).get("status") or {}
                         state = status_data.get("state", "")
                         hotels_found = int(status_data.get("hotelsfound", 0))
                         progress = int(status_data.get("progress", 0))
@@ -1008,25 +1035,14 @@ class RandomToursCacheUpdateService:
             logger.info("🗑️ Очистка кэша случайных туров")
             
             hotel_types = list(self.hotel_types_mapping.keys())
-            cleared_count = 0
             
-            for hotel_type_key in hotel_types:
-                cache_key_suffix = self.hotel_types_mapping[hotel_type_key]["cache_key"]
-                cache_key = f"random_tours_{cache_key_suffix}"
-                try:
-                    await cache_service.delete(cache_key)
-                    cleared_count += 1
-                except Exception as e:
-                    logger.warning(f"⚠️ Не удалось очистить ключ {cache_key}: {e}")
-            
-            # Очищаем общий кэш
-            general_keys = ["random_tours", "random_tours_stats", "random_tours_cache_update_stats"]
-            for key in general_keys:
-                try:
-                    await cache_service.delete(key)
-                    cleared_count += 1
-                except:
-                    pass
+            # Ключи всех типов отелей и общий кэш удаляем одной командой
+            cache_keys = [
+                f"random_tours_{self.hotel_types_mapping[hotel_type_key]['cache_key']}"
+                for hotel_type_key in hotel_types
+            ]
+            cache_keys.extend(["random_tours", "random_tours_stats", "random_tours_cache_update_stats"])
+            cleared_count = await cache_service.delete_many(cache_keys)
             
             return {
                 "success": True,
@@ -1051,19 +1067,26 @@ class RandomToursCacheUpdateService:
             
             cache_details = {}
             
+            # Все типы отелей читаем из Redis одним пакетным запросом
+            cache_keys = {
+                hotel_type_key: f"random_tours_{self.hotel_types_mapping[hotel_type_key]['cache_key']}"
+                for hotel_type_key in hotel_types
+            }
+            cached_by_key = await cache_service.get_multiple(list(cache_keys.values()))
+            
             for hotel_type_key in hotel_types:
                 hotel_type_info = self.hotel_types_mapping[hotel_type_key]
                 display_name = hotel_type_info["display_name"]
-                cache_key_suffix = hotel_type_info["cache_key"]
-                cache_key = f"random_tours_{cache_key_suffix}"
+                cache_key = cache_keys[hotel_type_key]
                 
                 try:
-                    cached_tours = await cache_service.get(cache_key)
+                    cached_tours = cached_by_key.get(cache_key)
                     if cached_tours:
                         cached_types += 1
                         total_tours += len(cached_tours)
                         
-                        real_tours = len([t for t in cached_tours if t.get("generation_strategy") in ["search", "hot_tours"]])
+                        summary = self.summarize_tours(cached_tours)
+                        real_tours = summary["real_tours"]
                         
                         cache_details[display_name] = {
                             "cached": True,
@@ -1072,8 +1095,8 @@ class RandomToursCacheUpdateService:
                             "quality": f"{(real_tours/len(cached_tours)*100):.1f}%" if cached_tours else "0%",
                             "api_param": hotel_type_info["api_param"],
                             "cache_key": cache_key,
-                            "has_descriptions": any(t.get("hoteldescriptions") for t in cached_tours),
-                            "has_tours_data": any(t.get("tours") for t in cached_tours)
+                            "has_descriptions": summary["has_descriptions"],
+                            "has_tours_data": summary["has_tours_data"]
                         }
                     else:
                         cache_details[display_name] = {
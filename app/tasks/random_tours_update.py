@@ -1,4 +1,5 @@
 import asyncio
+import random
 from typing import List
 
 from app.core.tourvisor_client import tourvisor_client
@@ -10,6 +11,21 @@ from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Статические данные для резервных mock-туров (не пересоздаются на каждый тур)
+FALLBACK_COUNTRIES = (
+    {"id": "1", "name": "Египет"},
+    {"id": "4", "name": "Турция"},
+    {"id": "22", "name": "Таиланд"}
+)
+FALLBACK_DEPARTURES = (
+    {"id": "1", "name": "Москва", "namefrom": "Москвы"},
+    {"id": "2", "name": "Пермь", "namefrom": "Перми"},
+    {"id": "3", "name": "Екатеринбург", "namefrom": "Екатеринбурга"}
+)
+FALLBACK_POPULAR_COUNTRIES = ("Египет", "Турция", "Таиланд", "ОАЭ", "Греция", "Кипр")
+FALLBACK_PICTURE_COLORS = ("4a90e2", "e74c3c")
+FALLBACK_MEALS = ("All Inclusive", "Ultra All Inclusive", "Полупансион")
+
 class RandomToursUpdateService:
     """Сервис для обновления случайных туров через фоновую задачу"""
     
@@ -123,11 +139,9 @@ class RandomToursUpdateService:
     async def _save_tours_to_cache(self, tours: List[HotTourInfo]):
         """Сохранение туров в кэш"""
         try:
-            tours_data = [tour.dict() for tour in tours]
-            
             await cache_service.set(
                 "random_tours_from_search",
-                tours_data,
+                tours,
                 ttl=settings.POPULAR_TOURS_CACHE_TTL
             )
             
@@ -141,53 +155,51 @@ class RandomToursUpdateService:
         try:
             logger.info("🎭 Создание резервных mock-данных...")
             
-            # Получаем реальные справочники
-            countries_data = await tourvisor_client.get_references("country")
-            departures_data = await tourvisor_client.get_references("departure")
+            # Получаем реальные справочники (запросы независимы - выполняем параллельно)
+            countries_data, departures_data = await asyncio.gather(
+                tourvisor_client.get_references("country"),
+                tourvisor_client.get_references("departure")
+            )
             
             countries_list = countries_data.get("lists", {}).get("countries", {}).get("country", [])
             departures_list = departures_data.get("lists", {}).get("departures", {}).get("departure", [])
             
             # Если справочники пустые, используем жестко заданные данные
             if not countries_list:
-                countries_list = [
-                    {"id": "1", "name": "Египет"},
-                    {"id": "4", "name": "Турция"},
-                    {"id": "22", "name": "Таиланд"}
-                ]
+                countries_list = FALLBACK_COUNTRIES
             
             if not departures_list:
-                departures_list = [
-                    {"id": "1", "name": "Москва", "namefrom": "Москвы"},
-                    {"id": "2", "name": "Пермь", "namefrom": "Перми"},
-                    {"id": "3", "name": "Екатеринбург", "namefrom": "Екатеринбурга"}
-                ]
+                departures_list = FALLBACK_DEPARTURES
             
             mock_tours = []
-            popular_countries = ["Египет", "Турция", "Таиланд", "ОАЭ", "Греция", "Кипр"]
+            
+            # Индекс стран по названию (первое вхождение, как при линейном поиске)
+            country_ids_by_name = {}
+            for country in countries_list:
+                country_ids_by_name.setdefault(country.get("name"), country.get("id"))
+            
+            # Случайные смещения цен генерируем заранее одним локальным генератором
+            rng = random.Random()
+            base_offsets = [rng.randint(-8000, 20000) for _ in range(self.target_count)]
+            price_deltas = [rng.randint(5000, 12000) for _ in range(self.target_count)]
             
             for i in range(self.target_count):
                 # Выбираем данные
-                country_name = popular_countries[i % len(popular_countries)]
+                country_name = FALLBACK_POPULAR_COUNTRIES[i % len(FALLBACK_POPULAR_COUNTRIES)]
                 
                 # Находим реальные коды
-                country_code = None
-                for country in countries_list:
-                    if country.get("name") == country_name:
-                        country_code = country.get("id")
-                        break
+                country_code = country_ids_by_name.get(country_name)
                 
                 city_data = departures_list[i % len(departures_list)] if departures_list else {}
                 
-                import random
-                base_price = 40000 + (i * 15000) + random.randint(-8000, 20000)
+                base_price = 40000 + (i * 15000) + base_offsets[i]
                 
                 mock_tour_data = {
-                    "countrycode": country_code or str(i + 1),
+                    "countrycode": str(country_code or i + 1),
                     "countryname": country_name,
-                    "departurecode": city_data.get("id", str((i % 3) + 1)),
-                    "departurename": city_data.get("name", f"Город {i+1}"),
-                    "departurenamefrom": city_data.get("namefrom", f"Города {i+1}"),
+                    "departurecode": str(city_data.get("id") or (i % 3) + 1),
+                    "departurename": str(city_data.get("name") or f"Город {i+1}"),
+                    "departurenamefrom": str(city_data.get("namefrom") or f"Города {i+1}"),
                     "operatorcode": str(10 + i),
                     "operatorname": f"TourOperator {i+1}",
                     "hotelcode": str(200 + i),
@@ -195,23 +207,19 @@ class RandomToursUpdateService:
                     "hotelstars": 3 + (i % 3),
                     "hotelregioncode": str(100 + i),
                     "hotelregionname": f"Курорт {country_name}",
-                    "hotelpicture": f"https://via.placeholder.com/250x150/{'4a90e2' if i % 2 == 0 else 'e74c3c'}/ffffff?text=Resort+{i+1}",
+                    "hotelpicture": f"https://via.placeholder.com/250x150/{FALLBACK_PICTURE_COLORS[i % 2]}/ffffff?text=Resort+{i+1}",
                     "fulldesclink": f"https://example.com/hotel/{200+i}",
                     "flydate": f"{15 + i}.07.2025",
                     "nights": 7 + (i % 7),
-                    "meal": ["All Inclusive", "Ultra All Inclusive", "Полупансион"][i % 3],
+                    "meal": FALLBACK_MEALS[i % 3],
                     "price": float(base_price),
-                    "priceold": float(base_price + random.randint(5000, 12000)),
+                    "priceold": float(base_price + price_deltas[i]),
                     "currency": "RUB"
                 }
                 
-                # Создаем объект HotTourInfo
-                try:
-                    mock_tour = HotTourInfo(**mock_tour_data)
-                    mock_tours.append(mock_tour)
-                except Exception as tour_error:
-                    logger.warning(f"Ошибка при создании mock тура: {tour_error}")
-                    continue
+                # Создаем объект HotTourInfo без валидации: поля из справочников TourVisor
+                # приведены к str выше, иначе из кэша тур не прочитается через HotTourInfo(**...)
+                mock_tours.append(HotTourInfo.model_construct(**mock_tour_data))
             
             # Сохраняем mock-данные в кэш
             await self._save_tours_to_cache(mock_tours)
@@ -0,0 +1,56 @@
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# Порог сжатия, общий с GZipMiddleware приложения
+GZIP_MINIMUM_SIZE = 1024
+
+
+class PrecompressedBody:
+    """
+    Неизменяемое тело ответа, сжатое gzip один раз при создании
+
+    GZipMiddleware не трогает ответы с заголовком Content-Encoding, поэтому
+    статические ответы не сжимаются повторно на каждый запрос. Слабый ETag
+    по содержимому тоже считается один раз.
+    """
+
+    def __init__(self, body: bytes, minimum_size: int = GZIP_MINIMUM_SIZE):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9) if len(body) >= minimum_size else None
+        self.etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+
+    def response(
+        self,
+        request: Request,
+        media_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        """Ответ в сжатом виде, если клиент принимает gzip (304 при совпадении ETag)"""
+        headers = {**(headers or {}), "ETag": self.etag, "Vary": "Accept-Encoding"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        if self.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzip_body, media_type=media_type, headers=headers)
+        return Response(content=self.body, media_type=media_type, headers=headers)
+
+
+def conditional_json_response(
+    request: Request,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    JSON-ответ с ETag по содержимому для динамических данных
+
+    Если клиент прислал тот же ETag в If-None-Match, возвращается 304 без тела.
+    Сжатие таких ответов остается за GZipMiddleware.
+    """
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {**(headers or {}), "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
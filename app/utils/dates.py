@@ -0,0 +1,35 @@
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Формат дат, который принимает TourVisor API
+TOURVISOR_DATE_FORMAT = "%d.%m.%Y"
+
+
+@lru_cache(maxsize=64)
+def format_date_offset(day: date, offset_days: int) -> str:
+    """
+    Дата через offset_days дней от day в формате TourVisor (дд.мм.гггг)
+
+    Вызывается как format_date_offset(date.today(), 7): ключ кэша меняется раз в сутки,
+    поэтому strftime выполняется один раз в день для каждого смещения.
+    """
+    return (day + timedelta(days=offset_days)).strftime(TOURVISOR_DATE_FORMAT)
+
+
+# Последняя отметка времени: [секунда unix-времени, ISO-строка]
+_last_timestamp = [0, ""]
+
+
+def now_iso() -> str:
+    """
+    Текущее время в ISO-формате с точностью до секунды
+
+    Строка формируется не чаще раза в секунду - для часто опрашиваемых
+    endpoint'ов (health, статусы), где секундной точности достаточно.
+    """
+    second = int(time.time())
+    if second != _last_timestamp[0]:
+        _last_timestamp[0] = second
+        _last_timestamp[1] = datetime.fromtimestamp(second).isoformat()
+    return _last_timestamp[1]
@@ -0,0 +1,55 @@
+import functools
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+from fastapi import HTTPException, Request, Response
+
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Тело ответа для непредвиденных ошибок одинаковое - сериализуем один раз
+INTERNAL_ERROR_BODY = orjson.dumps({"detail": "Внутренняя ошибка сервера"})
+
+
+def handle_errors(message: str, detail: Optional[str] = None):
+    """
+    Декоратор для endpoint'ов: логирует ошибку и превращает её в HTTP 500
+
+    HTTPException пробрасывается без изменений
+
+    Args:
+        message: Текст для лога, например "Ошибка при поиске туров".
+            Может ссылаться на параметры endpoint'а: "Ошибка для отеля {hotel_code}"
+        detail: Префикс текста ошибки для клиента ("{detail}: {ошибка}");
+            без него клиент получает только текст ошибки
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        func_logger = setup_logger(func.__module__)
+        # Подстановка параметров нужна только если в сообщении есть плейсхолдеры
+        has_placeholders = "{" in message
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except HTTPException:
+                raise
+            except Exception as e:
+                func_logger.error("%s: %s", message.format(**kwargs) if has_placeholders else message, e)
+                raise HTTPException(status_code=500, detail=f"{detail}: {e}" if detail else str(e))
+
+        return wrapper
+
+    return decorator
+
+
+async def unhandled_exception_handler(request: Request, exc: Exception) -> Response:
+    """
+    Обработчик ошибок, не перехваченных endpoint'ами
+
+    Логирует ошибку с traceback и отдает заранее сериализованный JSON с кодом 500
+    вместо текстового ответа Starlette
+    """
+    logger.error("❌ Необработанная ошибка %s %s: %s", request.method, request.url.path, exc, exc_info=exc)
+    return Response(content=INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов (single-flight)
+
+    Первый вызов с ключом запускает корутину, остальные вызовы с тем же
+    ключом, пришедшие до её завершения, ожидают тот же результат
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнение func() не более одного раза на ключ одновременно
+
+        Args:
+            key: Ключ объединения запросов
+            func: Фабрика корутины, выполняющей реальную работу
+
+        Returns:
+            Результат func() (общий для всех ожидающих)
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        # shield: отмена одного клиента не должна отменять работу для остальных
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Помечаем исключение как полученное, даже если все клиенты ушли
+        if not future.cancelled():
+            future.exception()
+
+    def inflight_count(self) -> int:
+        """Количество выполняющихся в данный момент запросов"""
+        return len(self._inflight)
+
+
+class CachedFlight:
+    """
+    Single-flight с коротким кэшем результата
+
+    Для часто опрашиваемых эндпоинтов статуса: одновременные вызовы объединяются,
+    а готовый результат отдается повторно в течение ttl секунд. Исключения не кэшируются
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._flight = SingleFlight()
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Результат func() из кэша, если он моложе ttl, иначе - один вызов на ключ
+
+        Args:
+            key: Ключ результата
+            func: Фабрика корутины, выполняющей реальную работу
+
+        Returns:
+            Результат func() (общий для всех вызовов в пределах ttl)
+        """
+        cached = self._results.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        return await self._flight.do(key, lambda: self._run(key, func))
+
+    async def _run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        result = await func()
+        self._results[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+    def clear(self):
+        """Сброс сохраненных результатов"""
+        self._results.clear()
@@ -1,6 +1,9 @@
+import orjson
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from unittest.mock import patch, AsyncMock
+from app.main import app, _probe_tourvisor
+from app.utils.singleflight import CachedFlight
 
 client = TestClient(app)
 
@@ -175,4 +178,272 @@ class TestGenerationEndpoints:
             print(f"{method} {endpoint}: {response.status_code}")
             
             # Все endpoints должны быть доступны (200, 400, 404)
-            assert response.status_code < 500  # Не должно быть серверных ошибок
\ No newline at end of file
+            assert response.status_code < 500  # Не должно быть серверных ошибок
+
+class TestDirectionsRefreshJob:
+    """Тесты фонового полного обновления направлений"""
+    
+    def test_refresh_all_runs_in_background(self):
+        """POST /refresh/all сразу отвечает 202, прогресс пишется в кэш"""
+        progress = {}
+        
+        async def fake_set(key, value, ttl=None):
+            progress[key] = value
+            return True
+        
+        async def fake_get(key):
+            return progress.get(key)
+        
+        directions = [{"country_name": "Турция", "country_id": 4, "city_name": "Анталья",
+                       "min_price": 50000, "image_link": None}]
+        
+        with patch("app.api.v1.directions.cache_service.set", side_effect=fake_set), \
+             patch("app.api.v1.directions.cache_service.get", side_effect=fake_get), \
+             patch("app.api.v1.directions.clear_directions_cache", AsyncMock(return_value={})), \
+             patch("app.api.v1.directions.directions_service.get_all_directions", AsyncMock(return_value=directions)):
+            response = client.post("/backend/v1/directions/refresh/all")
+            
+            assert response.status_code == 202
+            data = response.json()
+            assert data["status"] == "queued"
+            assert data["status_url"].endswith(f"/backend/v1/directions/refresh/progress/{data['job_id']}")
+            
+            status = client.get(f"/backend/v1/directions/refresh/progress/{data['job_id']}").json()
+            assert status["status"] == "completed"
+            assert status["statistics"]["total_directions"] == 1
+    
+    def test_refresh_all_joins_running_job(self):
+        """Пока полное обновление идет, повторный запрос получает ту же задачу"""
+        with patch("app.api.v1.directions._active_refresh_job_id", "job42"), \
+             patch("app.api.v1.directions._refresh_all_directions_job", AsyncMock()) as job:
+            response = client.post("/backend/v1/directions/refresh/all")
+        
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "job42"
+        assert response.json()["status"] == "running"
+        job.assert_not_awaited()
+    
+    def test_country_refresh_debounced(self):
+        """Повторное обновление страны сразу после предыдущего не запускает генерацию"""
+        from app.api.v1 import directions as directions_api
+        
+        directions_api._recent_country_refreshes.clear()
+        with patch("app.api.v1.directions.cache_service.delete", AsyncMock(return_value=True)), \
+             patch("app.api.v1.directions.directions_service.get_directions_by_country",
+                   AsyncMock(return_value=[])) as get_directions:
+            first = client.post("/backend/v1/directions/refresh/4")
+            second = client.post("/backend/v1/directions/refresh/4")
+        
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert get_directions.await_count == 1
+    
+    def test_country_refresh_preserializes_get_responses(self):
+        """После обновления страны GET-ответы новой версии отдаются без обращения к сервису"""
+        from app.api.v1 import directions as directions_api
+        
+        directions = [{"country_name": "Египет", "country_id": 1, "city_name": "Хургада",
+                       "min_price": 40000, "image_link": None}]
+        
+        directions_api._recent_country_refreshes.clear()
+        with patch("app.api.v1.directions.cache_service.delete", AsyncMock(return_value=True)), \
+             patch("app.api.v1.directions.cache_service.set_raw", AsyncMock(return_value=True)), \
+             patch.object(directions_api.directions_service, "current_version", AsyncMock(return_value="fresh")), \
+             patch.object(directions_api.directions_service, "get_directions_by_country",
+                          AsyncMock(return_value=directions)) as get_directions:
+            assert client.post("/backend/v1/directions/refresh/1").status_code == 200
+            
+            flat = client.get("/backend/v1/directions/country/1/flat")
+            country = client.get("/backend/v1/directions/country/1")
+        
+        assert get_directions.await_count == 1
+        assert flat.json() == directions
+        assert flat.headers["etag"] == 'W/"fresh"'
+        assert country.json()["total_directions"] == 1
+    
+    def test_refresh_progress_unknown_job(self):
+        """Неизвестная задача обновления - 404"""
+        with patch("app.api.v1.directions.cache_service.get", AsyncMock(return_value=None)):
+            response = client.get("/backend/v1/directions/refresh/progress/unknown")
+        
+        assert response.status_code == 404
+    
+    def test_refresh_progress_streamed_until_finished(self):
+        """Поток прогресса отдает каждое изменение состояния и закрывается после completed"""
+        states = [
+            {"status": "queued"},
+            {"status": "running", "started_at": "2025-06-01T12:00:00"},
+            {"status": "running", "started_at": "2025-06-01T12:00:00"},
+            {"status": "completed", "started_at": "2025-06-01T12:00:00"},
+        ]
+        
+        with patch("app.api.v1.directions.cache_service.get", AsyncMock(side_effect=states)), \
+             patch("app.api.v1.directions.REFRESH_PROGRESS_POLL_SECONDS", 0):
+            response = client.get("/backend/v1/directions/refresh/progress/job1/stream",
+                                  headers={"Accept-Encoding": "gzip"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["content-encoding"] == "identity"
+        events = [line[len("data: "):] for line in response.text.split("\n") if line.startswith("data: ")]
+        assert [orjson.loads(event)["status"] for event in events] == ["queued", "running", "completed"]
+
+
+class TestDirectionsSummary:
+    """Тесты статистики направлений"""
+    
+    def test_summarize_directions(self):
+        """Все показатели считаются за один проход"""
+        from app.services.directions_service import directions_service
+        
+        summary = directions_service.summarize_directions([
+            {"country_id": 4, "min_price": 50000, "image_link": "https://example.com/1.jpg"},
+            {"country_id": 4, "min_price": None, "image_link": "https://example.com/2.jpg"},
+            {"country_id": 1, "min_price": 30000, "image_link": None},
+        ])
+        
+        assert summary == {"with_prices": 2, "with_images": 2, "price_sum": 80000, "countries": 2}
+    
+    def test_summarize_cached_tours(self):
+        """Качество кэша случайных туров считается за один проход"""
+        from app.tasks.random_tours_cache_update import random_tours_cache_update_service
+        
+        summary = random_tours_cache_update_service.summarize_tours([
+            {"generation_strategy": "search", "hoteldescriptions": "У моря"},
+            {"generation_strategy": "hot_tours", "tours": []},
+            {"generation_strategy": "mock"},
+        ])
+        
+        assert summary == {"real_tours": 2, "has_descriptions": True, "has_tours_data": False}
+
+
+class TestHealthProbes:
+    """Тесты параллельных проверок /health"""
+    
+    def test_slow_probe_times_out_without_blocking_others(self):
+        """Зависший компонент помечается unhealthy, остальные проверки отрабатывают"""
+        import asyncio
+        
+        async def hanging_probe():
+            await asyncio.sleep(10)
+        
+        async def failing_probe():
+            raise RuntimeError("redis down")
+        
+        probes = {
+            "cache": failing_probe,
+            "directions": AsyncMock(return_value={"status": "healthy"}),
+            "directions_cache_auto_update": hanging_probe,
+        }
+        with patch("app.main.HEALTH_PROBES", probes), patch("app.main.HEALTH_PROBE_TIMEOUT", 0.05), \
+             patch("app.main._health_status_flights", CachedFlight(ttl=5)):
+            response = client.get("/health")
+        
+        data = response.json()
+        assert data["status"] == "unhealthy"
+        assert data["components"]["directions"] == {"status": "healthy"}
+        assert data["components"]["cache"] == {"status": "unhealthy", "error": "redis down"}
+        assert data["components"]["directions_cache_auto_update"]["status"] == "unhealthy"
+        assert "timeout" in data["components"]["directions_cache_auto_update"]["error"]
+    
+    def test_tourvisor_outage_degrades_status(self):
+        """Недоступный или медленный TourVisor не делает систему unhealthy: данные отдаются из кэша"""
+        import asyncio
+        
+        async def slow_ping():
+            await asyncio.sleep(10)
+        
+        probes = {
+            "cache": AsyncMock(return_value={"status": "healthy"}),
+            "tourvisor": _probe_tourvisor,
+        }
+        with patch("app.main.HEALTH_PROBES", probes), \
+             patch("app.main.tourvisor_client.ping", AsyncMock(side_effect=RuntimeError("502"))), \
+             patch("app.main._health_status_flights", CachedFlight(ttl=5)):
+            data = client.get("/health").json()
+        
+        assert data["status"] == "degraded"
+        assert data["components"]["tourvisor"] == {"status": "degraded", "error": "502"}
+        
+        with patch("app.main.HEALTH_PROBES", probes), patch("app.main.TOURVISOR_PROBE_TIMEOUT", 0.05), \
+             patch("app.main.tourvisor_client.ping", slow_ping), \
+             patch("app.main._health_status_flights", CachedFlight(ttl=5)):
+            data = client.get("/health").json()
+        
+        assert data["status"] == "degraded"
+        assert data["components"]["tourvisor"]["status"] == "degraded"
+        assert "timeout" in data["components"]["tourvisor"]["error"]
+    
+    def test_tourvisor_probe_bypasses_references_cache(self):
+        """Проверка TourVisor не берет ответ из кэша справочников клиента"""
+        import asyncio
+        from app.core.tourvisor_client import TourVisorClient
+        
+        client_instance = TourVisorClient()
+        request = AsyncMock(return_value={"departure": []})
+        with patch.object(client_instance, "_make_request", request), \
+             patch.object(client_instance, "get_references", AsyncMock()) as get_references:
+            assert asyncio.run(client_instance.ping()) is True
+            asyncio.run(client_instance.ping())
+        
+        assert request.await_count == 2
+        get_references.assert_not_awaited()
+    
+    def test_frequent_polls_reuse_recent_status(self):
+        """Повторные опросы /health в пределах TTL не запускают проверки заново"""
+        probe = AsyncMock(return_value={"status": "healthy"})
+        
+        with patch("app.main.HEALTH_PROBES", {"cache": probe}), \
+             patch("app.main._health_status_flights", CachedFlight(ttl=5)):
+            first = client.get("/health").json()
+            second = client.get("/health").json()
+        
+        assert first == second
+        assert probe.await_count == 1
+
+
+class TestApplicationsList:
+    """Тесты списка заявок"""
+    
+    def test_applications_page_read_in_one_batch(self):
+        """Заявки страницы читаются одним get_multiple, пропавшие ключи пропускаются"""
+        stored = {
+            "application:a1": {"id": "a1", "type": "tour", "name": "Анна", "phone": "+7900",
+                               "created_at": "2024-01-01T10:00:00"},
+            "application:a3": {"id": "a3", "type": "tour", "name": "Олег", "phone": "+7901",
+                               "created_at": "2024-01-02T10:00:00"},
+        }
+        with patch("app.api.v1.applications.cache_service") as mock_cache:
+            mock_cache.get = AsyncMock(return_value=["a1", "a2", "a3"])
+            mock_cache.get_multiple = AsyncMock(return_value=stored)
+            response = client.get("/backend/v1/applications/")
+        
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()] == ["a3", "a1"]
+        assert response.json()[0]["created_at"] == "2024-01-02T10:00:00"
+        mock_cache.get_multiple.assert_awaited_once_with(
+            ["application:a1", "application:a2", "application:a3"]
+        )
+
+
+class TestStatusSerialization:
+    """Тесты сериализации статусов обновления кэша"""
+    
+    def test_update_status_serialized_with_datetimes(self):
+        """Статус с datetime отдается напрямую через orjson в ISO-формате"""
+        from datetime import datetime
+        
+        last_update = datetime(2025, 6, 1, 12, 30)
+        status = {"is_running": False, "last_update": last_update, "update_stats": {"countries": 12}}
+        
+        with patch("app.api.v1.random_tours_cache.random_tours_cache_update_service.get_update_status",
+                   AsyncMock(return_value=status)), \
+             patch("fastapi.routing.jsonable_encoder") as encoder:
+            response = client.get("/backend/v1/random-tours/cache/status")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["last_update"] == "2025-06-01T12:30:00"
+        assert data["update_stats"] == {"countries": 12}
+        assert "scheduler_info" in data
+        encoder.assert_not_called()
@@ -1,6 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from unittest.mock import patch, AsyncMock
+from app.services.directions_service import directions_service
 
 client = TestClient(app)
 
@@ -141,4 +143,233 @@ class TestRandomToursAPIReal:
             print(f"Старый endpoint работает: {len(data)} туров")
         else:
             print(f"Старый endpoint: статус {response.status_code}")
-            assert response.status_code in [200, 404]
\ No newline at end of file
+            assert response.status_code in [200, 404]
+    
+    def test_main_page_conditional_request(self):
+        """Повторный запрос главной страницы с ETag получает 304"""
+        response = client.get("/")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "public, max-age=300"
+        
+        cached = client.get("/", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+    def test_hotel_types_cached_response(self):
+        """Тест отдачи типов отелей из заранее сериализованного ответа"""
+        response = client.get("/backend/v1/random-tours/cache/hotel-types")
+        
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=86400"
+        data = response.json()
+        assert data["success"] is True
+        assert "any" in data["hotel_types"]
+
+    def test_directions_conditional_request(self):
+        """Направления с той же версией кэша отдаются как 304"""
+        directions = [{"country_name": "Турция", "country_id": 4, "city_name": "Анталья",
+                       "min_price": 50000, "image_link": None}]
+        
+        with patch.object(directions_service, "current_version", AsyncMock(return_value="42")), \
+             patch.object(directions_service, "get_directions_by_country", AsyncMock(return_value=directions)) as get_directions:
+            response = client.get("/backend/v1/directions/country/4/flat")
+            assert response.status_code == 200
+            assert response.headers["etag"] == 'W/"42"'
+            assert response.json() == directions
+            
+            cached = client.get("/backend/v1/directions/country/4/flat", headers={"If-None-Match": 'W/"42"'})
+            assert cached.status_code == 304
+            assert get_directions.await_count == 1
+
+    def test_directions_serialized_response_reused(self):
+        """Без изменения версии кэша повторный запрос не читает направления заново"""
+        directions = [{"country_name": "Египет", "country_id": 1, "city_name": "Хургада",
+                       "min_price": 40000, "image_link": None}]
+        
+        with patch.object(directions_service, "current_version", AsyncMock(return_value="v1")), \
+             patch.object(directions_service, "get_directions_by_country", AsyncMock(return_value=directions)) as get_directions:
+            first = client.get("/backend/v1/directions/country/1/flat")
+            second = client.get("/backend/v1/directions/country/1/flat")
+            assert get_directions.await_count == 1
+            assert second.content == first.content
+            
+            # Новая версия кэша - ответ собирается заново
+            directions_service.current_version.return_value = "v2"
+            third = client.get("/backend/v1/directions/country/1/flat")
+            assert get_directions.await_count == 2
+            assert third.headers["etag"] == 'W/"v2"'
+    
+    def test_directions_bytes_shared_through_redis(self):
+        """Ответ, сериализованный другим воркером, берется из Redis без пересборки"""
+        from app.api.v1 import directions as directions_api
+        
+        stored = {}
+        
+        async def set_raw(key, value, ttl=None):
+            stored[key] = value
+            return True
+        
+        async def get_raw(key):
+            return stored.get(key)
+        
+        directions = [{"country_name": "Таиланд", "country_id": 2, "city_name": "Пхукет",
+                       "min_price": 90000, "image_link": None}]
+        
+        with patch.object(directions_service, "current_version", AsyncMock(return_value="r1")), \
+             patch.object(directions_service, "get_directions_by_country", AsyncMock(return_value=directions)) as get_directions, \
+             patch.object(directions_api.cache_service, "set_raw", side_effect=set_raw), \
+             patch.object(directions_api.cache_service, "get_raw", side_effect=get_raw):
+            first = client.get("/backend/v1/directions/country/2")
+            assert first.status_code == 200
+            assert first.json()["directions"] == directions
+            assert "directions:response:r1:country:2" in stored
+            
+            # Память процесса пуста, как у соседнего воркера
+            directions_api._serialized_directions.clear()
+            second = client.get("/backend/v1/directions/country/2")
+            assert second.content == first.content
+            assert get_directions.await_count == 1
+    
+    def test_cache_clear_invalidates_directions_bytes(self):
+        """После очистки кэша направлений готовые байты ответов не отдаются, их ключи в Redis удаляются"""
+        from app.api.v1 import directions as directions_api
+        
+        directions = [{"country_name": "Турция", "country_id": 4, "city_name": "Анталья",
+                       "min_price": 50000, "image_link": None}]
+        versions = iter(["c1", "c2"])
+        
+        async def bump_version():
+            version = next(versions)
+            directions_service.current_version.return_value = version
+            return version
+        
+        directions_api._serialized_directions.clear()
+        delete_pattern = AsyncMock(return_value=0)
+        with patch.object(directions_service, "current_version", AsyncMock(return_value="c0")), \
+             patch.object(directions_service, "bump_version", side_effect=bump_version), \
+             patch.object(directions_service, "get_directions_by_country", AsyncMock(return_value=directions)) as get_directions, \
+             patch.object(directions_api.cache_service, "set_raw", AsyncMock(return_value=True)), \
+             patch.object(directions_api.cache_service, "get_raw", AsyncMock(return_value=None)), \
+             patch.object(directions_api.cache_service, "delete_pattern", delete_pattern):
+            client.get("/backend/v1/directions/country/4")
+            assert client.delete("/backend/v1/directions/cache/clear").status_code == 200
+            response = client.get("/backend/v1/directions/country/4")
+        
+        assert response.headers["etag"] == 'W/"c1"'
+        assert get_directions.await_count == 2
+        assert "directions:response:*" in [call.args[0] for call in delete_pattern.await_args_list]
+    
+    def test_serialized_directions_bounded(self):
+        """Число сериализованных ответов в памяти процесса ограничено"""
+        from app.api.v1 import directions as directions_api
+        
+        directions_api._serialized_directions.clear()
+        with patch.object(directions_api, "SERIALIZED_DIRECTIONS_MAX_ENTRIES", 3):
+            for limit in range(10):
+                directions_api._remember_directions_response(("filter", None, limit), 'W/"v"', b"[]")
+        
+        assert list(directions_api._serialized_directions) == [("filter", None, limit) for limit in (7, 8, 9)]
+        directions_api._serialized_directions.clear()
+    
+    def test_random_tours_stats_conditional_request(self):
+        """Статистика кэша случайных туров отдается с ETag и 304 при повторе"""
+        from app.tasks.random_tours_cache_update import random_tours_cache_update_service
+        
+        status = {"update_stats": {"end_time": "2024-01-01T10:00:00", "strategies_used": {"search": 3},
+                                   "hotel_types_details": {"beach": {"success": True, "tours_count": 8}}}}
+        with patch.object(random_tours_cache_update_service, "get_update_status", AsyncMock(return_value=status)):
+            response = client.get("/backend/v1/random-tours/cache/stats")
+            assert response.status_code == 200
+            assert response.json()["strategies_breakdown"]["most_successful_strategy"] == "search"
+            assert "stale-while-revalidate" in response.headers["cache-control"]
+            
+            etag = response.headers["etag"]
+            cached = client.get("/backend/v1/random-tours/cache/stats", headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            assert cached.content == b""
+    
+    def test_country_names_by_id_index(self):
+        """Обратный индекс стран совпадает с маппингом"""
+        for name, info in directions_service.COUNTRIES_MAPPING.items():
+            assert directions_service.COUNTRY_NAMES_BY_ID[info["country_id"]] == name
+        
+        response = client.get("/backend/v1/directions/countries/list")
+        assert response.status_code == 200
+        assert response.json()["total"] == len(directions_service.COUNTRIES_MAPPING)
+        
+        cached = client.get("/backend/v1/directions/countries/list", headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+
+    def test_system_info_precompressed(self):
+        """Статическая информация о системе отдается заранее сжатой"""
+        response = client.get("/system-info", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert isinstance(response.json(), dict)
+
+    def test_debug_endpoints_in_schema_only_in_debug(self):
+        """Отладочные endpoints попадают в OpenAPI-схему только в режиме DEBUG"""
+        from app.config import settings
+        
+        paths = app.openapi()["paths"]
+        assert ("/backend/v1/tours/test-api-connection" in paths) == settings.DEBUG
+        assert ("/backend/v1/directions/debug/regions/{country_id}" in paths) == settings.DEBUG
+        assert "/backend/v1/tours/random" in paths
+
+    def test_large_directions_response_gzipped(self):
+        """Большие ответы направлений сжимаются GZipMiddleware, маленькие - нет"""
+        directions = [{"country_name": "Турция", "country_id": 4, "city_name": f"Город {i}",
+                       "min_price": 50000 + i, "image_link": None} for i in range(50)]
+        
+        with patch.object(directions_service, "current_version", AsyncMock(return_value="gzip")), \
+             patch.object(directions_service, "get_directions_by_country", AsyncMock(return_value=directions)):
+            response = client.get("/backend/v1/directions/country/4/flat", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()) == 50
+        
+        small = client.get("/backend/v1/directions/countries/list", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+
+class TestReferencesAPI:
+    """Тесты справочников"""
+    
+    def test_reference_cacheable_by_clients(self):
+        """Справочник отдается с Cache-Control и ETag, повторный запрос с тем же ETag - 304"""
+        meal = {"lists": {"meals": {"meal": [{"id": 1, "name": "RO"}]}}}
+        
+        with patch("app.api.v1.references.cache_service.get", AsyncMock(return_value=meal)):
+            response = client.get("/backend/v1/references/meal-types")
+            cached = client.get("/backend/v1/references/meal-types", headers={"If-None-Match": response.headers["etag"]})
+            rates = client.get("/backend/v1/references/currency-rates")
+        
+        assert response.status_code == 200
+        assert response.json() == meal
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        assert cached.status_code == 304
+        assert rates.headers["cache-control"] == "public, max-age=300"
+
+
+class TestHotelToursAPI:
+    """Тесты туров отеля"""
+    
+    def test_cached_hotel_tours_returned_as_stored(self):
+        """Туры отеля из кэша отдаются без пересоздания моделей и повторного поиска"""
+        from app.models.tour import HotelInfo
+        
+        hotel = HotelInfo(
+            hotelcode="200", price=50000.0, countrycode="4", countryname="Турция",
+            regioncode="10", regionname="Анталья", hotelname="RESORT",
+            hotelstars=5, hotelrating=4.5, tours=[]
+        )
+        
+        with patch("app.api.v1.hotels.cache_service.get", AsyncMock(return_value=[hotel.model_dump()])), \
+             patch("app.api.v1.hotels.tour_service.search_tours", AsyncMock()) as search:
+            response = client.get("/backend/v1/hotels/200/tours?country_code=4")
+        
+        assert response.status_code == 200
+        assert response.json() == [hotel.model_dump()]
+        search.assert_not_awaited()
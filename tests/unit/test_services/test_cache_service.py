@@ -37,4 +37,115 @@ class TestCacheService:
             assert callable(cache_service.set)
             
         print("Cache service методы успешно протестированы")
-        assert True
\ No newline at end of file
+        assert True
+    
+    def test_get_multiple_uses_single_pipeline(self):
+        """get_multiple читает все ключи одним pipeline-запросом"""
+        import asyncio
+        from app.services.cache_service import CacheService
+        
+        raw_values = [b'json:{"a": 1}', None, b'json:[1, 2]']
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=raw_values)
+        pipe.__aenter__ = AsyncMock(return_value=pipe)
+        pipe.__aexit__ = AsyncMock(return_value=False)
+        client = MagicMock()
+        client.pipeline = MagicMock(return_value=pipe)
+        
+        service = CacheService()
+        with patch.object(service, 'get_client', AsyncMock(return_value=client)):
+            result = asyncio.run(service.get_multiple(["k1", "k2", "k3"]))
+        
+        assert result == {"k1": {"a": 1}, "k3": [1, 2]}
+        client.pipeline.assert_called_once_with(transaction=False)
+        assert pipe.get.call_count == 3
+        pipe.execute.assert_awaited_once()
+    
+    def test_get_keys_pattern_uses_scan(self):
+        """Поиск ключей по паттерну идет через SCAN, а не блокирующий KEYS"""
+        import asyncio
+        from app.services.cache_service import CacheService
+        
+        async def scan_iter(match, count):
+            for key in (b"random_tours_count_6", b"random_tours_count_8"):
+                yield key
+        
+        client = MagicMock()
+        client.scan_iter = MagicMock(side_effect=scan_iter)
+        
+        service = CacheService()
+        with patch.object(service, 'get_client', AsyncMock(return_value=client)):
+            keys = asyncio.run(service.get_keys_pattern("random_tours_count_*"))
+        
+        assert keys == ["random_tours_count_6", "random_tours_count_8"]
+        client.keys.assert_not_called()
+    
+    def test_delete_pattern_unlinks_in_batches(self):
+        """Удаление по паттерну: SCAN + UNLINK пачками, без KEYS и поштучного DEL"""
+        import asyncio
+        from app.services.cache_service import CacheService
+        
+        keys = [f"random_tours_type_{i}".encode() for i in range(5)]
+        
+        async def scan_iter(match, count):
+            for key in keys:
+                yield key
+        
+        client = MagicMock()
+        client.scan_iter = MagicMock(side_effect=scan_iter)
+        client.unlink = AsyncMock(side_effect=lambda *batch: len(batch))
+        
+        service = CacheService()
+        with patch.object(service, 'get_client', AsyncMock(return_value=client)):
+            deleted = asyncio.run(service.delete_pattern("random_tours_type_*", batch_size=2))
+        
+        assert deleted == 5
+        assert [len(call.args) for call in client.unlink.await_args_list] == [2, 2, 1]
+        client.keys.assert_not_called()
+        client.delete.assert_not_called()
+    
+    def test_set_serializes_models_directly(self):
+        """Список Pydantic-моделей сохраняется как JSON без предварительного .dict()"""
+        import asyncio
+        from datetime import date
+        from pydantic import BaseModel
+        from app.services.cache_service import CacheService
+        
+        class Tour(BaseModel):
+            hotelname: str
+            flydate: date
+        
+        client = MagicMock()
+        client.setex = AsyncMock()
+        
+        service = CacheService()
+        with patch.object(service, 'get_client', AsyncMock(return_value=client)):
+            saved = asyncio.run(service.set("tours", [Tour(hotelname="Отель", flydate=date(2025, 6, 1))], ttl=60))
+        
+        assert saved is True
+        key, ttl, stored = client.setex.await_args.args
+        assert (key, ttl) == ("tours", 60)
+        assert service._deserialize(stored.encode("utf-8")) == [{"hotelname": "Отель", "flydate": "2025-06-01"}]
+    
+    def test_check_roundtrip_uses_single_pipeline(self):
+        """Проверка здоровья кэша: SETEX, GET и DELETE уходят в Redis одним pipeline"""
+        import asyncio
+        from app.services.cache_service import CacheService
+        
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[True, b"test", 1])
+        pipe.__aenter__ = AsyncMock(return_value=pipe)
+        pipe.__aexit__ = AsyncMock(return_value=False)
+        client = MagicMock()
+        client.pipeline = MagicMock(return_value=pipe)
+        
+        service = CacheService()
+        with patch.object(service, 'get_client', AsyncMock(return_value=client)):
+            assert asyncio.run(service.check_roundtrip("health_check")) is True
+            pipe.execute = AsyncMock(return_value=[True, None, 0])
+            assert asyncio.run(service.check_roundtrip("health_check")) is False
+        
+        pipe.setex.assert_called_with("health_check", 60, "test")
+        pipe.get.assert_called_with("health_check")
+        pipe.delete.assert_called_with("health_check")
+        client.get.assert_not_called()
@@ -0,0 +1,76 @@
+import pytest
+from urllib.parse import parse_qs, urlparse
+
+from app.services.photo_service import PhotoService
+
+
+class TestFallbackImage:
+    """Тесты запасной фотографии направления"""
+    
+    def test_country_name_is_url_encoded(self):
+        """Название страны кодируется в query-параметре text"""
+        url = PhotoService.get_fallback_image(47, "Шри-Ланка & Мальдивы")
+        
+        assert " " not in url
+        assert parse_qs(urlparse(url).query)["text"] == ["Шри-Ланка & Мальдивы"]
+        assert "/FF6B6B/" in PhotoService.get_fallback_image(4, "Турция")
+
+
+class TestPlaceholderImage:
+    """Тесты распознавания заглушек"""
+    
+    @pytest.mark.parametrize("url, expected", [
+        (None, True),
+        ("", True),
+        ("https://via.placeholder.com/300x200?text=No+Image", True),
+        ("https://static.tourvisor.ru/hotel/NoImage.jpg", True),
+        ("https://cdn.example.com/DEFAULT/hotel.png", True),
+        ("https://static.tourvisor.ru/hotel_pics/main400/12345.jpg", False),
+    ])
+    def test_placeholder_detection(self, url, expected):
+        assert PhotoService.is_placeholder_image(url) is expected
+    
+    def test_photo_from_hot_tours_skips_placeholders(self):
+        """Из горящих туров берется первое настоящее фото: пустые ссылки и заглушки пропускаются"""
+        hot_tours = {"hottours": [
+            {"hotelname": "No picture"},
+            {"hotelname": "Blank", "hotelpicture": "  "},
+            {"hotelname": "Placeholder", "hotelpicture": "https://via.placeholder.com/250x150"},
+            {"hotelname": "Real", "hotelpicture": "https://img/real.jpg"},
+        ]}
+        
+        assert PhotoService()._photo_from_hot_tours(hot_tours) == ("https://img/real.jpg", "Real")
+        assert PhotoService()._photo_from_hot_tours({"hottours": hot_tours["hottours"][:3]}) is None
+
+
+class TestHotToursPhoto:
+    """Тесты получения фото через горящие туры"""
+    
+    def test_first_photo_wins_and_rest_cancelled(self):
+        """Фото берется из первого ответившего города, оставшиеся запросы отменяются"""
+        import asyncio
+        from unittest.mock import patch
+        
+        cancelled = []
+        delays = {1: 1.0, 2: 0.01, 3: 0.0}
+        
+        async def get_hot_tours(city, **params):
+            try:
+                await asyncio.sleep(delays[city])
+            except asyncio.CancelledError:
+                cancelled.append(city)
+                raise
+            if city == 3:
+                raise RuntimeError("timeout")
+            return {"hottours": [{"hotelname": f"Hotel {city}", "hotelpicture": f"https://img/{city}.jpg"}]}
+        
+        async def run():
+            photo = await PhotoService()._get_photo_via_hot_tours(4, "Турция")
+            await asyncio.sleep(0)
+            return photo
+        
+        with patch("app.services.photo_service.tourvisor_client.get_hot_tours", get_hot_tours):
+            photo = asyncio.run(run())
+        
+        assert photo == "https://img/2.jpg"
+        assert cancelled == [1]
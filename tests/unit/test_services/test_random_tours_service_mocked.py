@@ -56,4 +56,38 @@ class TestRandomToursServiceMocked:
             # Проверяем результат
             assert len(result) == 1
             assert result[0]["hotelname"] == "Test Hotel 1"
-            print(f"Мокированный тур: {result[0]}")
\ No newline at end of file
+            print(f"Мокированный тур: {result[0]}")
+    
+    def test_refresh_reports_cleared_keys(self):
+        """Принудительное обновление сообщает число удаленных ключей кэша"""
+        import asyncio
+        
+        with patch.object(random_tours_service.cache, "delete_pattern", AsyncMock(return_value=3)), \
+             patch.object(random_tours_service, "_generate_random_tours_multilevel", AsyncMock(return_value=[])):
+            result = asyncio.run(random_tours_service.refresh_random_tours(count=6))
+        
+        assert result["success"] is True
+        assert result["cleared_cache_keys"] == 3
+    
+    def test_fallback_mock_tours_readable_from_cache(self):
+        """Резервные туры с числовыми кодами из справочников TourVisor проходят валидацию при чтении из кэша"""
+        import asyncio
+        from app.models.tour import HotTourInfo
+        from app.tasks.random_tours_update import FALLBACK_POPULAR_COUNTRIES, RandomToursUpdateService
+        
+        references = {
+            "country": {"lists": {"countries": {"country": [{"id": 4, "name": FALLBACK_POPULAR_COUNTRIES[0]}]}}},
+            "departure": {"lists": {"departures": {"departure": [{"id": 1, "name": "Москва", "namefrom": "Москвы"}]}}},
+        }
+        service = RandomToursUpdateService()
+        saved = AsyncMock()
+        
+        with patch("app.tasks.random_tours_update.tourvisor_client.get_references",
+                   AsyncMock(side_effect=lambda ref_type: references[ref_type])), \
+             patch.object(service, "_save_tours_to_cache", saved):
+            asyncio.run(service._create_fallback_mock_data())
+        
+        tours = saved.await_args.args[0]
+        assert tours[0].countrycode == "4" and tours[0].departurecode == "1"
+        for tour in tours:
+            HotTourInfo(**tour.model_dump())
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from app.utils.singleflight import CachedFlight, SingleFlight
+
+
+class TestSingleFlight:
+    """Тесты объединения одновременных запросов"""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Одновременные вызовы с одним ключом выполняются один раз"""
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"tour_id": "123"}
+        
+        async def run():
+            flights = SingleFlight()
+            results = await asyncio.gather(*[flights.do("tour:123", work) for _ in range(5)])
+            return flights, results
+        
+        flights, results = asyncio.run(run())
+        
+        assert len(calls) == 1
+        assert all(r == {"tour_id": "123"} for r in results)
+        assert flights.inflight_count() == 0
+    
+    def test_different_keys_are_independent(self):
+        """Разные ключи не объединяются"""
+        calls = []
+        
+        async def run():
+            flights = SingleFlight()
+            
+            async def work(key):
+                calls.append(key)
+                return key
+            
+            return await asyncio.gather(
+                flights.do("a", lambda: work("a")),
+                flights.do("b", lambda: work("b"))
+            )
+        
+        assert asyncio.run(run()) == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+    
+    def test_error_propagates_to_all_waiters(self):
+        """Ошибка передается всем ожидающим и ключ освобождается"""
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream error")
+        
+        async def run():
+            flights = SingleFlight()
+            results = await asyncio.gather(
+                flights.do("x", failing),
+                flights.do("x", failing),
+                return_exceptions=True
+            )
+            return flights, results
+        
+        flights, results = asyncio.run(run())
+        
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flights.inflight_count() == 0
+
+
+class TestCachedFlight:
+    """Тесты single-flight с коротким кэшем результата"""
+    
+    def test_result_reused_within_ttl(self):
+        """Результат переиспользуется в пределах ttl, после сброса вычисляется заново"""
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+        
+        async def run():
+            flights = CachedFlight(ttl=60)
+            first = await asyncio.gather(*[flights.do("status", work) for _ in range(3)])
+            again = await flights.do("status", work)
+            flights.clear()
+            refreshed = await flights.do("status", work)
+            return first, again, refreshed
+        
+        first, again, refreshed = asyncio.run(run())
+        
+        assert first == [1, 1, 1]
+        assert again == 1
+        assert refreshed == 2
+    
+    def test_errors_not_cached(self):
+        """Ошибка не сохраняется - следующий вызов выполняет работу снова"""
+        calls = []
+        
+        async def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError("upstream error")
+            return "ok"
+        
+        async def run():
+            flights = CachedFlight(ttl=60)
+            with pytest.raises(ValueError):
+                await flights.do("status", flaky)
+            return await flights.do("status", flaky)
+        
+        assert asyncio.run(run()) == "ok"
+        assert len(calls) == 2
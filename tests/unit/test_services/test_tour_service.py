@@ -74,4 +74,328 @@ class TestToursAPI:
         
         print(f"Работающие endpoints: {working_endpoints}")
         # Хотя бы один endpoint должен работать
-        assert len(working_endpoints) >= 1
\ No newline at end of file
+        assert len(working_endpoints) >= 1
+    
+    def test_search_results_streamed_as_search_result(self):
+        """Потоковые результаты поиска совпадают с сериализацией SearchResult"""
+        from unittest.mock import AsyncMock, patch
+        from app.models.tour import SearchResult, SearchStatus, HotelInfo
+        
+        hotel = HotelInfo(
+            hotelcode="1", price=50000.0, countrycode="4", countryname="Турция",
+            regioncode="10", regionname="Анталья", hotelname="TEST HOTEL",
+            hotelstars=5, hotelrating=4.5, tours=[]
+        )
+        search_result = SearchResult(
+            status=SearchStatus(state="finished", hotelsfound=2, toursfound=0, progress=100, timepassed=5),
+            result=[hotel, hotel]
+        )
+        
+        with patch("app.api.v1.tours.tour_service.get_search_results",
+                   AsyncMock(return_value=search_result)):
+            response = test_client.get("/backend/v1/tours/search/req1/results")
+        
+        assert response.status_code == 200
+        assert response.json() == search_result.model_dump()
+    
+    def test_search_results_small_page_not_streamed(self):
+        """Маленькая страница отдается одним ответом с Content-Length, большая - потоком"""
+        from unittest.mock import AsyncMock, patch
+        from app.models.tour import SearchResult, SearchStatus, HotelInfo
+        
+        hotel = HotelInfo(
+            hotelcode="1", price=50000.0, countrycode="4", countryname="Турция",
+            regioncode="10", regionname="Анталья", hotelname="TEST HOTEL",
+            hotelstars=5, hotelrating=4.5, tours=[]
+        )
+        status = SearchStatus(state="finished", hotelsfound=6, toursfound=0, progress=100, timepassed=5)
+        
+        for hotels, streamed in (([hotel], False), ([hotel] * 6, True)):
+            search_result = SearchResult(status=status, result=hotels)
+            with patch("app.api.v1.tours.tour_service.get_search_results",
+                       AsyncMock(return_value=search_result)):
+                response = test_client.get("/backend/v1/tours/search/req1/results")
+            
+            assert response.json() == search_result.model_dump()
+            assert ("content-length" not in response.headers) == streamed
+    
+    def test_random_generate_runs_in_background(self):
+        """Генерация случайных туров запускается в фоне и сразу отвечает 202"""
+        from unittest.mock import AsyncMock, patch
+        
+        with patch("app.api.v1.tours.random_tours_service._generate_fully_random_tours",
+                   AsyncMock(return_value=[])) as generate:
+            response = test_client.get("/backend/v1/tours/random/generate?count=4&hotel_types=beach")
+        
+        assert response.status_code == 202
+        assert response.headers["location"].endswith("/backend/v1/tours/random?count=4&hotel_types=beach")
+        generate.assert_awaited_once()
+        assert generate.await_args.args[0].count == 4
+    
+    def test_concurrent_random_requests_are_coalesced(self):
+        """Одновременные одинаковые запросы случайных туров генерируются один раз"""
+        import asyncio
+        from unittest.mock import AsyncMock, patch
+        from app.services.random_tours_service import RandomToursService
+        from app.models.tour import RandomTourRequest
+        
+        service = RandomToursService()
+        calls = []
+        
+        async def generate(request):
+            calls.append(request.hotel_types)
+            await asyncio.sleep(0.01)
+            return []
+        
+        async def run():
+            return await asyncio.gather(
+                service.get_random_tours(RandomTourRequest(count=6, hotel_types=["beach", "relax"])),
+                service.get_random_tours(RandomTourRequest(count=6, hotel_types=["relax", "beach"])),
+                service.get_random_tours(RandomTourRequest(count=6, hotel_types=["beach", "relax"]))
+            )
+        
+        with patch.object(service, "_get_cached_tours_with_filters", AsyncMock(return_value=[])), \
+                patch.object(service, "_generate_random_tours_multilevel", generate):
+            asyncio.run(run())
+        
+        assert len(calls) == 1
+    
+    def test_concurrent_hotel_searches_are_coalesced(self):
+        """Одновременные поиски туров по одному отелю выполняются один раз"""
+        import asyncio
+        from unittest.mock import patch
+        from app.api.v1.tours import search_tours_by_hotel
+        
+        calls = []
+        
+        async def search_tours_by_hotel_name(hotel_name, country_code):
+            calls.append((hotel_name, country_code))
+            await asyncio.sleep(0.01)
+            return []
+        
+        async def run():
+            return await asyncio.gather(
+                search_tours_by_hotel(hotel_name="Rixos", country_code=4),
+                search_tours_by_hotel(hotel_name="rixos", country_code=4),
+                search_tours_by_hotel(hotel_name="Rixos", country_code=1)
+            )
+        
+        with patch("app.api.v1.tours.tour_service.search_tours_by_hotel_name", search_tours_by_hotel_name):
+            asyncio.run(run())
+        
+        assert sorted(code for _, code in calls) == [1, 4]
+    
+    def test_api_connection_check_runs_requests_concurrently(self):
+        """Проверка подключения запрашивает справочники одновременно"""
+        import asyncio
+        from unittest.mock import patch
+        from app.api.v1.tours import test_api_connection
+        from app.utils.singleflight import CachedFlight
+        
+        started = []
+        
+        async def get_references(ref_type, **filters):
+            started.append(ref_type)
+            await asyncio.sleep(0.01)
+            # Оба запроса должны стартовать до завершения первого
+            assert len(started) == 2
+            return {ref_type: []}
+        
+        async def run():
+            # Повторная проверка в пределах TTL отдается без запросов к API
+            return await test_api_connection(), await test_api_connection()
+        
+        with patch("app.api.v1.tours.tourvisor_client.get_references", get_references), \
+             patch("app.api.v1.tours._api_connection_flights", CachedFlight(ttl=5)):
+            result, repeated = asyncio.run(run())
+        
+        assert result["success"] is True
+        assert result["regions_response"]["keys"] == ["region"]
+        assert repeated is result
+        assert len(started) == 2
+    
+    def test_api_connection_check_reports_each_reference(self):
+        """Ошибка одного справочника не скрывает ответ другого"""
+        import asyncio
+        from unittest.mock import patch
+        from app.api.v1.tours import test_api_connection
+        from app.utils.singleflight import CachedFlight
+        
+        async def get_references(ref_type, **filters):
+            if ref_type == "region":
+                raise RuntimeError("timeout")
+            return {ref_type: []}
+        
+        with patch("app.api.v1.tours.tourvisor_client.get_references", get_references), \
+             patch("app.api.v1.tours._api_connection_flights", CachedFlight(ttl=5)):
+            result = asyncio.run(test_api_connection())
+        
+        assert result["success"] is False
+        assert result["countries_response"]["keys"] == ["country"]
+        assert result["regions_response"] == {"error": "timeout", "type": "RuntimeError"}
+    
+    def test_unknown_hotel_types_rejected(self):
+        """Неизвестные типы отелей отклоняются валидацией с 422 в GET и POST"""
+        import re
+        from app.models.tour import HOTEL_TYPES_QUERY_PATTERN, RandomTourRequest
+        
+        assert test_client.get("/backend/v1/tours/random?hotel_types=beach,spa").status_code == 422
+        assert test_client.post("/backend/v1/tours/random", json={"count": 3, "hotel_types": ["spa"]}).status_code == 422
+        
+        # Пустое значение и пустые элементы по-прежнему означают "без фильтра" / только известные типы
+        for value in ("", " , ", "beach,", "beach, relax,,"):
+            assert re.match(HOTEL_TYPES_QUERY_PATTERN, value)
+        assert not re.match(HOTEL_TYPES_QUERY_PATTERN, "beach,spa")
+        
+        request = RandomTourRequest(hotel_types=["beach"])
+        assert request.hotel_types == ["beach"]
+        assert f"random_tours_type_{request.hotel_types[0]}" == "random_tours_type_beach"
+    
+    def test_random_tours_serialized_without_revalidation(self):
+        """GET /random отдает туры, сериализованные напрямую из HotTourInfo"""
+        from unittest.mock import patch, AsyncMock
+        from app.models.tour import HotTourInfo
+        
+        tour = HotTourInfo.model_construct(
+            countrycode="4", countryname="Турция", departurecode="1", departurename="Москва",
+            departurenamefrom="Москвы", operatorcode="10", operatorname="Оператор",
+            hotelcode="200", hotelname="RESORT", hotelstars=5, hotelregioncode="100",
+            hotelregionname="Анталья", hotelpicture="https://example.com/1.jpg", fulldesclink=None,
+            flydate="15.07.2025", nights=7, meal="AI", price=85000.0, priceold=None, currency="RUB"
+        )
+        
+        with patch("app.api.v1.tours.random_tours_service.get_random_tours", AsyncMock(return_value=[tour])):
+            response = test_client.get("/backend/v1/tours/random?count=1")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == [tour.model_dump()]
+    
+    def test_parse_hotel_types(self):
+        """Типы отелей из query-строки: пробелы, пустые и неизвестные элементы отбрасываются"""
+        from app.api.v1.tours import _parse_hotel_types
+        
+        assert _parse_hotel_types("beach, relax,,") == ("beach", "relax")
+        assert _parse_hotel_types("beach,spa,DELUXE") == ("beach",)
+        assert _parse_hotel_types(None) is None
+        assert _parse_hotel_types(" , ") is None
+        assert _parse_hotel_types("unknown") is None
+    
+    def test_tour_batch_aligned_with_ids(self):
+        """Пакетное получение туров: ответ в порядке ids, ошибки и пустые ответы - null"""
+        import asyncio
+        from unittest.mock import AsyncMock, patch
+        from app.models.tour import DetailedTourInfo
+        
+        running = []
+        peak = []
+        
+        async def search_tour_by_id(tour_id):
+            running.append(tour_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(tour_id)
+            if tour_id == "bad":
+                raise RuntimeError("TourVisor error")
+            if tour_id == "missing":
+                return None
+            return DetailedTourInfo(tour={"id": tour_id}, flights=[])
+        
+        ids = ["t1", "bad", "missing"] + [f"t{i}" for i in range(2, 15)]
+        with patch("app.api.v1.tours.tour_service.search_tour_by_id", search_tour_by_id), \
+             patch("app.api.v1.tours.tour_service.cache.get", AsyncMock(return_value=None)), \
+             patch("app.api.v1.tours.tour_service.cache.set", AsyncMock(return_value=True)):
+            response = test_client.post("/backend/v1/tours/tour/batch", json={"ids": ids})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == len(ids)
+        assert data[0]["tour"] == {"id": "t1"}
+        assert data[1] is None and data[2] is None
+        assert data[-1]["tour"] == {"id": "t14"}
+        assert max(peak) <= 10
+    
+    def test_tour_batch_stream_in_completion_order(self):
+        """Потоковый пакет: быстрые туры приходят раньше медленного, у каждого события свой индекс"""
+        import asyncio
+        import orjson
+        from unittest.mock import AsyncMock, patch
+        from app.models.tour import DetailedTourInfo
+        
+        async def search_tour_by_id(tour_id):
+            await asyncio.sleep(0.05 if tour_id == "slow" else 0)
+            if tour_id == "missing":
+                return None
+            return DetailedTourInfo(tour={"id": tour_id}, flights=[])
+        
+        with patch("app.api.v1.tours.tour_service.search_tour_by_id", search_tour_by_id), \
+             patch("app.api.v1.tours.tour_service.cache.get", AsyncMock(return_value=None)), \
+             patch("app.api.v1.tours.tour_service.cache.set", AsyncMock(return_value=True)):
+            response = test_client.post("/backend/v1/tours/tour/batch/stream", json={"ids": ["slow", "fast", "missing"]})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = response.text.strip().split("\n\n")
+        assert events[-1] == "event: done\ndata: {}"
+        items = [orjson.loads(event[len("data: "):]) for event in events[:-1]]
+        assert len(items) == 3
+        assert items[-1]["index"] == 0 and items[-1]["tour"]["tour"] == {"id": "slow"}
+        assert {item["index"]: item["tour"] for item in items}[2] is None
+    
+    def test_tour_batch_stream_serves_cached_tours(self):
+        """Потоковый пакет отдает туры из кэша, где они хранятся словарями"""
+        import orjson
+        from unittest.mock import AsyncMock, patch
+        
+        cached_tour = {"tour": {"id": "cached"}, "flights": []}
+        
+        async def cache_get(key):
+            return cached_tour if key == "tour_details:cached" else None
+        
+        with patch("app.api.v1.tours.tour_service.search_tour_by_id", AsyncMock(return_value=None)), \
+             patch("app.api.v1.tours.tour_service.cache.get", cache_get):
+            response = test_client.post("/backend/v1/tours/tour/batch/stream", json={"ids": ["cached", "missing"]})
+        
+        assert response.status_code == 200
+        events = response.text.strip().split("\n\n")
+        assert events[-1] == "event: done\ndata: {}"
+        items = {item["index"]: item["tour"] for item in (orjson.loads(event[len("data: "):]) for event in events[:-1])}
+        assert items == {0: cached_tour, 1: None}
+    
+    def test_batch_size_limited(self):
+        """Пустой или слишком большой пакет отклоняется валидацией"""
+        assert test_client.post("/backend/v1/tours/tour/batch", json={"ids": []}).status_code == 422
+        assert test_client.post(
+            "/backend/v1/tours/actualize/batch",
+            json={"tours": [{"tour_id": str(i)} for i in range(21)]}
+        ).status_code == 422
+    
+    def test_concurrent_actualizations_share_detail_request(self):
+        """Одновременные актуализации одного тура через разные endpoint'ы делают один запрос actdetail.php"""
+        import asyncio
+        from unittest.mock import patch
+        from app.models.tour import TourActualizationRequest
+        from app.services.tour_service import TourService
+        
+        calls = []
+        
+        async def get_detailed_actualization(tour_id):
+            calls.append(tour_id)
+            await asyncio.sleep(0.01)
+            return {"tour": {"tourid": tour_id}, "flights": [], "tourinfo": {}}
+        
+        async def run():
+            service = TourService()
+            return await asyncio.gather(
+                service.search_tour_by_id("42"),
+                service.actualize_tour(TourActualizationRequest(tour_id="42", request_check=0)),
+                service.actualize_tour(TourActualizationRequest(tour_id="42", currency=1)),
+                service.actualize_tour(TourActualizationRequest(tour_id="7"))
+            )
+        
+        with patch("app.services.tour_service.tourvisor_client.get_detailed_actualization",
+                   get_detailed_actualization):
+            results = asyncio.run(run())
+        
+        assert sorted(calls) == ["42", "7"]
+        assert [result.tour["tourid"] for result in results] == ["42", "42", "42", "7"]
@@ -0,0 +1,250 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.core.tourvisor_client import TourVisorClient
+
+
+class TestSearchStatusCache:
+    """Тесты короткого кэша статусов поиска TourVisor"""
+    
+    def test_concurrent_polls_share_one_request(self):
+        """Одновременные опросы одного поиска делают один HTTP-запрос"""
+        calls = []
+        
+        async def fetch(request_id):
+            calls.append(request_id)
+            await asyncio.sleep(0.01)
+            return {"data": {"status": {"state": "searching"}}}
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "_fetch_search_status", fetch):
+                return await asyncio.gather(*[client.get_search_status("req1") for _ in range(10)])
+        
+        results = asyncio.run(run())
+        
+        assert calls == ["req1"]
+        assert all(r["data"]["status"]["state"] == "searching" for r in results)
+    
+    def test_errors_are_not_cached(self):
+        """После ошибки следующий опрос делает новый запрос"""
+        calls = []
+        
+        async def fetch(request_id):
+            calls.append(request_id)
+            if len(calls) == 1:
+                raise RuntimeError("TourVisor недоступен")
+            return {"data": {"status": {"state": "finished"}}}
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "_fetch_search_status", fetch):
+                with pytest.raises(RuntimeError):
+                    await client.get_search_status("req1")
+                return await client.get_search_status("req1")
+        
+        result = asyncio.run(run())
+        
+        assert len(calls) == 2
+        assert result["data"]["status"]["state"] == "finished"
+
+
+class TestSearchAndWait:
+    """Тесты составного метода поиска"""
+    
+    def test_runs_search_wait_and_results_in_order(self):
+        """Поиск, ожидание и результаты выполняются последовательно для одного request_id"""
+        calls = []
+        
+        async def search_tours(params):
+            calls.append(("search", params["country"]))
+            return "req1"
+        
+        async def wait_for_search(request_id, poll_delays):
+            calls.append(("wait", request_id))
+        
+        async def get_search_results(request_id, page, onpage):
+            calls.append(("results", request_id, page, onpage))
+            return {"data": {"status": {"state": "finished"}, "result": {}}}
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "search_tours", search_tours), \
+                 patch.object(client, "wait_for_search", wait_for_search), \
+                 patch.object(client, "get_search_results", get_search_results):
+                return await client.search_and_wait({"departure": 1, "country": 4}, 1, 10)
+        
+        request_id, results = asyncio.run(run())
+        
+        assert request_id == "req1"
+        assert results["data"]["status"]["state"] == "finished"
+        assert calls == [("search", 4), ("wait", "req1"), ("results", "req1", 1, 10)]
+
+    
+    def test_wait_for_search_stops_when_ready(self):
+        """Ожидание поиска завершается по условию ready, номер опроса передается в условие"""
+        from app.core.tourvisor_client import search_hotels_found
+        
+        statuses = iter([{"hotelsfound": "3"}, {"hotelsfound": "5"}, {"hotelsfound": "8"}, {"state": "finished"}])
+        polls = []
+        
+        async def get_search_status(request_id):
+            polls.append(request_id)
+            return {"data": {"status": next(statuses)}}
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "get_search_status", get_search_status):
+                return await client.wait_for_search(
+                    "req1",
+                    (0, 0.01, 0.02, 0.03),
+                    ready=lambda status_data, attempt: attempt >= 2 and search_hotels_found(status_data) > 0
+                )
+        
+        status = asyncio.run(run())
+        
+        assert status["data"]["status"] == {"hotelsfound": "8"}
+        assert len(polls) == 3
+
+
+class TestReferencesCache:
+    """Тесты кэша справочников TourVisor"""
+    
+    def test_references_fetched_once(self):
+        """Повторные и одновременные запросы справочника делают один HTTP-запрос"""
+        calls = []
+        
+        async def fetch(ref_type, filters):
+            calls.append((ref_type, filters))
+            await asyncio.sleep(0.01)
+            return {"lists": {"countries": {"country": [{"id": "4", "name": "Турция"}]}}}
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "_fetch_references", fetch):
+                await asyncio.gather(*[client.get_references("country") for _ in range(5)])
+                await client.get_references("country")
+                await client.get_references("region", regcountry=4)
+        
+        asyncio.run(run())
+        
+        assert calls == [("country", {}), ("region", {"regcountry": 4})]
+    
+    def test_errors_cached_briefly(self):
+        """Ошибка справочника кэшируется на короткое время"""
+        calls = []
+        
+        async def fetch(ref_type, filters):
+            calls.append(ref_type)
+            raise RuntimeError("TourVisor недоступен")
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "_fetch_references", fetch):
+                for _ in range(3):
+                    with pytest.raises(RuntimeError):
+                        await client.get_references("country")
+                
+                # После истечения короткого TTL ошибки делается новый запрос
+                with patch("app.core.tourvisor_client.time.monotonic", return_value=time.monotonic() + 60):
+                    with pytest.raises(RuntimeError):
+                        await client.get_references("country")
+        
+        asyncio.run(run())
+        
+        assert calls == ["country", "country"]
+
+    
+    def test_clear_short_ttl_and_size_limit(self):
+        """Сброс памяти справочников, короткий TTL курсов валют и ограничение числа записей"""
+        calls = []
+        
+        async def fetch(ref_type, filters):
+            calls.append(ref_type)
+            return {ref_type: []}
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "_fetch_references", fetch), \
+                 patch("app.core.tourvisor_client.REFERENCES_CACHE_MAX_ENTRIES", 3):
+                await client.get_references("country")
+                client.clear_references_cache()
+                await client.get_references("country")
+                
+                await client.get_references("currency")
+                with patch("app.core.tourvisor_client.time.monotonic", return_value=time.monotonic() + 400):
+                    await client.get_references("currency")
+                
+                for hotel_code in range(5):
+                    await client.get_references("hotel", hotelcode=hotel_code)
+                return len(client._references_cache)
+        
+        size = asyncio.run(run())
+        
+        assert calls[:4] == ["country", "country", "currency", "currency"]
+        assert size <= 3
+
+
+class TestSharedSession:
+    """Тесты использования общей HTTP-сессии"""
+    
+    def test_hotel_info_uses_shared_session(self):
+        """Информация об отеле запрашивается через общую сессию клиента"""
+        response = MagicMock(status=200)
+        response.text = AsyncMock(return_value='{"data": {}}')
+        response.json = AsyncMock(return_value={"data": {"hotel": {"name": "RESORT"}}})
+        response.__aenter__ = AsyncMock(return_value=response)
+        response.__aexit__ = AsyncMock(return_value=False)
+        
+        session = MagicMock()
+        session.get = MagicMock(return_value=response)
+        
+        async def run():
+            client = TourVisorClient()
+            with patch.object(client, "get_session", AsyncMock(return_value=session)):
+                return await client.get_hotel_info("200")
+        
+        result = asyncio.run(run())
+        
+        assert result["data"]["hotel"]["name"] == "RESORT"
+        session.get.assert_called_once()
+        assert session.get.call_args.kwargs["params"]["hotelcode"] == "200"
+    
+    def test_concurrent_requests_limited(self):
+        """Одновременно к TourVisor уходит не больше max_concurrency запросов"""
+        in_flight = []
+        peak = []
+        
+        class SlowResponse:
+            status = 200
+            
+            async def __aenter__(self):
+                in_flight.append(1)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.01)
+                return self
+            
+            async def __aexit__(self, *exc):
+                in_flight.pop()
+                return False
+            
+            async def text(self):
+                return '{"data": {}}'
+            
+            async def json(self):
+                return {"data": {}}
+        
+        session = MagicMock()
+        session.get = MagicMock(side_effect=lambda url, params: SlowResponse())
+        
+        async def run():
+            client = TourVisorClient()
+            client._request_semaphore = asyncio.Semaphore(3)
+            with patch.object(client, "get_session", AsyncMock(return_value=session)):
+                await asyncio.gather(*[client._make_request("list.php", {"format": "json"}) for _ in range(10)])
+        
+        asyncio.run(run())
+        
+        assert session.get.call_count == 10
+        assert max(peak) == 3
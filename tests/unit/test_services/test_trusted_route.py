@@ -0,0 +1,83 @@
+from typing import List, Optional
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.api.routing import TrustedResponseRoute
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+
+
+router = APIRouter(route_class=TrustedResponseRoute)
+
+
+@router.get("/items", response_model=List[Item])
+async def items():
+    # Словари (например, из кэша) идут через response_model: лишнее поле отбрасывается
+    return [{"name": "Отель", "price": 50000.0, "internal": True}]
+
+
+@router.get("/mixed", response_model=List[Optional[Item]])
+async def mixed():
+    return [Item(name="Отель", price=50000.0), {"name": "Вилла", "price": "90000", "internal": True}, None]
+
+
+@router.get("/models", response_model=List[Item])
+async def models():
+    return [Item(name="Отель", price=50000.0), Item.model_construct(name="Вилла", price=90000.0)]
+
+
+@router.post("/models", response_model=Item, status_code=201)
+async def create_model():
+    return Item(name="Отель", price=50000.0)
+
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+class TestTrustedResponseRoute:
+    """Тесты маршрута без повторной валидации ответа"""
+    
+    def test_dict_response_is_validated(self):
+        """Словари по-прежнему валидируются и фильтруются по response_model"""
+        response = client.get("/items")
+        
+        assert response.status_code == 200
+        assert response.json() == [{"name": "Отель", "price": 50000.0}]
+    
+    def test_mixed_list_is_validated(self):
+        """Список из моделей, словарей и None идет обычным путем FastAPI"""
+        response = client.get("/mixed")
+        
+        assert response.status_code == 200
+        assert response.json() == [{"name": "Отель", "price": 50000.0}, {"name": "Вилла", "price": 90000.0}, None]
+    
+    def test_response_model_stays_in_openapi(self):
+        """response_model по-прежнему описывает ответ в OpenAPI"""
+        schema = client.get("/openapi.json").json()
+        response_schema = schema["paths"]["/items"]["get"]["responses"]["200"]
+        
+        assert "Item" in str(response_schema)
+    
+    def test_models_serialized_directly(self):
+        """Модели сериализуются pydantic-core напрямую, минуя jsonable_encoder"""
+        from unittest.mock import patch
+        
+        with patch("fastapi.routing.jsonable_encoder") as encoder:
+            response = client.get("/models")
+        
+        encoder.assert_not_called()
+        assert response.status_code == 200
+        assert response.json() == [{"name": "Отель", "price": 50000.0}, {"name": "Вилла", "price": 90000.0}]
+    
+    def test_status_code_preserved(self):
+        """status_code маршрута сохраняется для прямой сериализации"""
+        response = client.post("/models")
+        
+        assert response.status_code == 201
+        assert response.json() == {"name": "Отель", "price": 50000.0}
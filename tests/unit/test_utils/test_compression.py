@@ -0,0 +1,51 @@
+import gzip
+from unittest.mock import MagicMock
+
+from app.utils.compression import PrecompressedBody
+
+
+def make_request(accept_encoding: str = ""):
+    request = MagicMock()
+    request.headers = {"accept-encoding": accept_encoding} if accept_encoding else {}
+    return request
+
+
+class TestPrecompressedBody:
+    """Тесты заранее сжатых статических ответов"""
+    
+    def test_gzip_for_accepting_clients(self):
+        """Клиент с gzip получает сжатое тело и Content-Encoding"""
+        body = b'{"hotel_types":"' + b"beach," * 500 + b'"}'
+        precompressed = PrecompressedBody(body)
+        
+        response = precompressed.response(make_request("gzip, deflate"), headers={"Cache-Control": "public"})
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["cache-control"] == "public"
+        assert gzip.decompress(response.body) == body
+    
+    def test_plain_body_without_gzip(self):
+        """Без Accept-Encoding или для маленького тела отдается исходный JSON"""
+        body = b'{"a":1}' * 300
+        
+        response = PrecompressedBody(body).response(make_request())
+        assert "content-encoding" not in response.headers
+        assert response.body == body
+        
+        small = PrecompressedBody(b'{"a":1}').response(make_request("gzip"))
+        assert "content-encoding" not in small.headers
+        assert small.headers["vary"] == "Accept-Encoding"
+    
+    def test_not_modified_for_matching_etag(self):
+        """Совпадающий If-None-Match дает 304 без тела"""
+        precompressed = PrecompressedBody(b'{"hotel_types":{}}')
+        request = make_request()
+        request.headers = {"if-none-match": precompressed.etag}
+        
+        response = precompressed.response(request)
+        
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == precompressed.etag
+        assert precompressed.response(make_request()).headers["etag"] == precompressed.etag
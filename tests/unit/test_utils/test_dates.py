@@ -0,0 +1,36 @@
+from datetime import date, datetime
+from app.utils.dates import format_date_offset
+
+
+class TestFormatDateOffset:
+    """Тесты форматирования дат для TourVisor"""
+    
+    def test_formats_offset_in_tourvisor_format(self):
+        """Смещение считается от переданного дня, формат дд.мм.гггг"""
+        assert format_date_offset(date(2025, 7, 28), 7) == "04.08.2025"
+    
+    def test_result_is_cached_per_day_and_offset(self):
+        """Повторный вызов с тем же днем берется из кэша"""
+        format_date_offset.cache_clear()
+        format_date_offset(date(2025, 1, 1), 14)
+        format_date_offset(date(2025, 1, 1), 14)
+        
+        assert format_date_offset.cache_info().hits == 1
+
+
+class TestNowIso:
+    """Тесты кэшированной отметки времени"""
+    
+    def test_same_string_within_one_second(self):
+        """В пределах одной секунды возвращается одна и та же строка"""
+        from unittest.mock import patch
+        from app.utils.dates import now_iso
+        
+        with patch("app.utils.dates.time.time", return_value=1751000000.1):
+            first = now_iso()
+        with patch("app.utils.dates.time.time", return_value=1751000000.9):
+            assert now_iso() is first
+        with patch("app.utils.dates.time.time", return_value=1751000001.0):
+            assert now_iso() != first
+        
+        assert first == datetime.fromtimestamp(1751000000).isoformat()
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.utils.exceptions import handle_errors
+
+
+class TestHandleErrors:
+    """Тесты декоратора обработки ошибок endpoint'ов"""
+    
+    def test_returns_result_without_errors(self):
+        """Успешный результат возвращается как есть"""
+        @handle_errors("Ошибка теста")
+        async def endpoint(value: int):
+            return value * 2
+        
+        assert asyncio.run(endpoint(21)) == 42
+    
+    def test_wraps_exception_into_http_500(self):
+        """Произвольная ошибка превращается в HTTP 500"""
+        @handle_errors("Ошибка теста")
+        async def endpoint():
+            raise ValueError("сломалось")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(endpoint())
+        
+        assert exc_info.value.status_code == 500
+        assert exc_info.value.detail == "сломалось"
+    
+    def test_detail_prefix(self):
+        """Префикс detail добавляется к тексту ошибки для клиента"""
+        @handle_errors("Ошибка теста", detail="Ошибка при получении статуса")
+        async def endpoint():
+            raise ValueError("сломалось")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(endpoint())
+        
+        assert exc_info.value.detail == "Ошибка при получении статуса: сломалось"
+    
+    def test_http_exception_passes_through(self):
+        """HTTPException пробрасывается без изменений"""
+        @handle_errors("Ошибка теста")
+        async def endpoint():
+            raise HTTPException(status_code=404, detail="Тур не найден")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(endpoint())
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_message_includes_endpoint_params(self, caplog):
+        """Параметры endpoint'а подставляются в текст лога"""
+        @handle_errors("Ошибка для отеля {hotel_code}")
+        async def endpoint(hotel_code: str):
+            raise ValueError("сломалось")
+        
+        with pytest.raises(HTTPException):
+            asyncio.run(endpoint(hotel_code="123"))
+        
+        assert "Ошибка для отеля 123: сломалось" in caplog.text
+
+
+class TestUnhandledExceptionHandler:
+    """Тесты обработчика необработанных ошибок приложения"""
+    
+    def test_returns_precomputed_json_500(self):
+        """Ошибка вне handle_errors отдается как JSON 500 без деталей исключения"""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app.utils.exceptions import unhandled_exception_handler
+        
+        app = FastAPI()
+        app.add_exception_handler(Exception, unhandled_exception_handler)
+        
+        @app.get("/boom")
+        async def boom():
+            raise RuntimeError("секретная деталь")
+        
+        response = TestClient(app, raise_server_exceptions=False).get("/boom")
+        
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Внутренняя ошибка сервера"}
+        assert "секретная" not in response.text